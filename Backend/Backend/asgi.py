@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 application = get_asgi_application()
+
+# Release or drop idle collections in the background of the serving process
+from document_retriever.sweeper import start_sweeper  # noqa: E402
+
+start_sweeper()
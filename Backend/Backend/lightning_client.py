@@ -0,0 +1,439 @@
+"""
+Shared HTTP client for calls from the Django apps to the Lightning.AI server.
+
+All calls go through pooled, keep-alive connections with per-endpoint timeouts,
+bounded retries with jitter for idempotent calls, and a circuit breaker that fails
+fast while the Lightning server is unhealthy. `LightningClient` serves synchronous
+code and `AsyncLightningClient` serves async views; both share the breaker and stats.
+"""
+
+import time
+import random
+import asyncio
+import threading
+import weakref
+from collections import defaultdict, deque
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised without sending the request while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout`
+    seconds, then lets a single trial call through (half-open) to decide whether to close again.
+    A trial that reports no outcome within `reset_timeout` seconds is given up, and a new one is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+        - failure_threshold (int): Consecutive failures that open the circuit (default: 5).
+        - reset_timeout (float): Seconds the circuit stays open before a trial call (default: 30).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        Return whether a call may be attempted now.
+        """
+        with self.lock:
+            now = time.monotonic()
+            # Open for long enough, or half-open with a trial that never reported its outcome
+            if self.state != self.CLOSED and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_abort(self):
+        """
+        Give up a call that ended without an outcome (e.g. cancelled), so that a half-open
+        circuit lets a new trial through right away instead of waiting for this one.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+
+class RequestStats:
+    """
+    Thread-safe outcome counters and a bounded window of latencies per endpoint.
+    """
+
+    def __init__(self, window=1000):
+        """
+        Initialize the stats.
+
+        Args:
+        - window (int): Number of most recent latencies kept per endpoint (default: 1000).
+        """
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def increment(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def record(self, endpoint, started, outcome):
+        """Count an outcome and record the latency of a call started at `started` (perf_counter)."""
+        with self.lock:
+            self.counters[outcome] += 1
+            self.latencies[endpoint].append(time.perf_counter() - started)
+
+    def snapshot(self):
+        """
+        Return the counters and the latency mean and percentiles per endpoint.
+        """
+        with self.lock:
+            latencies = {}
+            for endpoint, samples in self.latencies.items():
+                ordered = sorted(samples)
+                latencies[endpoint] = {
+                    "count": len(ordered),
+                    "mean": sum(ordered) / len(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return {**self.counters, "latency_seconds": latencies}
+
+
+class LightningClient:
+    """
+    A pooled HTTP client for the Lightning.AI server API.
+    """
+
+    # Responses meaning the server (or its proxy) is unavailable, as opposed to an application error
+    UNHEALTHY_STATUSES = {502, 503, 504}
+    RETRY_STATUSES = {500, 502, 503, 504}
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=5, timeouts=None, default_timeout=60,
+                 max_retries=3, backoff_base=0.5, breaker=None, request_stats=None):
+        """
+        Initialize the client.
+
+        Args:
+        - base_url (str): Base URL of the Lightning.AI server.
+        - pool_size (int): Maximum number of pooled keep-alive connections (default: 10).
+        - connect_timeout (float): Connection timeout in seconds (default: 5).
+        - timeouts (dict): Read timeouts in seconds by endpoint path, e.g. {"/parse-pdfs": 600}.
+        - default_timeout (float): Read timeout for endpoints missing from `timeouts` (default: 60).
+        - max_retries (int): Retries for idempotent calls (default: 3).
+        - backoff_base (float): Base delay in seconds for exponential backoff with full jitter (default: 0.5).
+        - breaker (CircuitBreaker): Circuit breaker shared by all calls (default: a new one).
+        - request_stats (RequestStats): Stats shared by all calls (default: new ones).
+        """
+        self.base_url = (base_url or "").rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self.request_stats = request_stats or RequestStats()
+
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def request(self, method, endpoint, idempotent=False, retry_statuses=(), **kwargs):
+        """
+        Send a request to the Lightning.AI server.
+
+        Idempotent calls are retried on connection errors, timeouts and 5xx responses
+        (plus `retry_statuses`). The last response is returned as is once retries are exhausted.
+
+        Args:
+        - method (str): HTTP method.
+        - endpoint (str): Endpoint path, e.g. "/send-message".
+        - idempotent (bool): Whether the call is safe to retry (default: False).
+        - retry_statuses (iterable[int]): Extra status codes to retry for idempotent calls.
+        - kwargs: Extra arguments forwarded to `requests.Session.request`.
+
+        Returns:
+        - requests.Response: The response.
+
+        Raises:
+        - CircuitOpenError: If the circuit breaker is open.
+        - requests.exceptions.RequestException: If the request fails.
+        """
+        url = f"{self.base_url}{endpoint}"
+        kwargs.setdefault("timeout", (self.connect_timeout, self.timeouts.get(endpoint, self.default_timeout)))
+        attempts = self.max_retries + 1 if idempotent else 1
+        retry_statuses = self.RETRY_STATUSES | set(retry_statuses)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            if attempt:
+                self.request_stats.increment("retries")
+                time.sleep(random.uniform(0, self.backoff_base * (2 ** (attempt - 1))))
+
+            if not self.breaker.allow():
+                self.request_stats.increment("rejected")
+                raise CircuitOpenError(f"Lightning server circuit is open, not calling {endpoint}.")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.request_stats.record(endpoint, started, "errors")
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                continue
+            except BaseException:
+                self.request_stats.record(endpoint, started, "errors")
+                self.breaker.record_abort()
+                raise
+
+            self.request_stats.record(endpoint, started, "requests")
+            if response.status_code in self.UNHEALTHY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if last_attempt or response.status_code not in retry_statuses:
+                return response
+            response.close()
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+    def stats(self):
+        """
+        Return connection reuse, outcome counters, circuit state and latency percentiles per endpoint.
+
+        Returns:
+        - dict: The client statistics.
+        """
+        pool_manager = self.adapter.poolmanager
+        pools = [pool_manager.pools[key] for key in pool_manager.pools.keys()]
+        connections_opened = sum(pool.num_connections for pool in pools)
+        pool_requests = sum(pool.num_requests for pool in pools)
+
+        return {
+            **self.request_stats.snapshot(),
+            "connections_opened": connections_opened,
+            "connection_reuse_rate": 1 - connections_opened / pool_requests if pool_requests else 0.0,
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+        }
+
+
+class AsyncLightningClient:
+    """
+    A pooled, non-blocking HTTP client for the Lightning.AI server API, for use in async views.
+
+    Calls follow the same timeout, retry and circuit breaker rules as `LightningClient`.
+    The underlying connection pool is bound to the event loop the client is created in.
+    """
+
+    UNHEALTHY_STATUSES = LightningClient.UNHEALTHY_STATUSES
+    RETRY_STATUSES = LightningClient.RETRY_STATUSES
+
+    def __init__(self, base_url, pool_size=100, connect_timeout=5, timeouts=None, default_timeout=60,
+                 max_retries=3, backoff_base=0.5, breaker=None, request_stats=None):
+        """
+        Initialize the client.
+
+        Args:
+        - base_url (str): Base URL of the Lightning.AI server.
+        - pool_size (int): Maximum number of concurrent connections (default: 100).
+        - connect_timeout (float): Connection timeout in seconds (default: 5).
+        - timeouts (dict): Read timeouts in seconds by endpoint path, e.g. {"/send-message": 180}.
+        - default_timeout (float): Read timeout for endpoints missing from `timeouts` (default: 60).
+        - max_retries (int): Retries for idempotent calls (default: 3).
+        - backoff_base (float): Base delay in seconds for exponential backoff with full jitter (default: 0.5).
+        - breaker (CircuitBreaker): Circuit breaker shared by all calls (default: a new one).
+        - request_stats (RequestStats): Stats shared by all calls (default: new ones).
+        """
+        self.connect_timeout = connect_timeout
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self.request_stats = request_stats or RequestStats()
+        self.client = httpx.AsyncClient(
+            base_url=(base_url or "").rstrip("/"),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def _timeout(self, endpoint):
+        return httpx.Timeout(self.timeouts.get(endpoint, self.default_timeout), connect=self.connect_timeout)
+
+    async def request(self, method, endpoint, idempotent=False, retry_statuses=(), stream=False, **kwargs):
+        """
+        Send a request to the Lightning.AI server without blocking the event loop.
+
+        Args:
+        - method (str): HTTP method.
+        - endpoint (str): Endpoint path, e.g. "/send-message".
+        - idempotent (bool): Whether the call is safe to retry (default: False).
+        - retry_statuses (iterable[int]): Extra status codes to retry for idempotent calls.
+        - stream (bool): Return once the headers are received, the caller reads the body
+          and must close the response with `aclose()` (default: False).
+        - kwargs: Extra arguments forwarded to `httpx.AsyncClient.build_request`.
+
+        Returns:
+        - httpx.Response: The response.
+
+        Raises:
+        - CircuitOpenError: If the circuit breaker is open.
+        - httpx.HTTPError: If the request fails.
+        """
+        kwargs.setdefault("timeout", self._timeout(endpoint))
+        attempts = self.max_retries + 1 if idempotent else 1
+        retry_statuses = self.RETRY_STATUSES | set(retry_statuses)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            if attempt:
+                self.request_stats.increment("retries")
+                await asyncio.sleep(random.uniform(0, self.backoff_base * (2 ** (attempt - 1))))
+
+            if not self.breaker.allow():
+                self.request_stats.increment("rejected")
+                raise CircuitOpenError(f"Lightning server circuit is open, not calling {endpoint}.")
+
+            started = time.perf_counter()
+            try:
+                response = await self.client.send(self.client.build_request(method, endpoint, **kwargs), stream=stream)
+            except httpx.TransportError:
+                self.request_stats.record(endpoint, started, "errors")
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                continue
+            except BaseException:
+                self.request_stats.record(endpoint, started, "errors")
+                self.breaker.record_abort()
+                raise
+
+            self.request_stats.record(endpoint, started, "requests")
+            if response.status_code in self.UNHEALTHY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if last_attempt or response.status_code not in retry_statuses:
+                return response
+            await response.aclose()
+
+    async def get(self, endpoint, **kwargs):
+        return await self.request("GET", endpoint, **kwargs)
+
+    async def post(self, endpoint, **kwargs):
+        return await self.request("POST", endpoint, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_breaker = None
+_request_stats = RequestStats()
+_async_request_stats = RequestStats()
+
+
+def _client_options():
+    """
+    Build the options shared by the sync and async clients from the Django settings.
+    """
+    global _breaker
+    from django.conf import settings
+
+    with _client_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                failure_threshold=settings.LIGHTNING_BREAKER_THRESHOLD,
+                reset_timeout=settings.LIGHTNING_BREAKER_RESET_TIMEOUT,
+            )
+
+    return {
+        "base_url": settings.LIGHTNING_SERVER_URL,
+        "connect_timeout": settings.LIGHTNING_CONNECT_TIMEOUT,
+        "timeouts": settings.LIGHTNING_TIMEOUTS,
+        "max_retries": settings.LIGHTNING_MAX_RETRIES,
+        "breaker": _breaker,
+    }
+
+
+def get_client():
+    """
+    Return the process-wide Lightning client, built from the Django settings on first use.
+    """
+    global _client
+    if _client is None:
+        options = _client_options()
+        with _client_lock:
+            if _client is None:
+                from django.conf import settings
+
+                _client = LightningClient(
+                    pool_size=settings.LIGHTNING_POOL_SIZE, request_stats=_request_stats, **options
+                )
+    return _client
+
+
+def get_async_client():
+    """
+    Return the async Lightning client for the running event loop, built on first use.
+
+    Under ASGI there is a single loop for the process; under WSGI each async view runs in
+    its own loop, and the client of a finished loop is garbage collected with it.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from django.conf import settings
+
+        client = AsyncLightningClient(
+            pool_size=settings.LIGHTNING_ASYNC_POOL_SIZE, request_stats=_async_request_stats, **_client_options()
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def get_stats():
+    """
+    Return the stats of the sync client and the combined stats of the async clients.
+    """
+    return {"sync": get_client().stats(), "async": _async_request_stats.snapshot()}
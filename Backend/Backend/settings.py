@@ -84,6 +84,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Background ingestion workers write progress concurrently with request handlers
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -133,3 +135,54 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+
+
+# Candidate name extraction
+NAME_EXTRACTION_WORKERS = int(os.getenv("NAME_EXTRACTION_WORKERS", 8))
+NAMES_PER_REQUEST = int(os.getenv("NAMES_PER_REQUEST", 1))
+NAME_CONFIDENCE_THRESHOLD = float(os.getenv("NAME_CONFIDENCE_THRESHOLD", 0.8))
+NAME_CACHE_PATH = os.getenv("NAME_CACHE_PATH", os.path.join(BASE_DIR, "name_cache.sqlite3"))
+NAME_CACHE_MAX_ENTRIES = int(os.getenv("NAME_CACHE_MAX_ENTRIES", 100000))
+
+
+# Resume chunking: "sections" splits along resume sections, "recursive" into fixed-size chunks
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sections")
+SECTION_CHUNK_SIZE = int(os.getenv("SECTION_CHUNK_SIZE", 1000))
+# Worker processes loading and splitting resumes, 1 to do it in the ingestion thread, 0 for one per
+# CPU core. Each resume takes well under a millisecond, so more processes only pay off on many cores
+# (see benchmark_chunking)
+SPLIT_PROCESSES = int(os.getenv("SPLIT_PROCESSES", 1))
+
+
+# Background ingestion jobs
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", 2))
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", 128))  # Resumes loaded, named and split together
+
+
+# Parsed PDF cache, invalidated when the parser reports a new version
+PDF_CACHE_PATH = os.getenv("PDF_CACHE_PATH", os.path.join(BASE_DIR, "pdf_cache.sqlite3"))
+PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", 20000))
+
+
+# Idle collection sweeper: collections not chatted with for COLLECTION_TTL seconds are released
+# from Milvus memory ("release") or deleted ("drop"), unless pinned. A TTL of 0 disables it.
+COLLECTION_TTL = int(os.getenv("COLLECTION_TTL", 7 * 24 * 3600))
+COLLECTION_SWEEP_ACTION = os.getenv("COLLECTION_SWEEP_ACTION", "release")
+COLLECTION_SWEEP_INTERVAL = int(os.getenv("COLLECTION_SWEEP_INTERVAL", 3600))  # Seconds between sweeps
+
+
+# Lightning.AI server client
+LIGHTNING_SERVER_URL = os.getenv("LIGHTNING_SERVER_URL")
+LIGHTNING_POOL_SIZE = int(os.getenv("LIGHTNING_POOL_SIZE", 10))
+LIGHTNING_ASYNC_POOL_SIZE = int(os.getenv("LIGHTNING_ASYNC_POOL_SIZE", 100))  # Concurrent chat calls per event loop
+LIGHTNING_CONNECT_TIMEOUT = float(os.getenv("LIGHTNING_CONNECT_TIMEOUT", 5))
+LIGHTNING_TIMEOUTS = {  # Read timeouts in seconds per endpoint
+    "/parse-pdfs": float(os.getenv("LIGHTNING_PARSE_TIMEOUT", 900)),
+    "/send-message": float(os.getenv("LIGHTNING_CHAT_TIMEOUT", 180)),
+    "/send-message/stream": float(os.getenv("LIGHTNING_CHAT_TIMEOUT", 180)),  # Between streamed events
+    "/add-collection/pages": float(os.getenv("LIGHTNING_EMBED_TIMEOUT", 300)),
+    "/add-collection/finalize": float(os.getenv("LIGHTNING_EMBED_TIMEOUT", 300)),
+}
+LIGHTNING_MAX_RETRIES = int(os.getenv("LIGHTNING_MAX_RETRIES", 3))
+LIGHTNING_BREAKER_THRESHOLD = int(os.getenv("LIGHTNING_BREAKER_THRESHOLD", 5))
+LIGHTNING_BREAKER_RESET_TIMEOUT = float(os.getenv("LIGHTNING_BREAKER_RESET_TIMEOUT", 30))
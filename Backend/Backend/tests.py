@@ -0,0 +1,114 @@
+import time
+import asyncio
+import httpx
+from django.test import SimpleTestCase
+from Backend.lightning_client import AsyncLightningClient, CircuitBreaker, CircuitOpenError
+
+
+def mock_client(handler, breaker, **kwargs):
+    """
+    Build an async Lightning client whose requests are answered by `handler` instead of the network.
+    """
+    client = AsyncLightningClient("http://lightning", breaker=breaker, backoff_base=0, **kwargs)
+    client.client = httpx.AsyncClient(base_url="http://lightning", transport=httpx.MockTransport(handler))
+    return client
+
+
+def open_breaker(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_closes_on_trial_success(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only one trial at a time
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.times_opened, 2)
+
+    def test_silent_trial_is_replaced_after_reset_timeout(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        # The trial never reports an outcome
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+
+    def test_aborted_trial_lets_a_new_trial_through(self):
+        breaker = open_breaker(reset_timeout=30)
+        breaker.opened_at -= 30
+        self.assertTrue(breaker.allow())
+        breaker.record_abort()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow())
+
+
+class AsyncLightningClientBreakerTests(SimpleTestCase):
+    async def test_cancelled_trial_does_not_wedge_the_breaker(self):
+        started = asyncio.Event()
+
+        async def hang(request):
+            started.set()
+            await asyncio.sleep(60)
+
+        breaker = open_breaker()
+        await asyncio.sleep(0.06)
+        client = mock_client(hang, breaker)
+        trial = asyncio.ensure_future(client.post("/send-message", json={}))
+        await started.wait()
+        trial.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await trial
+
+        self.assertNotEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        client.client = httpx.AsyncClient(
+            base_url="http://lightning", transport=httpx.MockTransport(lambda request: httpx.Response(200))
+        )
+        response = await client.post("/send-message", json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_trial_failing_with_a_non_transport_error_does_not_wedge_the_breaker(self):
+        def undecodable(request):
+            raise httpx.DecodingError("bad gzip", request=request)
+
+        breaker = open_breaker()
+        await asyncio.sleep(0.06)
+        client = mock_client(undecodable, breaker)
+        with self.assertRaises(httpx.DecodingError):
+            await client.post("/send-message", json={})
+        self.assertTrue(breaker.allow())
+
+    async def test_open_circuit_rejects_without_sending(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200)
+
+        client = mock_client(handler, open_breaker(reset_timeout=30))
+        with self.assertRaises(CircuitOpenError):
+            await client.post("/send-message", json={})
+        self.assertEqual(sent, [])
+        self.assertEqual(client.request_stats.counters["rejected"], 1)
@@ -16,16 +16,22 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from .lightning_client import get_stats
 
 
 def home(request):
     return HttpResponse("Welcome to the Django Application!")
 
 
+def lightning_stats(request):
+    return JsonResponse(get_stats())
+
+
 urlpatterns = [
     path('', home, name='home'),
     path('admin/', admin.site.urls),
+    path('lightning-stats/', lightning_stats, name='lightning-stats'),
     path('retriever/', include('document_retriever.urls')),
     path('chatbot/', include('chatbot.urls'))
 ]
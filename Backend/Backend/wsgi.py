@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 application = get_wsgi_application()
+
+# Release or drop idle collections in the background of the serving process
+from document_retriever.sweeper import start_sweeper  # noqa: E402
+
+start_sweeper()
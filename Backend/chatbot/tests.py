@@ -1,3 +1,124 @@
-from django.test import TestCase
+import json
+import asyncio
+from unittest import mock
+import httpx
+from django.test import SimpleTestCase
+from Backend.lightning_client import CircuitBreaker
+from Backend.tests import mock_client, open_breaker
 
-# Create your tests here.
+
+MESSAGE = {"collection_name": "resumes", "message": "Who knows Django?", "session_id": "s1"}
+
+
+class ChatViewTests(SimpleTestCase):
+    """
+    The chat views against a Lightning server answered by a mocked transport.
+    """
+
+    def setUp(self):
+        touch = mock.patch("chatbot.views.touch_collection", new=mock.AsyncMock())
+        self.touch_collection = touch.start()
+        self.addCleanup(touch.stop)
+
+    def use_client(self, handler, breaker=None):
+        client = mock_client(handler, breaker or CircuitBreaker(failure_threshold=3, reset_timeout=30))
+        patcher = mock.patch("chatbot.views.get_async_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client
+
+    def send(self, path="/chatbot/send-message/", payload=MESSAGE):
+        return self.async_client.post(path, data=json.dumps(payload), content_type="application/json")
+
+    async def test_concurrent_messages_are_served_concurrently(self):
+        in_flight, peak = 0, 0
+
+        async def answer(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return httpx.Response(200, json={"response": json.loads(request.content)["message"]})
+
+        self.use_client(answer)
+        responses = await asyncio.gather(*(self.send() for _ in range(20)))
+
+        self.assertEqual([response.status_code for response in responses], [200] * 20)
+        self.assertEqual(responses[0].json(), {"response": MESSAGE["message"]})
+        # No request waited for another one's answer
+        self.assertEqual(peak, 20)
+        self.assertEqual(self.touch_collection.await_count, 20)
+
+    async def test_failing_server_opens_the_circuit_and_fails_fast(self):
+        sent = []
+
+        def refuse(request):
+            sent.append(request)
+            raise httpx.ConnectError("Connection refused", request=request)
+
+        client = self.use_client(refuse)
+        responses = await asyncio.gather(*(self.send() for _ in range(3)))
+        self.assertEqual([response.status_code for response in responses], [500] * 3)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        response = await self.send()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("circuit is open", response.json()["error"])
+        stream_response = await self.send("/chatbot/send-message/stream/")
+        self.assertEqual(stream_response.status_code, 503)
+        self.assertEqual(len(sent), 3)
+        self.touch_collection.assert_not_awaited()
+
+    async def test_disconnected_trial_does_not_wedge_the_circuit(self):
+        started = asyncio.Event()
+        hang = True
+
+        async def handler(request):
+            if hang:
+                started.set()
+                await asyncio.sleep(60)
+            return httpx.Response(200, json={"response": "Back up."})
+
+        breaker = open_breaker()
+        await asyncio.sleep(0.06)
+        client = self.use_client(handler, breaker)
+
+        # The half-open trial's client goes away while the server hangs
+        trial = asyncio.ensure_future(self.send())
+        await started.wait()
+        trial.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await trial
+
+        hang = False
+        response = await self.send()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"response": "Back up."})
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_stream_relays_events_and_reports_a_broken_stream(self):
+        class BrokenStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield b'data: {"token": "Ada"}\n\n'
+                raise httpx.ReadError("Connection reset")
+
+        self.use_client(lambda request: httpx.Response(200, stream=BrokenStream()))
+        response = await self.send("/chatbot/send-message/stream/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(body.startswith('data: {"token": "Ada"}\n\n'))
+        self.assertIn("event: error\n", body)
+        self.assertIn("Connection reset", body)
+
+    async def test_invalid_message_is_rejected_without_calling_the_server(self):
+        sent = []
+        self.use_client(lambda request: sent.append(request))
+
+        response = await self.send(payload={"collection_name": "resumes"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.send(payload={**MESSAGE, "session_id": "../other"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sent, [])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import SendMessageView
+from .views import SendMessageView, SendMessageStreamView
 
 urlpatterns = [
     path('send-message/', SendMessageView.as_view(), name='send-message'),
+    path('send-message/stream/', SendMessageStreamView.as_view(), name='send-message-stream'),
 ]
@@ -1,56 +1,91 @@
-import requests
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-import os
+import re
+import json
+import httpx
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from Backend.lightning_client import get_async_client, CircuitOpenError
+from document_retriever.catalog import touch_collection
 
 
-class SendMessageView(APIView):
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_\-]{1,64}")
+
+
+def parse_message_payload(request):
+    """
+    Parse and validate the JSON body of a chat request.
+
+    Args:
+    - request (HttpRequest): The incoming request.
+
+    Returns:
+    - tuple[dict, JsonResponse]: The payload to forward to the cloud API, or an error response.
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return None, JsonResponse({"error": "Request body must be valid JSON."}, status=400)
+
+    # Retrieve the collection name and user message
+    collection_name = data.get('collection_name')
+    message = data.get('message')
+
+    # Validate input
+    if not collection_name or not message:
+        return None, JsonResponse(
+            {"error": "Both 'collection_name' and 'message' are required."},
+            status=400
+        )
+
+    # Optional ID of the chat session, keeping each user's conversation history apart
+    session_id = data.get('session_id')
+    if session_id is not None and not (isinstance(session_id, str) and SESSION_ID_PATTERN.fullmatch(session_id)):
+        return None, JsonResponse(
+            {"error": "'session_id' must be up to 64 letters, digits, dashes or underscores."},
+            status=400
+        )
+
+    payload = {"collection_name": collection_name, "message": message}
+    if session_id:
+        payload["session_id"] = session_id
+    return payload, None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class SendMessageView(View):
     """
-    API View to act as a bridge between the frontend and the cloud chatbot API.
+    Async view acting as a bridge between the frontend and the cloud chatbot API.
+
+    The call to the cloud API is awaited on a non-blocking client, so a slow LLM
+    response does not hold a server worker while it is generated.
     """
 
-    def post(self, request):
+    async def post(self, request):
         """
         Forward the user message to the cloud chatbot API and return its response.
 
         Request:
-        - JSON body with 'collection_name' and 'message' keys.
+        - JSON body with 'collection_name' and 'message' keys, and an optional 'session_id'.
 
         Response:
         - JSON response from the chatbot API.
         """
         try:
-            # Parse input JSON
-            data = request.data
-
-            # Retrieve the collection name and user message
-            collection_name = data.get('collection_name')
-            message = data.get('message')
-
-            # Validate input
-            if not collection_name or not message:
-                return Response(
-                    {"error": "Both 'collection_name' and 'message' are required."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Prepare the payload to forward to the cloud API
-            payload = {
-                "collection_name": collection_name,
-                "message": message
-            }
+            payload, error_response = parse_message_payload(request)
+            if error_response:
+                return error_response
 
             # Send the request to the cloud chatbot API
-            cloud_api_url = f"{os.getenv('LIGHTNING_SERVER_URL')}/send-message"
-            response = requests.post(cloud_api_url, json=payload)
+            response = await get_async_client().post("/send-message", json=payload)
 
             # If the cloud API returns success
             if response.status_code == 200:
-                return Response(response.json(), status=status.HTTP_200_OK)
+                await touch_collection(payload["collection_name"])
+                return JsonResponse(response.json(), status=200)
 
             # If the cloud API returns an error
-            return Response(
+            return JsonResponse(
                 {
                     "error": f"Cloud API returned an error. Status code: {response.status_code}",
                     "details": response.text,
@@ -58,16 +93,78 @@ class SendMessageView(APIView):
                 status=response.status_code,
             )
 
-        except requests.exceptions.RequestException as e:
+        except CircuitOpenError as e:
+            # The Lightning server is known to be down, fail fast
+            return JsonResponse({"error": str(e)}, status=503)
+
+        except httpx.HTTPError as e:
             # Handle request exceptions
-            return Response(
+            return JsonResponse(
                 {"error": f"Request to cloud API failed: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status=500,
             )
 
         except Exception as e:
             # Handle unexpected exceptions
-            return Response(
+            return JsonResponse(
                 {"error": f"An unexpected error occurred: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status=500,
+            )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class SendMessageStreamView(View):
+    """
+    Async view relaying the cloud chatbot's streamed response to the frontend as it is generated.
+    """
+
+    async def post(self, request):
+        """
+        Forward the user message to the streaming cloud chatbot API and relay its events.
+
+        Request:
+        - JSON body with 'collection_name' and 'message' keys, and an optional 'session_id'.
+
+        Response:
+        - A `text/event-stream` of `{"token": ...}` events, ending with a "done" or "error" event.
+        """
+        payload, error_response = parse_message_payload(request)
+        if error_response:
+            return error_response
+
+        try:
+            response = await get_async_client().post("/send-message/stream", json=payload, stream=True)
+        except CircuitOpenError as e:
+            # The Lightning server is known to be down, fail fast
+            return JsonResponse({"error": str(e)}, status=503)
+        except httpx.HTTPError as e:
+            return JsonResponse({"error": f"Request to cloud API failed: {str(e)}"}, status=500)
+
+        if response.status_code != 200:
+            # Errors raised before the stream starts are plain JSON responses
+            details = (await response.aread()).decode("utf-8", errors="replace")
+            await response.aclose()
+            return JsonResponse(
+                {
+                    "error": f"Cloud API returned an error. Status code: {response.status_code}",
+                    "details": details,
+                },
+                status=response.status_code,
             )
+
+        await touch_collection(payload["collection_name"])
+
+        async def relay():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            except httpx.HTTPError as e:
+                error = json.dumps({"error": f"Request to cloud API failed: {str(e)}"})
+                yield f"event: error\ndata: {error}\n\n".encode()
+            finally:
+                await response.aclose()
+
+        streaming_response = StreamingHttpResponse(relay(), content_type="text/event-stream")
+        streaming_response["Cache-Control"] = "no-cache"
+        streaming_response["X-Accel-Buffering"] = "no"
+        return streaming_response
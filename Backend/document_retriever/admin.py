@@ -1,3 +1,22 @@
 from django.contrib import admin
+from .models import Candidate, Collection, IngestionJob
 
-# Register your models here.
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "stage", "files_total", "files_parsed", "chunks_embedded", "created_at")
+    list_filter = ("status", "stage")
+
+
+@admin.register(Collection)
+class CollectionAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "candidates_count", "chunks_count", "milvus_entities", "created_at")
+    list_filter = ("status",)
+    search_fields = ("name",)
+
+
+@admin.register(Candidate)
+class CandidateAdmin(admin.ModelAdmin):
+    list_display = ("name", "candidate_id", "collection", "chunks_count")
+    search_fields = ("name", "candidate_id")
+    list_select_related = ("collection",)
@@ -0,0 +1,297 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from Backend.lightning_client import get_client
+from .logic.cache import content_hash
+from .logic.collection import delete_candidates, find_candidates
+from .models import Candidate, Chunk, Collection, IngestionJob
+
+
+def start_collection(collection_name):
+    """
+    Register a collection that is being built, or reopen an existing one to add to it.
+
+    Args:
+    - collection_name (str): Name of the collection.
+
+    Returns:
+    - Collection: The collection, in the "building" status.
+    """
+    collection, _ = Collection.objects.get_or_create(name=collection_name)
+    Collection.objects.filter(pk=collection.pk).update(status=Collection.Status.BUILDING, updated_at=timezone.now())
+    return collection
+
+
+def finish_collection(collection, status=Collection.Status.READY):
+    """
+    Mark a collection as ready once Milvus has committed its chunks, or as failed.
+    """
+    Collection.objects.filter(pk=collection.pk).update(status=status, updated_at=timezone.now())
+
+
+async def touch_collection(collection_name):
+    """
+    Record that a collection was just chatted with, so the sweeper keeps it. A released
+    collection is ready again, the Lightning server reloads it on use.
+
+    Args:
+    - collection_name (str): Name of the collection.
+    """
+    await Collection.objects.filter(name=collection_name).aupdate(
+        last_accessed_at=timezone.now(),
+        status=Case(
+            When(status=Collection.Status.RELEASED, then=Value(Collection.Status.READY)),
+            default=F("status"),
+        ),
+    )
+
+
+def record_chunks(collection, chunks):
+    """
+    Record the candidates and chunk metadata of a batch of chunks sent to Milvus.
+
+    Args:
+    - collection (Collection): The collection the chunks are stored in.
+    - chunks (list[Document]): The chunks, with "candidate_id", "name", "source" and optionally
+      "section" metadata. All of a candidate's chunks are expected in the batch, in order, and
+      replace the chunks recorded for that candidate before.
+    """
+    chunks_by_candidate = defaultdict(list)
+    for chunk in chunks:
+        chunks_by_candidate[chunk.metadata["candidate_id"]].append(chunk)
+    if not chunks_by_candidate:
+        return
+
+    with transaction.atomic():
+        existing = {
+            candidate.candidate_id: candidate
+            for candidate in Candidate.objects.filter(
+                collection=collection, candidate_id__in=list(chunks_by_candidate)
+            )
+        }
+        new_candidates = [
+            Candidate(
+                collection=collection,
+                candidate_id=candidate_id,
+                name=candidate_chunks[0].metadata.get("name", ""),
+                source=candidate_chunks[0].metadata.get("source", ""),
+                chunks_count=len(candidate_chunks),
+            )
+            for candidate_id, candidate_chunks in chunks_by_candidate.items()
+            if candidate_id not in existing
+        ]
+        Candidate.objects.bulk_create(new_candidates)
+        # bulk_create only sets primary keys on some databases, so read them back
+        candidates = {
+            candidate.candidate_id: candidate
+            for candidate in Candidate.objects.filter(
+                collection=collection, candidate_id__in=list(chunks_by_candidate)
+            )
+        }
+
+        # A candidate recorded again (e.g. by a retried upload) gets its chunks replaced
+        replaced_chunks = 0
+        for candidate_id, candidate in existing.items():
+            replaced_chunks += Chunk.objects.filter(candidate=candidate).delete()[0]
+            Candidate.objects.filter(pk=candidate.pk).update(chunks_count=len(chunks_by_candidate[candidate_id]))
+
+        rows = [
+            Chunk(
+                collection=collection,
+                candidate=candidates[candidate_id],
+                position=position,
+                section=chunk.metadata.get("section", ""),
+                length=len(chunk.page_content),
+                content_hash=content_hash(chunk.page_content),
+            )
+            for candidate_id, candidate_chunks in chunks_by_candidate.items()
+            for position, chunk in enumerate(candidate_chunks)
+        ]
+        Chunk.objects.bulk_create(rows, batch_size=500)
+
+        Collection.objects.filter(pk=collection.pk).update(
+            candidates_count=F("candidates_count") + len(new_candidates),
+            chunks_count=F("chunks_count") + len(rows) - replaced_chunks,
+            updated_at=timezone.now(),
+        )
+
+
+def remove_candidates(collection, candidate_ids):
+    """
+    Remove candidates and their chunk records from the catalog of a collection.
+
+    Args:
+    - collection (Collection): The collection the candidates were stored in.
+    - candidate_ids (iterable[str]): IDs of the candidates to remove.
+
+    Returns:
+    - int: The number of candidates removed.
+    """
+    with transaction.atomic():
+        candidates = Candidate.objects.filter(collection=collection, candidate_id__in=list(candidate_ids))
+        removed = candidates.count()
+        chunks = Chunk.objects.filter(candidate__in=candidates).count()
+        candidates.delete()
+        if removed:
+            Collection.objects.filter(pk=collection.pk).update(
+                candidates_count=F("candidates_count") - removed,
+                chunks_count=F("chunks_count") - chunks,
+                updated_at=timezone.now(),
+            )
+    return removed
+
+
+class CollectionUpdate:
+    """
+    Adds batches of chunks to a collection, embedding only the resumes that changed.
+
+    Candidate IDs are derived from the resumes' content, so a resume the collection already
+    stores in full is skipped. In "upsert" mode, candidates stored from the same source files
+    with a different content are older versions of the uploaded resumes, and are deleted once
+    the new versions are committed, unless the upload contains them too. Candidates are recorded
+    in the catalog once the Lightning server has stored all their chunks (see `record_stored`).
+    """
+
+    def __init__(self, collection_name, mode=IngestionJob.Mode.CREATE):
+        """
+        Register the collection in the catalog, in the "building" status.
+
+        Args:
+        - collection_name (str): Name of the collection to create or add to.
+        - mode (str): "create", "append" or "upsert" (default: "create").
+        """
+        self.collection = start_collection(collection_name)
+        self.mode = mode
+        self.replaced = set()
+        self.uploaded = set()  # Candidates of this upload, unchanged or embedded, never replaced
+        self.pending = {}  # Candidate ID -> {"chunks", "stored"} of the candidates being embedded
+        self.unchanged = 0
+
+    def prepare(self, chunks):
+        """
+        Leave out the resumes the collection already stores, and track the others until they are stored.
+
+        Args:
+        - chunks (list[Document]): A batch of chunks, with all the chunks of each of its candidates.
+
+        Returns:
+        - list[Document]: The chunks to embed.
+        """
+        chunks_by_candidate = defaultdict(list)
+        for chunk in chunks:
+            chunks_by_candidate[chunk.metadata["candidate_id"]].append(chunk)
+        # A candidate found stale in an earlier batch is kept if the upload turns out to contain it
+        self.uploaded.update(chunks_by_candidate)
+        self.replaced -= self.uploaded
+
+        if self.mode != IngestionJob.Mode.CREATE and chunks_by_candidate:
+            sources = {chunk.metadata["source"] for chunk in chunks}
+            stored = find_candidates(
+                self.collection.name,
+                list(chunks_by_candidate),
+                sources if self.mode == IngestionJob.Mode.UPSERT else (),
+            )
+
+            partial = []
+            for candidate in stored:
+                candidate_id = candidate["candidate_id"]
+                if candidate_id not in chunks_by_candidate:
+                    # Same source file, different content: an older version of the resume
+                    if candidate["source"] in sources and candidate_id not in self.uploaded:
+                        self.replaced.add(candidate_id)
+                elif candidate["chunks"] == len(chunks_by_candidate[candidate_id]):
+                    del chunks_by_candidate[candidate_id]
+                    self.unchanged += 1
+                else:
+                    # Left incomplete by an interrupted upload, or split differently since
+                    partial.append(candidate_id)
+            if partial:
+                delete_candidates(self.collection.name, partial)
+
+        for candidate_id, candidate_chunks in chunks_by_candidate.items():
+            self.pending[candidate_id] = {"chunks": candidate_chunks, "stored": 0}
+        return [chunk for candidate_chunks in chunks_by_candidate.values() for chunk in candidate_chunks]
+
+    def record_stored(self, chunks):
+        """
+        Record in the catalog the candidates whose chunks are now all stored by the Lightning server.
+
+        Args:
+        - chunks (list[Document]): Chunks returned by `prepare` that the Lightning server acknowledged,
+          e.g. a page of an upload.
+        """
+        completed = []
+        for chunk in chunks:
+            candidate_id = chunk.metadata["candidate_id"]
+            pending = self.pending.get(candidate_id)
+            if pending is None:
+                continue
+            pending["stored"] += 1
+            if pending["stored"] == len(pending["chunks"]):
+                completed.extend(self.pending.pop(candidate_id)["chunks"])
+        record_chunks(self.collection, completed)
+
+    def commit(self):
+        """
+        Delete the replaced candidates and mark the collection as ready, once the new chunks are stored.
+        """
+        if self.replaced:
+            delete_candidates(self.collection.name, sorted(self.replaced))
+            remove_candidates(self.collection, self.replaced)
+        finish_collection(self.collection)
+
+    def fail(self):
+        """
+        Mark the collection as failed. Replaced candidates are kept, the upload can be retried.
+        """
+        finish_collection(self.collection, Collection.Status.FAILED)
+
+
+def sync_with_milvus():
+    """
+    Reconcile the local catalog with the collections that exist in Milvus.
+
+    Collections missing from Milvus are marked "missing", collections only known to Milvus are
+    registered (without candidates), and every collection records its Milvus entity count.
+
+    Returns:
+    - dict: Names of the collections "added", "missing" and "drifted" (entity count differing
+      from the local chunk count).
+    """
+    response = get_client().get("/collections", idempotent=True)
+    response.raise_for_status()
+    milvus_collections = {item["name"]: item["num_entities"] for item in response.json()["collections"]}
+
+    now = timezone.now()
+    summary = {"added": [], "missing": [], "drifted": []}
+    local = {collection.name: collection for collection in Collection.objects.all()}
+
+    for name, collection in local.items():
+        if name not in milvus_collections:
+            if collection.status not in (
+                Collection.Status.MISSING, Collection.Status.BUILDING, Collection.Status.EXPIRED
+            ):
+                summary["missing"].append(name)
+                Collection.objects.filter(pk=collection.pk).update(
+                    status=Collection.Status.MISSING, synced_at=now, updated_at=now
+                )
+            continue
+
+        entities = milvus_collections[name]
+        fields = {"milvus_entities": entities, "synced_at": now}
+        if collection.status == Collection.Status.MISSING:
+            fields["status"] = Collection.Status.READY
+        # Collections registered from Milvus have no local chunk records to compare with
+        if collection.chunks_count and entities != collection.chunks_count:
+            summary["drifted"].append(name)
+        Collection.objects.filter(pk=collection.pk).update(**fields)
+
+    for name, entities in milvus_collections.items():
+        if name not in local:
+            summary["added"].append(name)
+            Collection.objects.create(
+                name=name, status=Collection.Status.READY, milvus_entities=entities, synced_at=now
+            )
+
+    return summary
@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from .catalog import CollectionUpdate
+from .models import Collection, IngestionJob
+from .logic.cache import PersistentLRUCache
+from .logic.doc_splitter import DocumentSplitter
+from .logic.pipeline import parse_and_store_cvs
+
+
+# Background workers running the ingestion pipeline, outside the request/response cycle
+executor = ThreadPoolExecutor(max_workers=settings.INGESTION_WORKERS, thread_name_prefix="ingestion")
+
+splitter = DocumentSplitter(
+    max_workers=settings.NAME_EXTRACTION_WORKERS,
+    names_per_request=settings.NAMES_PER_REQUEST,
+    name_confidence_threshold=settings.NAME_CONFIDENCE_THRESHOLD,
+    chunk_strategy=settings.CHUNK_STRATEGY,
+    section_chunk_size=settings.SECTION_CHUNK_SIZE,
+    processes=settings.SPLIT_PROCESSES,
+    name_cache=PersistentLRUCache(
+        settings.NAME_CACHE_PATH,
+        table="candidate_names",
+        max_entries=settings.NAME_CACHE_MAX_ENTRIES,
+    ),
+)
+
+pdf_cache = PersistentLRUCache(
+    settings.PDF_CACHE_PATH,
+    table="parsed_pdfs",
+    max_entries=settings.PDF_CACHE_MAX_ENTRIES,
+)
+
+# Stage a job is in when a progress counter moves
+STAGES = {
+    "files_parsed": IngestionJob.Stage.PARSING,
+    "names_extracted": IngestionJob.Stage.EXTRACTING_NAMES,
+    "chunks_total": IngestionJob.Stage.EMBEDDING,
+    "chunks_embedded": IngestionJob.Stage.EMBEDDING,
+    "resumes_unchanged": IngestionJob.Stage.EMBEDDING,
+}
+
+
+def submit_ingestion_job(files, collection_name, mode=IngestionJob.Mode.CREATE):
+    """
+    Create an ingestion job and queue it on the background worker pool.
+
+    Args:
+    - files (list[tuple[str, bytes]]): Pairs of PDF file name and content.
+    - collection_name (str): Name of the collection to create or add to.
+    - mode (str): "create", "append" or "upsert" (default: "create").
+
+    Returns:
+    - IngestionJob: The created job.
+    """
+    job = IngestionJob.objects.create(files_total=len(files), collection_name=collection_name, mode=mode)
+    executor.submit(run_ingestion_job, job.id, files)
+    return job
+
+
+def fail_interrupted_jobs():
+    """
+    Mark the jobs a previous server process left pending or running as failed.
+
+    A job's files only live in the memory of the process running it, so a job interrupted by a
+    restart can neither finish nor be resumed: its files have to be uploaded again. This runs
+    once before the server starts, through the `fail_interrupted_jobs` command (see the
+    Dockerfile), and never in a serving worker, where it would fail the jobs other workers are
+    still running. The collections those jobs were building are marked as failed too.
+
+    Returns:
+    - int: Number of jobs marked as failed.
+    """
+    try:
+        interrupted = IngestionJob.objects.filter(
+            status__in=[IngestionJob.Status.PENDING, IngestionJob.Status.RUNNING]
+        )
+        collection_names = list(interrupted.values_list("collection_name", flat=True).distinct())
+        now = timezone.now()
+        count = interrupted.update(
+            status=IngestionJob.Status.FAILED,
+            error="Interrupted by a server restart, upload the files again.",
+            updated_at=now,
+        )
+        Collection.objects.filter(name__in=collection_names, status=Collection.Status.BUILDING).update(
+            status=Collection.Status.FAILED, updated_at=now
+        )
+    except DatabaseError as e:
+        # E.g. migrations not applied yet
+        print(f"Could not fail interrupted ingestion jobs: {e}")
+        return 0
+    return count
+
+
+def run_ingestion_job(job_id, files):
+    """
+    Run the ingestion pipeline for a job, persisting its progress and outcome.
+
+    Args:
+    - job_id (UUID): ID of the job.
+    - files (list[tuple[str, bytes]]): Pairs of PDF file name and content.
+    """
+    jobs = IngestionJob.objects.filter(pk=job_id)
+
+    def update(**fields):
+        # QuerySet.update() bypasses auto_now, so the timestamp is set explicitly
+        jobs.update(**fields, updated_at=timezone.now())
+
+    def on_progress(field, count):
+        update(**{field: F(field) + count}, stage=STAGES[field])
+
+    collection_update = None
+    try:
+        update(status=IngestionJob.Status.RUNNING, stage=IngestionJob.Stage.PARSING)
+        job = jobs.get()
+        collection_update = CollectionUpdate(job.collection_name, job.mode)
+
+        def on_chunks(chunks):
+            unchanged = collection_update.unchanged
+            chunks = collection_update.prepare(chunks)
+            on_progress("resumes_unchanged", collection_update.unchanged - unchanged)
+            return chunks
+
+        parse_and_store_cvs(
+            files, splitter, job.collection_name, pdf_cache=pdf_cache, on_progress=on_progress,
+            batch_size=settings.INGESTION_BATCH_SIZE,
+            on_chunks=on_chunks,
+            allow_empty=job.mode != IngestionJob.Mode.CREATE,
+            on_stored=collection_update.record_stored,
+        )
+        collection_update.commit()
+        update(
+            status=IngestionJob.Status.SUCCEEDED,
+            stage=IngestionJob.Stage.DONE,
+            candidates_replaced=len(collection_update.replaced),
+        )
+    except Exception as e:
+        print(f"Ingestion job {job_id} failed: {e}")
+        if collection_update:
+            collection_update.fail()
+        update(status=IngestionJob.Status.FAILED, error=str(e))
+    finally:
+        # Worker threads are not managed by Django's request cycle
+        close_old_connections()
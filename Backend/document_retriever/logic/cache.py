@@ -0,0 +1,198 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def content_hash(content):
+    """
+    Compute the SHA-256 hash of a document's normalized content.
+
+    Whitespace is collapsed so that the same resume parsed with different line endings
+    or trailing spaces maps to the same key.
+
+    Args:
+    - content (str): The document content.
+
+    Returns:
+    - str: Hex digest of the normalized content.
+    """
+    normalized = " ".join(content.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def file_hash(content):
+    """
+    Compute the SHA-256 hash of a file's raw bytes.
+
+    Args:
+    - content (bytes): The file content.
+
+    Returns:
+    - str: Hex digest of the content.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+class PersistentLRUCache:
+    """
+    A string key-value cache persisted in a SQLite table, with an in-process LRU tier in front.
+
+    The persistent tier is bounded to `max_entries` rows, evicting the least recently used
+    entries first. Entries can be tied to a version of whatever produced them with
+    `set_version`, and are invalidated when that version changes. All methods are safe to call from multiple threads.
+    """
+
+    def __init__(self, path, table="cache", max_entries=100000, memory_entries=1024):
+        """
+        Initialize the cache and create its table if needed.
+
+        Args:
+        - path (str): Path of the SQLite database file.
+        - table (str): Name of the table holding the entries (default: "cache").
+        - max_entries (int): Maximum number of persisted entries (default: 100000).
+        - memory_entries (int): Maximum number of entries kept in memory (default: 1024).
+        """
+        self.path = str(path)
+        self.table = table
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_last_access ON {self.table} (last_access)"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table}_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection, committing on success and always closing it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key, value):
+        """Insert an entry in the in-process tier, evicting the least recently used one. Caller holds the lock."""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a key, first in memory and then in the persistent tier.
+
+        Args:
+        - key (str): The cache key.
+
+        Returns:
+        - str | None: The cached value, or None on a miss.
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return self.memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key, value):
+        """
+        Store a value in both tiers, evicting the least recently used persisted entries if needed.
+
+        Args:
+        - key (str): The cache key.
+        - value (str): The value to cache.
+        """
+        with self.lock:
+            self._remember(key, value)
+
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_access) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                with self.lock:
+                    self.evictions += overflow
+
+    def set_version(self, version):
+        """
+        Record the version of the cached values, clearing all entries if it differs from the stored one.
+
+        Args:
+        - version (str): The current version.
+
+        Returns:
+        - bool: True if the cache was invalidated.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT value FROM {self.table}_meta WHERE key = 'version'"
+            ).fetchone()
+            if row is not None and row[0] == version:
+                return False
+
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table}_meta (key, value) VALUES ('version', ?)", (version,)
+            )
+
+        with self.lock:
+            self.memory.clear()
+        return True
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: Hits (total and in-memory), misses, evictions and the hit rate.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,25 +1,160 @@
 from langchain.schema import Document
 import requests
-from typing import List
+from typing import Iterable, List
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
 import os
+import gzip
+import json
+import uuid
 import logging
+from Backend.lightning_client import get_client
 
-def add_collection(collection_name: str, documents: List[Document]):
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Transport settings for paged uploads to the Flask API
+PAGE_SIZE = int(os.getenv("ADD_COLLECTION_PAGE_SIZE", 256))  # Documents per page
+ENCODING = os.getenv("ADD_COLLECTION_ENCODING", "json")  # "json" or "msgpack"
+COMPRESSION = os.getenv("ADD_COLLECTION_COMPRESSION", "gzip")  # "gzip", "zstd" or "none"
+
+
+def encode_page(documents: List[dict], encoding: str = ENCODING, compression: str = COMPRESSION):
+    """
+    Serialize and compress a page of documents.
+
+    Args:
+    - documents (list[dict]): Documents with "page_content" and "metadata" keys.
+    - encoding (str): "json" or "msgpack".
+    - compression (str): "gzip", "zstd" or "none".
+
+    Returns:
+    - tuple[bytes, dict]: The request body and its Content-Type/Content-Encoding headers.
+    """
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack encoding requires the 'msgpack' package.")
+        body = msgpack.packb(documents)
+        headers = {"Content-Type": "application/msgpack"}
+    else:
+        body = json.dumps(documents).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+    if compression == "gzip":
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package.")
+        body = zstandard.ZstdCompressor().compress(body)
+        headers["Content-Encoding"] = "zstd"
+
+    return body, headers
+
+
+def _send_page(client, collection_name: str, upload_id: str, page: int, page_documents: List[dict]):
     """
-    Call the Flask endpoint to add a Milvus collection.
+    Send one page of an upload to the Flask API.
+
+    Returns:
+    - int: The number of documents in the page.
+    """
+    body, headers = encode_page(page_documents)
+    logging.debug(
+        f"Sending page {page + 1} of '{collection_name}' to Flask API "
+        f"({len(page_documents)} documents, {len(body)} bytes)"
+    )
+
+    # Make the POST request, pages are idempotent so a failed page is retried on its own
+    response = client.post(
+        "/add-collection/pages",
+        params={"collection_name": collection_name, "upload_id": upload_id, "page": page},
+        data=body,
+        headers=headers,
+        idempotent=True,
+        retry_statuses={409},
+    )
+    response.raise_for_status()
+    return len(page_documents)
+
+
+def add_collection(collection_name: str, documents: Iterable[Document], page_size: int = PAGE_SIZE, on_progress=None,
+                   upload_id: str = None, max_workers: int = 1, allow_empty: bool = False, on_page=None):
+    """
+    Call the Flask endpoints to add a Milvus collection.
+
+    Documents are sent in pages of `page_size` documents, each embedded and inserted by the
+    Flask API as it arrives and retried on its own if it fails, then the collection is finalized.
+    The documents can be a lazy iterator, only the pages in flight are held at a time.
+
+    Args:
+    - collection_name (str): Name of the collection to create or add to.
+    - documents (iterable[Document]): The chunks to store.
+    - page_size (int): Number of documents per page.
+    - on_progress (callable): Optional callback receiving the number of documents stored after each page.
+    - upload_id (str): Optional ID of the upload. Reusing the ID of an interrupted upload of the same
+      documents skips the pages the Flask API already stored (default: a new random ID).
+    - max_workers (int): Number of pages sent concurrently (default: 1).
+    - allow_empty (bool): Return without error when there are no documents, e.g. when adding to an
+      existing collection and nothing changed (default: False).
+    - on_page (callable): Optional callback receiving the documents of each page once the Flask API stored it.
     """
     try:
-        # Prepare the payload
-        documents = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
-        #print(documents)
-        payload = {
-            "collection_name": collection_name,
-            "documents": documents,
-        }
-        logging.info(f"Sending payload to Flask API: {payload}")
-
-        # Make the POST request
-        response = requests.post(f"{os.getenv('LIGHTNING_SERVER_URL')}/add-collection", json=payload)
+        client = get_client()
+        upload_id = upload_id or uuid.uuid4().hex
+        documents = iter(documents)
+        pages = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {}  # Future -> documents of the page
+
+            def collect(return_when):
+                done, _ = wait(in_flight, return_when=return_when)
+                for future in done:
+                    page = in_flight.pop(future)
+                    count = future.result()
+                    if on_progress:
+                        on_progress(count)
+                    if on_page:
+                        on_page(page)
+
+            while True:
+                # Prepare the page
+                page = list(islice(documents, page_size))
+                if not page:
+                    break
+                page_documents = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in page]
+
+                future = executor.submit(_send_page, client, collection_name, upload_id, pages, page_documents)
+                in_flight[future] = page
+                pages += 1
+
+                # Bound the number of pages held in memory
+                if len(in_flight) >= max_workers:
+                    collect(FIRST_COMPLETED)
+
+            if in_flight:
+                collect(ALL_COMPLETED)
+
+        if not pages:
+            if allow_empty:
+                return None
+            raise ValueError("No documents to add.")
+
+        # Commit the collection once every page is stored
+        response = client.post(
+            "/add-collection/finalize",
+            json={"collection_name": collection_name, "upload_id": upload_id, "pages": pages},
+            idempotent=True,
+        )
 
         # Log the response
         logging.info(f"Response status: {response.status_code}, Response body: {response.text}")
@@ -31,6 +166,63 @@ def add_collection(collection_name: str, documents: List[Document]):
         return response.json()
 
     except requests.exceptions.RequestException as e:
-        error_message = e.response.text if e.response else "No response body"
+        error_message = e.response.text if e.response is not None else str(e)
         logging.error(f"Request failed: {error_message}")
         raise Exception(f"Failed to add collection: {error_message}")
+
+    except ValueError as e:
+        raise Exception(f"Failed to add collection: {e}")
+
+
+def find_candidates(collection_name: str, candidate_ids: List[str], sources: List[str] = ()):
+    """
+    Ask the Flask API which candidates a collection already stores, by candidate ID or source file.
+
+    Args:
+    - collection_name (str): Name of the collection.
+    - candidate_ids (list[str]): Candidate IDs to look up.
+    - sources (list[str]): Source file names to look up.
+
+    Returns:
+    - list[dict]: One {"candidate_id", "source", "chunks"} dictionary per stored candidate.
+    """
+    try:
+        response = get_client().post(
+            "/add-collection/candidates",
+            json={"collection_name": collection_name, "candidate_ids": list(candidate_ids), "sources": list(sources)},
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return response.json()["candidates"]
+
+    except requests.exceptions.RequestException as e:
+        error_message = e.response.text if e.response is not None else str(e)
+        logging.error(f"Request failed: {error_message}")
+        raise Exception(f"Failed to look up candidates: {error_message}")
+
+
+def delete_candidates(collection_name: str, candidate_ids: List[str]):
+    """
+    Call the Flask API to delete candidates, with all of their chunks, from a collection.
+
+    Args:
+    - collection_name (str): Name of the collection.
+    - candidate_ids (list[str]): IDs of the candidates to delete.
+
+    Returns:
+    - int: The number of chunks deleted.
+    """
+    try:
+        # Deleting by candidate ID is idempotent, so the request can be retried
+        response = get_client().post(
+            "/add-collection/delete",
+            json={"collection_name": collection_name, "candidate_ids": list(candidate_ids)},
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return response.json()["chunks"]
+
+    except requests.exceptions.RequestException as e:
+        error_message = e.response.text if e.response is not None else str(e)
+        logging.error(f"Request failed: {error_message}")
+        raise Exception(f"Failed to delete candidates: {error_message}")
@@ -1,32 +1,96 @@
 import os
-import uuid
+import multiprocessing
+from itertools import islice
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import UnstructuredMarkdownLoader
-from openai import OpenAI
+from langchain.schema import Document
+from .cache import content_hash
+from .parallel import FilePool, load_and_split, log_errors
+from .section_splitter import SectionSplitter
+from .name_extractor import HeuristicNameExtractor, LLMNameExtractor, NameExtractorChain
+
+
+def candidate_id_for(text):
+    """
+    Derive a candidate ID from a resume's content, so that the same resume always gets the same ID.
+
+    Args:
+    - text (str): The resume's text.
+
+    Returns:
+    - str: The first 16 hex characters of the content hash.
+    """
+    return content_hash(text)[:16]
+
+def iter_markdown_files(path):
+    """
+    Yield the paths of the markdown files under a directory, in a stable sorted order.
+    """
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.md'):  # Only process markdown files
+                yield os.path.join(root, file)
+
 
 class DocumentSplitter:
     """
     Handles splitting of parsed documents into smaller chunks with metadata.
     """
 
-    def __init__(self, chunk_size=500, chunk_overlap=50):
+    def __init__(self, chunk_size=500, chunk_overlap=50, max_workers=8, names_per_request=1,
+                 max_retries=5, backoff_base=1.0, name_cache=None, name_confidence_threshold=0.8,
+                 name_extractor=None, chunk_strategy="sections", section_chunk_size=1000, processes=1):
         """
         Initialize the DocumentSplitter with chunking configuration.
 
         Args:
-        - chunk_size (int): Size of each chunk (default: 500).
+        - chunk_size (int): Size of each chunk with the "recursive" strategy (default: 500).
         - chunk_overlap (int): Overlap between chunks (default: 50).
+        - max_workers (int): Maximum number of concurrent name extraction requests (default: 8).
+        - names_per_request (int): Number of resumes sent in a single extraction prompt (default: 1).
+        - max_retries (int): Retries for a rate-limited OpenAI request (default: 5).
+        - backoff_base (float): Base delay in seconds for exponential backoff (default: 1.0).
+        - name_cache (PersistentLRUCache): Optional cache of extracted names keyed by content hash.
+        - name_confidence_threshold (float): Confidence below which the local extractor defers to OpenAI (default: 0.8).
+        - name_extractor (NameExtractorChain): Optional custom extractor chain replacing the default one.
+        - chunk_strategy (str): "sections" to chunk along resume sections, or "recursive" for
+          fixed-size character chunks (default: "sections").
+        - section_chunk_size (int): Maximum chunk size with the "sections" strategy, larger sections
+          are split by characters (default: 1000).
+        - processes (int): Number of worker processes loading and splitting resumes, 1 to work
+          in the calling thread, 0 or None for one per CPU core (default: 1).
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+        self.name_cache = name_cache
+        if chunk_strategy == "sections":
+            self.text_splitter = SectionSplitter(chunk_size=section_chunk_size, chunk_overlap=self.chunk_overlap)
+        elif chunk_strategy == "recursive":
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+            )
+        else:
+            raise ValueError(f"Unknown chunk strategy '{chunk_strategy}'.")
+        processes = processes or multiprocessing.cpu_count()
+        self.file_pool = FilePool(self.text_splitter, processes=processes) if processes > 1 else None
+        self.name_extractor = name_extractor or NameExtractorChain(
+            [
+                HeuristicNameExtractor(),
+                LLMNameExtractor(
+                    max_workers=max_workers,
+                    names_per_request=names_per_request,
+                    max_retries=max_retries,
+                    backoff_base=backoff_base,
+                ),
+            ],
+            confidence_threshold=name_confidence_threshold,
         )
-        self.client = OpenAI()
 
     def extract_name_from_content(self, content):
         """
-        Extract the candidate's name from the resume's content using OpenAI.
+        Extract the candidate's name from the resume's content.
+
+        OpenAI is only called when the local extractor is not confident enough.
 
         Args:
         - content (str): The content of the resume.
@@ -34,30 +98,43 @@ class DocumentSplitter:
         Returns:
         - str: Extracted candidate name.
         """
-        try:
-            # Prompt to instruct OpenAI to extract the name
-            prompt = (
-                "Extract the candidate's full name from the following text:\n\n"
-                f"{content}\n\n"
-                "Return only the name, nothing else."
-            )
+        return self.extract_names([content])[0]
 
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"{prompt}",
-                    }
-                ],
-                model="gpt-4o",
-            )
+    def extract_names(self, contents, on_progress=None):
+        """
+        Extract candidate names for many resumes.
 
-            # Extract the name from the response
-            name = response.choices[0].message.content.strip()
-            return name.lower()
-        except Exception as e:
-            print(f"Error extracting name with OpenAI: {e}")
-            return "Unknown"  # Default name if extraction fails
+        Names already in the name cache are reused, and the remaining resumes go through
+        the extractor chain.
+
+        Args:
+        - contents (list[str]): The contents of the resumes.
+        - on_progress (callable): Optional callback receiving the number of names extracted so far, incrementally.
+
+        Returns:
+        - list[str]: Extracted candidate names, in the same order as the contents.
+        """
+        names = [None] * len(contents)
+        keys = [content_hash(content) for content in contents] if self.name_cache else []
+        if self.name_cache:
+            names = [self.name_cache.get(key) for key in keys]
+
+        missing = [index for index, name in enumerate(names) if name is None]
+        if on_progress and len(missing) < len(contents):
+            on_progress(len(contents) - len(missing))
+        if not missing:
+            return names
+
+        results = self.name_extractor.extract_many(
+            [contents[index] for index in missing], on_progress=on_progress
+        )
+        for index, (name, confidence) in zip(missing, results):
+            names[index] = name
+            # Failed extractions are not cached so that they are retried on the next upload
+            if self.name_cache and confidence > 0:
+                self.name_cache.set(keys[index], name)
+
+        return names
 
 
     def load_documents(self, path):
@@ -70,37 +147,128 @@ class DocumentSplitter:
         Returns:
         - list: A list of LangChain document objects.
         """
-        documents = []
         if not os.path.isdir(path):
             raise ValueError(f"The provided path '{path}' is not a valid directory.")
 
-        for root, _, files in os.walk(path):
-            for file in files:
-                if file.endswith('.md'):  # Only process markdown files
-                    file_path = os.path.join(root, file)
+        # Files are read by the workers, only their paths are sent
+        file_paths = ((file_path, None) for file_path in iter_markdown_files(path))
+        documents = [
+            [Document(page_content=text, metadata={"source": source})]
+            for source, text, _, _ in self._load_files(file_paths, split=False)
+        ]
 
-                    try:
-                        loader = UnstructuredMarkdownLoader(file_path)
-                        data = loader.load()
+        return self.add_candidate_metadata(documents)
 
-                        # Extract metadata
-                        extracted_name = self.extract_name_from_content(data[0].page_content)   
-                        candidate_id = str(uuid.uuid4())[:8]
+    def load_documents_from_texts(self, files, on_progress=None):
+        """
+        Load in-memory markdown resumes into LangChain documents with metadata.
 
-                        # Add metadata to the first document
-                        data[0].metadata["name"] = extracted_name
-                        data[0].metadata["candidate_id"] = candidate_id
+        Args:
+        - files (iterable[tuple[str, str]]): Pairs of source name and markdown content.
+        - on_progress (callable): Optional callback receiving the number of names extracted, incrementally.
+
+        Returns:
+        - list: A list of LangChain document objects.
+        """
+        documents = [
+            [Document(page_content=text, metadata={"source": source})]
+            for source, text, _, _ in self._load_files(files, split=False)
+        ]
+
+        return self.add_candidate_metadata(documents, on_progress=on_progress)
+
+    def _load_files(self, files, split):
+        """
+        Load (and split) resumes on the worker processes, or in the calling thread without them.
+
+        Failed files are logged and skipped.
+
+        Args:
+        - files (iterable[tuple[str, str | None]]): Pairs of source name and content, or of path and None.
+        - split (bool): Whether to split the resumes.
+
+        Yields:
+        - tuple: `(source, text, chunks, error)` results of successfully loaded files, in input order.
+        """
+        if self.file_pool:
+            results = self.file_pool.map(files, split=split)
+        else:
+            results = (
+                load_and_split(source, content, split=split, splitter=self.text_splitter)
+                for source, content in files
+            )
+        return log_errors(results)
+
+    def iter_chunks(self, files, batch_size=128, on_progress=None):
+        """
+        Load, name and split resumes batch by batch, yielding each batch's chunks as soon as it is ready.
+
+        Only one batch of resumes and the files in flight on the workers are held in memory, so
+        the input can be a lazy stream of any length. Chunks come out in input order.
+
+        Args:
+        - files (iterable[tuple[str, str]]): Pairs of source name and markdown content.
+        - batch_size (int): Number of resumes whose names are extracted together (default: 128).
+        - on_progress (callable): Optional callback receiving the number of names extracted, incrementally.
+
+        Yields:
+        - list[Document]: The chunks of a batch of resumes, with name, candidate ID and source metadata.
+          A resume with the same content as an earlier one in the stream is left out.
+        """
+        results = self._load_files(files, split=True)
+        seen = set()
+        while True:
+            loaded = list(islice(results, batch_size))
+            if not loaded:
+                return
+
+            batch = []
+            for source, text, pieces, _ in loaded:
+                candidate_id = candidate_id_for(text)
+                if candidate_id in seen:
+                    print(f"Skipping '{source}': same content as an earlier resume.")
+                    continue
+                seen.add(candidate_id)
+                batch.append((source, text, pieces, candidate_id))
+
+            names = self.extract_names([text for _, text, _, _ in batch], on_progress=on_progress)
+
+            chunks = []
+            for (source, _, pieces, candidate_id), name in zip(batch, names):
+                metadata = {"source": source, "name": name, "candidate_id": candidate_id}
+                chunks.extend(
+                    Document(page_content=text, metadata={**metadata, **piece_metadata})
+                    for text, piece_metadata in pieces
+                )
+            yield chunks
+
+    def add_candidate_metadata(self, documents, on_progress=None):
+        """
+        Add the extracted candidate name and a candidate ID to loaded resumes.
+
+        Args:
+        - documents (list): A list of loaded LangChain document lists, one per resume.
+        - on_progress (callable): Optional callback receiving the number of names extracted, incrementally.
+
+        Returns:
+        - list: The same documents, with metadata added to the first document of each resume.
+        """
+        # Extract names for all resumes concurrently
+        extracted_names = self.extract_names(
+            [data[0].page_content for data in documents], on_progress=on_progress
+        )
 
-                        documents.append(data)
-                    except Exception as e:
-                        print(f"Error loading file '{file}': {e}")
+        for data, extracted_name in zip(documents, extracted_names):
+            # Add metadata to the first document
+            data[0].metadata["name"] = extracted_name
+            data[0].metadata["candidate_id"] = candidate_id_for("\n".join(page.page_content for page in data))
 
         return documents
 
 
     def split_documents(self, documents):
         """
-        Split documents into smaller chunks using the RecursiveCharacterTextSplitter.
+        Split documents into smaller chunks, along resume sections or by characters depending on the strategy.
 
         Args:
         - documents (list): List of LangChain document objects.
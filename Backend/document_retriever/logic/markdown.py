@@ -0,0 +1,151 @@
+import re
+
+
+# Canonical resume sections and the heading wordings that introduce them, checked in order
+SECTION_ALIASES = [
+    ("Experience", re.compile(r"\b(experience|employment|work history|career history|positions?)\b")),
+    ("Education", re.compile(r"\b(education|academic|qualifications?|studies)\b")),
+    ("Skills", re.compile(r"\b(skills?|competenc(e|ies)|technologies|tools|expertise|tech stack)\b")),
+    ("Projects", re.compile(r"\bprojects?\b")),
+    ("Certifications", re.compile(r"\b(certifications?|certificates?|licenses?|courses?|training)\b")),
+    ("Summary", re.compile(r"\b(summary|profile|objective|about( me)?|overview)\b")),
+    ("Languages", re.compile(r"\blanguages?\b")),
+    ("Awards", re.compile(r"\b(awards?|honou?rs|achievements?)\b")),
+    ("Publications", re.compile(r"\b(publications?|research|papers?)\b")),
+    ("Volunteering", re.compile(r"\b(volunteer(ing)?|extracurricular|activities|leadership)\b")),
+    ("Interests", re.compile(r"\b(interests|hobbies)\b")),
+    ("References", re.compile(r"\breferences?\b")),
+]
+
+# Title of the text before the first section heading (name, contact details, headline)
+HEADER_SECTION = "Header"
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BOLD_LINE = re.compile(r"^\s*(\*\*|__)(.+?)\1\s*:?\s*$")
+IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+EMPHASIS = re.compile(r"(\*\*|__|\*|(?<!\w)_(?!_))(?=\S)(.+?)(?<=\S)\1")
+TABLE_RULE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+LIST_MARKER = re.compile(r"^(\s*)(?:[-*+•]|\d+[.)])\s+")
+
+
+def section_for_heading(title):
+    """
+    Map a heading to a canonical resume section.
+
+    Args:
+    - title (str): The heading text.
+
+    Returns:
+    - str: The canonical section name, or None for headings that are not section titles
+      (e.g. a job title or the candidate's name).
+    """
+    words = re.sub(r"[^a-z ]+", " ", title.lower()).split()
+    # Section titles are short, longer headings are content such as job titles
+    if not words or len(words) > 4:
+        return None
+    text = " ".join(words)
+    for section, pattern in SECTION_ALIASES:
+        if pattern.search(text):
+            return section
+    return None
+
+
+def _clean_inline(text):
+    text = IMAGE.sub("", text)
+    text = LINK.sub(r"\1", text)
+    text = HTML_TAG.sub(" ", text)
+    text = EMPHASIS.sub(r"\2", text)
+    text = text.replace("`", "")
+    return " ".join(text.split())
+
+
+def normalize_markdown(content):
+    """
+    Convert parser Markdown into clean text for chunking and embedding.
+
+    Inline formatting, links, images and HTML are reduced to their text, tables to
+    space-separated cells and list items to "- " lines. Headings are kept as "#" lines, and
+    bold or all-caps lines naming a resume section are promoted to headings, so that the
+    section structure survives for `split_sections`.
+
+    Args:
+    - content (str): The Markdown content.
+
+    Returns:
+    - str: The normalized text, with paragraphs separated by blank lines.
+    """
+    lines = []
+    in_code_block = False
+    for raw_line in content.splitlines():
+        if raw_line.strip().startswith("```"):
+            in_code_block = not in_code_block
+            continue
+        if in_code_block:
+            lines.append(raw_line.rstrip())
+            continue
+        if TABLE_RULE.match(raw_line):
+            continue
+
+        heading = HEADING.match(raw_line)
+        bold = BOLD_LINE.match(raw_line)
+        if heading:
+            title = _clean_inline(heading.group(2))
+            if title:
+                lines.extend(["", f"{heading.group(1)} {title}", ""])
+            continue
+        if bold and section_for_heading(bold.group(2)):
+            lines.extend(["", f"## {_clean_inline(bold.group(2))}", ""])
+            continue
+
+        line = raw_line
+        list_item = LIST_MARKER.match(line)
+        if list_item:
+            line = line[list_item.end():]
+        if "|" in line:
+            line = line.replace("|", " ")
+        line = _clean_inline(line)
+
+        if line.isupper() and section_for_heading(line):
+            lines.extend(["", f"## {line.title()}", ""])
+        elif list_item and line:
+            lines.append(f"- {line}")
+        else:
+            lines.append(line)
+
+    # Collapse runs of blank lines into paragraph breaks
+    text = "\n".join(lines)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def split_sections(text):
+    """
+    Split normalized resume text into its sections.
+
+    A new section starts at each heading naming a resume section; other headings (job
+    titles, degrees, the candidate's name) stay in the text of the current section.
+
+    Args:
+    - text (str): Text produced by `normalize_markdown`.
+
+    Returns:
+    - list[tuple[str, str]]: Pairs of canonical section name and section text, in order.
+      Text before the first section heading belongs to the "Header" section.
+    """
+    sections = []
+    title, lines = HEADER_SECTION, []
+    for line in text.splitlines():
+        heading = HEADING.match(line)
+        section = section_for_heading(heading.group(2)) if heading else None
+        if section:
+            body = "\n".join(lines).strip()
+            if body:
+                sections.append((title, body))
+            title, lines = section, []
+        lines.append(line)
+
+    body = "\n".join(lines).strip()
+    if body:
+        sections.append((title, body))
+    return sections
@@ -0,0 +1,390 @@
+import re
+import json
+import unicodedata
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, RateLimitError
+
+
+UNKNOWN_NAME = "Unknown"
+
+
+class HeuristicNameExtractor:
+    """
+    Extracts the candidate's name locally from the layout of a markdown resume.
+
+    Marker usually puts the name in the first heading or on the first non-empty line.
+    Candidate lines are checked against name-like capitalization, and agreement with the
+    local part of the resume's email address raises the confidence. Layout alone never
+    reaches the default threshold of 0.8, since job titles and section headings look like
+    names too: without an agreeing email address the resume is deferred to the next stage,
+    and an email address contradicting the line lowers the confidence further.
+    """
+
+    name = "heuristic"
+
+    # Lines made of these words are section titles, not names
+    STOP_WORDS = {
+        "resume", "résumé", "curriculum", "vitae", "cv", "profile", "summary", "objective",
+        "experience", "education", "skills", "contact", "projects", "certifications",
+        "about", "me", "personal", "information", "details", "page", "references",
+        "work", "history", "employment", "career", "languages", "interests", "achievements",
+        # Job titles and fields, common in the heading of a resume
+        "senior", "junior", "lead", "principal", "staff", "chief", "head", "intern",
+        "engineer", "engineering", "developer", "scientist", "analyst", "manager", "designer",
+        "consultant", "architect", "administrator", "specialist", "director", "officer",
+        "assistant", "coordinator", "technician", "researcher", "software", "data", "machine",
+        "learning", "science", "web", "full", "stack", "frontend", "backend", "devops", "product",
+        "marketing", "sales", "business", "financial", "finance", "accountant", "teacher", "nurse",
+    }
+    NAME_TOKEN = re.compile(r"^(?:[A-ZÀ-ÖØ-Þ][a-zA-ZÀ-ÖØ-öø-ÿ'’\-]+|[A-Z]\.?)$")
+    EMAIL = re.compile(r"([A-Za-z0-9._%+\-]+)@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
+    MARKDOWN_NOISE = re.compile(r"[*_`#>|]|!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)")
+
+    def __init__(self, max_lines=5):
+        """
+        Initialize the extractor.
+
+        Args:
+        - max_lines (int): Number of leading non-empty lines considered as name candidates (default: 5).
+        """
+        self.max_lines = max_lines
+
+    def _clean(self, line):
+        line = self.MARKDOWN_NOISE.sub(lambda match: match.group(1) or " ", line)
+        # Keep only the part before separators such as "John Doe | Data Scientist"
+        line = re.split(r"\s[|\-–—,:]\s|\s{2,}", line.strip())[0]
+        return " ".join(line.split())
+
+    def _name_tokens(self, line):
+        """Return the line's tokens if it looks like a person's name, otherwise None."""
+        tokens = line.split()
+        if not 2 <= len(tokens) <= 4:
+            return None
+        if any(token.lower() in self.STOP_WORDS for token in tokens):
+            return None
+        # All-caps names ("JOHN DOE") are common in resume headers
+        if all(token.isupper() for token in tokens):
+            tokens = [token.capitalize() for token in tokens]
+        if not all(self.NAME_TOKEN.match(token) for token in tokens):
+            return None
+        return tokens
+
+    def _email_tokens(self, content):
+        match = self.EMAIL.search(content)
+        if not match:
+            return []
+        return [part for part in re.split(r"[._\-+0-9]+", match.group(1).lower()) if len(part) > 1]
+
+    @staticmethod
+    def _email_agrees(name_tokens, email_tokens):
+        """Tell whether a name appears in the email's local part, e.g. "John Doe" in "john.doe" or "jdoe"."""
+        for token in name_tokens:
+            # Email addresses spell "Müller" as "muller"
+            token = unicodedata.normalize("NFKD", token).encode("ascii", "ignore").decode()
+            if token in email_tokens:
+                return True
+            if len(token) > 2 and any(token in email_token for email_token in email_tokens):
+                return True
+        return False
+
+    def extract(self, content):
+        """
+        Extract the candidate's name from the resume's content.
+
+        Args:
+        - content (str): The content of the resume.
+
+        Returns:
+        - tuple[str, float]: The lowercased name and a confidence score between 0 and 1.
+        """
+        email_tokens = self._email_tokens(content)
+        lines = [line for line in content.splitlines() if line.strip()][:self.max_lines]
+
+        best_name, best_confidence = UNKNOWN_NAME, 0.0
+        for position, line in enumerate(lines):
+            tokens = self._name_tokens(self._clean(line))
+            if not tokens:
+                continue
+
+            if line.lstrip().startswith("#"):
+                confidence = 0.6 if position == 0 else 0.5
+            elif position == 0:
+                confidence = 0.45
+            else:
+                confidence = 0.4
+            if len(tokens) <= 3:
+                confidence += 0.1
+
+            lowered = [token.lower().strip(".") for token in tokens]
+            if email_tokens:
+                confidence += 0.3 if self._email_agrees(lowered, email_tokens) else -0.2
+
+            if confidence > best_confidence:
+                best_name, best_confidence = " ".join(lowered), min(round(confidence, 2), 1.0)
+
+        # Fall back to a "first.last@" style email address
+        if best_confidence == 0.0 and len(email_tokens) >= 2:
+            best_name, best_confidence = " ".join(email_tokens[:3]), 0.4
+
+        return best_name, best_confidence
+
+    def extract_many(self, contents, on_progress=None):
+        """
+        Extract names for several resumes.
+
+        Args:
+        - contents (list[str]): The contents of the resumes.
+        - on_progress (callable): Optional callback receiving the number of resumes processed.
+
+        Returns:
+        - list[tuple[str, float]]: Name and confidence for each resume, in order.
+        """
+        results = [self.extract(content) for content in contents]
+        if on_progress:
+            on_progress(len(results))
+        return results
+
+
+class LLMNameExtractor:
+    """
+    Extracts the candidate's name with an OpenAI chat model.
+
+    Requests run concurrently on a bounded thread pool, are retried with exponential
+    backoff on rate-limit errors, and can carry several resumes per prompt.
+    """
+
+    name = "llm"
+
+    def __init__(self, model="gpt-4o", max_workers=8, names_per_request=1, max_retries=5, backoff_base=1.0):
+        """
+        Initialize the extractor.
+
+        Args:
+        - model (str): OpenAI chat model (default: "gpt-4o").
+        - max_workers (int): Maximum number of concurrent requests (default: 8).
+        - names_per_request (int): Number of resumes sent in a single prompt (default: 1).
+        - max_retries (int): Retries for a rate-limited request (default: 5).
+        - backoff_base (float): Base delay in seconds for exponential backoff (default: 1.0).
+        """
+        self.model = model
+        self.max_workers = max(1, max_workers)
+        self.names_per_request = max(1, names_per_request)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        # Retries are handled by _create_completion so that backoff is applied once
+        self.client = OpenAI(max_retries=0)
+
+    def _create_completion(self, prompt, **kwargs):
+        """
+        Send a chat completion request, retrying with exponential backoff on rate-limit errors.
+
+        Args:
+        - prompt (str): The user prompt.
+        - kwargs: Extra arguments forwarded to the completions API.
+
+        Returns:
+        - str: The content of the first completion choice.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"{prompt}",
+                        }
+                    ],
+                    model=self.model,
+                    **kwargs,
+                )
+                return response.choices[0].message.content.strip()
+            except RateLimitError:
+                if attempt == self.max_retries:
+                    raise
+                # Exponential backoff with jitter so that concurrent workers do not retry in lockstep
+                delay = self.backoff_base * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+
+    def extract(self, content):
+        """
+        Extract the candidate's name from the resume's content.
+
+        Args:
+        - content (str): The content of the resume.
+
+        Returns:
+        - tuple[str, float]: The lowercased name and a confidence score between 0 and 1.
+        """
+        try:
+            # Prompt to instruct OpenAI to extract the name
+            prompt = (
+                "Extract the candidate's full name from the following text:\n\n"
+                f"{content}\n\n"
+                "Return only the name, nothing else."
+            )
+
+            # Extract the name from the response
+            name = self._create_completion(prompt)
+            return name.lower(), 1.0
+        except Exception as e:
+            print(f"Error extracting name with OpenAI: {e}")
+            return UNKNOWN_NAME, 0.0  # Default name if extraction fails
+
+    def extract_group(self, contents):
+        """
+        Extract the names of several resumes in a single structured request.
+
+        Falls back to one request per resume if the response cannot be matched to the input.
+
+        Args:
+        - contents (list[str]): The contents of the resumes.
+
+        Returns:
+        - list[tuple[str, float]]: Name and confidence for each resume, in order.
+        """
+        if len(contents) == 1:
+            return [self.extract(contents[0])]
+
+        try:
+            resumes = "\n\n".join(
+                f"### Resume {index}\n{content}" for index, content in enumerate(contents)
+            )
+            prompt = (
+                f"Extract each candidate's full name from the following {len(contents)} resumes:\n\n"
+                f"{resumes}\n\n"
+                'Return a JSON object of the form {"names": ["name of resume 0", "name of resume 1", ...]} '
+                "with exactly one name per resume, in the same order."
+            )
+
+            names = json.loads(
+                self._create_completion(prompt, response_format={"type": "json_object"})
+            )["names"]
+            if len(names) != len(contents):
+                raise ValueError(f"expected {len(contents)} names, got {len(names)}")
+
+            return [
+                (str(name).strip().lower(), 1.0) if str(name).strip() else (UNKNOWN_NAME, 0.0)
+                for name in names
+            ]
+        except Exception as e:
+            print(f"Error extracting names in batch with OpenAI, retrying one by one: {e}")
+            return [self.extract(content) for content in contents]
+
+    def extract_many(self, contents, on_progress=None):
+        """
+        Extract names for several resumes concurrently.
+
+        Resumes are grouped into prompts of `names_per_request` resumes, and at most
+        `max_workers` requests are in flight at any time.
+
+        Args:
+        - contents (list[str]): The contents of the resumes.
+        - on_progress (callable): Optional callback receiving the number of resumes processed
+          each time a request completes.
+
+        Returns:
+        - list[tuple[str, float]]: Name and confidence for each resume, in order.
+        """
+        groups = [
+            contents[i:i + self.names_per_request]
+            for i in range(0, len(contents), self.names_per_request)
+        ]
+        if not groups:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+            futures = [executor.submit(self.extract_group, group) for group in groups]
+            if on_progress:
+                for future in as_completed(futures):
+                    on_progress(len(future.result()))
+            return [result for future in futures for result in future.result()]
+
+
+class NameExtractorChain:
+    """
+    Runs name extractors in order, passing a resume to the next stage only while the
+    confidence of the best answer so far is below the threshold.
+
+    Cheap local stages go first so that the LLM is only called for ambiguous resumes.
+    Per-stage call counts, acceptances and latency are kept for monitoring.
+    """
+
+    def __init__(self, extractors, confidence_threshold=0.8):
+        """
+        Initialize the chain.
+
+        Args:
+        - extractors (list): Extractors exposing `name` and `extract_many(contents, on_progress)`, cheapest first.
+        - confidence_threshold (float): Minimum confidence to accept a stage's answer (default: 0.8).
+        """
+        self.extractors = extractors
+        self.confidence_threshold = confidence_threshold
+        self.lock = threading.Lock()
+        self.stage_stats = {
+            extractor.name: {"documents": 0, "accepted": 0, "seconds": 0.0} for extractor in extractors
+        }
+
+    def extract_many(self, contents, on_progress=None):
+        """
+        Extract names for several resumes through the chain.
+
+        Args:
+        - contents (list[str]): The contents of the resumes.
+        - on_progress (callable): Optional callback receiving the number of resumes whose name is final.
+
+        Returns:
+        - list[tuple[str, float]]: Name and confidence for each resume, in order.
+        """
+        results = [(UNKNOWN_NAME, 0.0)] * len(contents)
+        pending = list(range(len(contents)))
+
+        for extractor in self.extractors:
+            if not pending:
+                break
+
+            # Every resume reaching the last stage is final once that stage answers
+            last_stage = extractor is self.extractors[-1]
+
+            start = time.perf_counter()
+            stage_results = extractor.extract_many(
+                [contents[index] for index in pending], on_progress=on_progress if last_stage else None
+            )
+            elapsed = time.perf_counter() - start
+
+            still_pending = []
+            for index, (name, confidence) in zip(pending, stage_results):
+                if confidence > results[index][1]:
+                    results[index] = (name, confidence)
+                if results[index][1] < self.confidence_threshold:
+                    still_pending.append(index)
+
+            with self.lock:
+                stats = self.stage_stats[extractor.name]
+                stats["documents"] += len(pending)
+                stats["accepted"] += len(pending) - len(still_pending)
+                stats["seconds"] += elapsed
+
+            if on_progress and not last_stage:
+                on_progress(len(pending) - len(still_pending))
+            pending = still_pending
+
+        return results
+
+    def stats(self):
+        """
+        Return per-stage counters.
+
+        Returns:
+        - dict: For each stage, documents seen, answers accepted and average latency per document.
+        """
+        with self.lock:
+            return {
+                name: {
+                    **stats,
+                    "seconds_per_document": stats["seconds"] / stats["documents"] if stats["documents"] else 0.0,
+                }
+                for name, stats in self.stage_stats.items()
+            }
@@ -0,0 +1,153 @@
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from langchain.schema import Document
+from .markdown import normalize_markdown
+
+
+# Splitter installed in each worker process by `init_worker`
+_worker_splitter = None
+
+
+def init_worker(splitter):
+    """
+    Install the text splitter in a worker process, so it is pickled once per worker instead of once per file.
+    """
+    global _worker_splitter
+    _worker_splitter = splitter
+
+
+def load_and_split(source, content=None, split=True, splitter=None):
+    """
+    Load one markdown resume and split it into chunks.
+
+    Errors are returned instead of raised, so that one bad file does not fail its batch.
+
+    Args:
+    - source (str): Source name of the resume, or its path when `content` is None.
+    - content (str): The markdown content, read from `source` when None.
+    - split (bool): Whether to split the resume or only load it (default: True).
+    - splitter: Text splitter with a `split_documents` method (default: the one installed by `init_worker`).
+
+    Returns:
+    - tuple: `(source, text, chunks, error)` where `chunks` is a list of `(text, metadata)` pairs
+      (None when not splitting) and `error` is None on success.
+    """
+    splitter = splitter or _worker_splitter
+    try:
+        if content is None:
+            with open(source, encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        text = normalize_markdown(content)
+
+        chunks = None
+        if split:
+            documents = splitter.split_documents([Document(page_content=text, metadata={})])
+            chunks = [(document.page_content, document.metadata) for document in documents]
+
+        return source, text, chunks, None
+    except Exception as e:
+        return source, None, None, f"{type(e).__name__}: {e}"
+
+
+def _load_only(source, content=None):
+    return load_and_split(source, content, split=False)
+
+
+class FilePool:
+    """
+    Loads and splits resumes on a pool of worker processes.
+
+    Results are yielded in input order, whatever order the workers finish in, and at most
+    `window` files are in flight at a time, so memory stays bounded for any batch size.
+    """
+
+    def __init__(self, splitter, processes=None, window=None):
+        """
+        Initialize the pool. Worker processes are started on first use.
+
+        Args:
+        - splitter: Text splitter installed in each worker.
+        - processes (int): Number of worker processes (default: the number of CPU cores).
+        - window (int): Maximum number of files in flight (default: 4 per process).
+        """
+        self.splitter = splitter
+        self.processes = processes or multiprocessing.cpu_count()
+        self.window = window or self.processes * 4
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def _submit(self, function, *args):
+        """Submit a task, starting the worker processes if needed. Returns the executor and the future."""
+        with self.lock:
+            if self.executor is not None:
+                try:
+                    return self.executor, self.executor.submit(function, *args)
+                except BrokenProcessPool:
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+
+            # Spawned workers do not inherit the server's threads, locks or sockets
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(self.splitter,),
+            )
+            return self.executor, self.executor.submit(function, *args)
+
+    def map(self, files, split=True):
+        """
+        Load (and split) resumes in parallel.
+
+        Args:
+        - files (iterable[tuple[str, str | None]]): Pairs of source name and markdown content,
+          or of file path and None to read the file in the worker.
+        - split (bool): Whether to split the resumes (default: True).
+
+        Yields:
+        - tuple: `(source, text, chunks, error)` results of `load_and_split`, in input order.
+        """
+        function = load_and_split if split else _load_only
+        pending = deque()
+
+        def next_result():
+            source, executor, future = pending.popleft()
+            try:
+                return future.result()
+            except BrokenProcessPool as e:
+                # A crashed worker breaks the pool and its in-flight files, start a fresh one for the next files
+                self.shutdown(executor)
+                return source, None, None, f"Worker process failed: {e}"
+            except Exception as e:
+                return source, None, None, f"{type(e).__name__}: {e}"
+
+        for source, content in files:
+            pending.append((source, *self._submit(function, source, content)))
+            if len(pending) >= self.window:
+                yield next_result()
+
+        while pending:
+            yield next_result()
+
+    def shutdown(self, executor=None):
+        """
+        Stop the worker processes, if `executor` (when given) is still the current one.
+        """
+        with self.lock:
+            if self.executor is not None and executor in (None, self.executor):
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+def log_errors(results):
+    """
+    Drop failed results from a stream of `load_and_split` results, logging each failure.
+    """
+    for result in results:
+        source, _, _, error = result
+        if error:
+            print(f"Error loading file '{source}': {error}")
+            continue
+        yield result
@@ -0,0 +1,179 @@
+import os
+import re
+from Backend.lightning_client import get_client
+from .cache import file_hash
+from .collection import add_collection
+from ..utils import iter_zip_members
+
+
+def sanitize_file_name(file_name):
+    """
+    Sanitize the file name to remove invalid characters for Windows file systems.
+    """
+    sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', file_name)
+    return sanitized_name
+
+
+def _report(on_progress, field, count):
+    if on_progress and count:
+        on_progress(field, count)
+
+
+def _source_name(file_name):
+    """
+    Return the source name of a PDF's Markdown: "cv_cv.md" for "cv.pdf", as marker lays it out
+    (`<stem>/<stem>.md`), and "a_cv_cv.md" for "a/cv.pdf", so PDFs of different folders stay apart.
+    """
+    path = os.path.splitext(file_name)[0]
+    return sanitize_file_name(f"{path}/{os.path.basename(path)}.md")
+
+
+def _member_stem(member_name):
+    """Return the stem of the PDF a parser output member belongs to (marker writes `<stem>/<stem>.md`)."""
+    parts = member_name.split("/")
+    return parts[0] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+
+
+def _sync_parser_version(pdf_cache):
+    """
+    Invalidate the PDF cache if the cloud parser's version changed, before any cached Markdown is served.
+
+    Returns:
+    - bool: Whether the cache is known to match the parser's version.
+    """
+    try:
+        response = get_client().get("/parser-version", idempotent=True)
+        if response.status_code == 200:
+            pdf_cache.set_version(response.json()["version"])
+            return True
+        print(f"Could not get the parser version. Status code: {response.status_code}.")
+    except Exception as e:
+        print(f"Could not get the parser version: {e}")
+    return False
+
+
+def parse_pdfs(files, pdf_cache=None, on_progress=None):
+    """
+    Parse PDF resumes into Markdown, only sending PDFs missing from the cache to the cloud parser.
+
+    PDFs are identified by the SHA-256 of their bytes, so a file parsed in an earlier batch is
+    served from the cache whatever its name, and duplicates within a batch are parsed once.
+    The parser's version is checked first, so Markdown from an older parser is never served;
+    if it cannot be checked, every PDF is parsed again.
+
+    Args:
+    - files (list[tuple[str, bytes]]): Pairs of PDF file name (possibly a path) and content.
+    - pdf_cache (PersistentLRUCache): Optional cache of parsed Markdown keyed by PDF hash.
+    - on_progress (callable): Optional callback `on_progress(field, count)` receiving "files_parsed" increments.
+
+    Yields:
+    - tuple[str, str]: Pairs of source name and non-empty Markdown content.
+    """
+    use_cache = pdf_cache is not None and _sync_parser_version(pdf_cache)
+
+    to_parse = {}
+    for file_name, content in files:
+        key = file_hash(content)
+        if key in to_parse:
+            continue
+
+        markdown = pdf_cache.get(key) if use_cache else None
+        if markdown is None:
+            to_parse[key] = (file_name, content)
+        elif markdown.strip():
+            _report(on_progress, "files_parsed", 1)
+            yield _source_name(file_name), markdown
+
+    if not to_parse:
+        return
+
+    # Forward the cache misses to the cloud parser, named by their hash: names are unique and
+    # safe for the parser's file system, and each output member maps back to its PDF
+    files_to_upload = [
+        ('files', (f"{key}.pdf", content, 'application/pdf')) for key, (_, content) in to_parse.items()
+    ]
+    # Parsing has no side effects on the Lightning server, so it is safe to retry
+    response = get_client().post("/parse-pdfs", files=files_to_upload, stream=True, idempotent=True)
+
+    try:
+        if response.status_code != 200:
+            raise Exception(
+                f"Cloud parser returned an error. Status code: {response.status_code}. Details: {response.text}"
+            )
+
+        # A new parser version invalidates everything parsed by the previous one
+        parser_version = response.headers.get("X-Parser-Version")
+        if pdf_cache and parser_version:
+            pdf_cache.set_version(parser_version)
+
+        # Read the ZIP members straight from the response stream, keeping Markdown files
+        response.raw.decode_content = True
+        for member_name, file_content in iter_zip_members(response.raw):
+            key = _member_stem(member_name)
+            if not member_name.endswith(".md") or key not in to_parse:
+                continue
+
+            markdown = file_content.decode("utf-8", errors="replace")
+            if pdf_cache:
+                pdf_cache.set(key, markdown)
+
+            if markdown.strip():
+                _report(on_progress, "files_parsed", 1)
+                yield _source_name(to_parse[key][0]), markdown
+    finally:
+        # Release the streamed connection, the ZIP central directory is never read
+        response.close()
+
+
+def parse_and_store_cvs(files, splitter, collection_name, pdf_cache=None, on_progress=None, batch_size=128,
+                        on_chunks=None, allow_empty=False, on_stored=None):
+    """
+    Run the ingestion pipeline for a batch of PDF resumes.
+
+    The PDFs are parsed (from the cache or by the cloud parser), candidate names are
+    extracted, and the chunks are stored in the collection. Resumes stream through the
+    stages in batches of `batch_size`, so memory does not grow with the number of files.
+
+    Args:
+    - files (list[tuple[str, bytes]]): Pairs of PDF file name and content.
+    - splitter (DocumentSplitter): The splitter used to load and chunk the resumes.
+    - collection_name (str): Name of the collection to create or add to.
+    - pdf_cache (PersistentLRUCache): Optional cache of parsed Markdown keyed by PDF hash.
+    - on_progress (callable): Optional callback `on_progress(field, count)` receiving increments of
+      "files_parsed", "names_extracted", "chunks_total" and "chunks_embedded".
+    - batch_size (int): Number of resumes loaded, named and split together (default: 128).
+    - on_chunks (callable): Optional callback receiving each batch of chunks before it is embedded and
+      returning the chunks to embed, e.g. without the resumes the collection already stores.
+    - allow_empty (bool): Whether storing no chunks at all is valid, when adding to an existing
+      collection (default: False).
+    - on_stored (callable): Optional callback receiving each page of chunks once the Lightning server stored it.
+
+    Returns:
+    - int: The number of chunks stored.
+    """
+    chunk_count = 0
+
+    def chunks():
+        nonlocal chunk_count
+        batches = splitter.iter_chunks(
+            parse_pdfs(files, pdf_cache=pdf_cache, on_progress=on_progress),
+            batch_size=batch_size,
+            on_progress=lambda count: _report(on_progress, "names_extracted", count),
+        )
+        for batch in batches:
+            if on_chunks and batch:
+                batch = on_chunks(batch)
+            chunk_count += len(batch)
+            _report(on_progress, "chunks_total", len(batch))
+            yield from batch
+
+    # Chunks are embedded page by page while the next batches are still being split
+    add_collection(
+        collection_name=collection_name,
+        documents=chunks(),
+        on_progress=lambda count: _report(on_progress, "chunks_embedded", count),
+        allow_empty=allow_empty,
+        on_page=on_stored,
+    )
+
+    return chunk_count
@@ -0,0 +1,84 @@
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+from .markdown import split_sections
+
+
+class SectionSplitter:
+    """
+    Splits resumes into chunks along their sections (Experience, Education, Skills...).
+
+    Each section becomes one chunk tagged with a "section" metadata field. Runs of consecutive
+    short sections are merged into one chunk, and only sections longer than `chunk_size` fall back
+    to recursive character splitting, with the section heading repeated on every piece.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=50, min_chunk_size=200):
+        """
+        Initialize the splitter.
+
+        Args:
+        - chunk_size (int): Maximum size of a chunk in characters (default: 1000).
+        - chunk_overlap (int): Overlap between the pieces of an oversized section (default: 50).
+        - min_chunk_size (int): Consecutive sections shorter than this are merged together (default: 200).
+        """
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+
+    def _merge_short_sections(self, sections):
+        """Merge runs of short sections that fit together in one chunk."""
+        merged = []
+        for title, text in sections:
+            if merged:
+                previous_titles, previous_text = merged[-1]
+                short = len(previous_text) < self.min_chunk_size and len(text) < self.min_chunk_size
+                if short and len(previous_text) + len(text) + 2 <= self.chunk_size:
+                    merged[-1] = (previous_titles + [title], f"{previous_text}\n\n{text}")
+                    continue
+            merged.append(([title], text))
+        return merged
+
+    def split_text(self, text):
+        """
+        Split a resume's text into section chunks.
+
+        Args:
+        - text (str): Normalized resume text.
+
+        Returns:
+        - list[tuple[str, str]]: Pairs of section label and chunk text. Merged sections are
+          labelled with their titles joined by ", ".
+        """
+        chunks = []
+        for titles, section_text in self._merge_short_sections(split_sections(text)):
+            label = ", ".join(dict.fromkeys(titles))
+            if len(section_text) <= self.chunk_size:
+                chunks.append((label, section_text))
+                continue
+
+            pieces = self.fallback_splitter.split_text(section_text)
+            heading = section_text.splitlines()[0] if section_text.startswith("#") else None
+            for index, piece in enumerate(pieces):
+                # Keep the section heading on every piece so each chunk says what it is about
+                if index and heading:
+                    piece = f"{heading}\n{piece}"
+                chunks.append((label, piece))
+        return chunks
+
+    def split_documents(self, documents):
+        """
+        Split documents into section chunks.
+
+        Args:
+        - documents (list[Document]): The documents to split.
+
+        Returns:
+        - list[Document]: The chunks, carrying the document's metadata plus a "section" field.
+        """
+        chunks = []
+        for document in documents:
+            for section, text in self.split_text(document.page_content):
+                chunks.append(Document(page_content=text, metadata={**document.metadata, "section": section}))
+        return chunks
@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import tarfile
+from collections import Counter
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from document_retriever.catalog import CollectionUpdate
+from document_retriever.logic.cache import PersistentLRUCache
+from document_retriever.logic.collection import PAGE_SIZE, add_collection
+from document_retriever.logic.doc_splitter import DocumentSplitter
+from document_retriever.logic.pipeline import parse_pdfs, sanitize_file_name
+from document_retriever.models import IngestionJob
+
+
+def iter_pdfs(source, skip=()):
+    """
+    Yield the PDFs of a directory or tarball in a stable order, reading one file at a time.
+
+    Args:
+    - source (str): Path to a directory or a (possibly compressed) tar archive.
+    - skip (set[str]): Keys of files to leave out.
+
+    Yields:
+    - tuple[str, bytes]: The file's key (its path relative to the directory, or its member name) and content.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for file in sorted(files):
+                path = os.path.join(root, file)
+                key = os.path.relpath(path, source)
+                if file.lower().endswith(".pdf") and key not in skip:
+                    with open(path, "rb") as f:
+                        yield key, f.read()
+    elif os.path.isfile(source) and tarfile.is_tarfile(source):
+        # Stream mode reads the archive sequentially without seeking
+        with tarfile.open(source, "r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(".pdf") and member.name not in skip:
+                    yield member.name, tar.extractfile(member).read()
+    else:
+        raise CommandError(f"'{source}' is neither a directory nor a tar archive.")
+
+
+class Checkpoint:
+    """
+    Append-only record of the files whose chunks are stored, so that an interrupted import can resume.
+
+    The first line holds the run's settings, and each following line the keys of a committed batch.
+    A partially written last line (from a crash mid-write) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.done = set()
+        self.chunks = 0
+
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self.header is None:
+                    self.header = record
+                else:
+                    self.done.update(record["files"])
+                    self.chunks += record["chunks"]
+
+    def _append(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, header):
+        self.header = header
+        self._append(header)
+
+    def record(self, files, chunks):
+        self._append({"files": files, "chunks": chunks})
+        self.done.update(files)
+        self.chunks += chunks
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a directory or tarball of PDF resumes into a collection, through the same "
+        "parse, name extraction, split and embedding pipeline as the upload endpoint. "
+        "Progress is checkpointed after every batch, so rerunning the command resumes an interrupted import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or tar archive (.tar, .tar.gz, .tgz...) of PDF resumes.")
+        parser.add_argument("--collection", help="Collection to import into (default: a new collection).")
+        parser.add_argument(
+            "--mode", choices=[IngestionJob.Mode.APPEND, IngestionJob.Mode.UPSERT], default=IngestionJob.Mode.APPEND,
+            help="'append' skips the resumes the collection already stores, 'upsert' also replaces "
+                 "older versions of the same files (default: append).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: '<source>.checkpoint.jsonl'). Delete it to start over.",
+        )
+        parser.add_argument("--batch-size", type=int, default=256,
+                            help="Files processed and checkpointed together (default: 256).")
+        parser.add_argument("--parse-batch", type=int, default=32,
+                            help="PDFs sent in each request to the cloud parser (default: 32).")
+        parser.add_argument("--parse-workers", type=int, default=4,
+                            help="Concurrent requests to the cloud parser (default: 4).")
+        parser.add_argument("--name-workers", type=int, default=settings.NAME_EXTRACTION_WORKERS,
+                            help="Concurrent name extraction requests to OpenAI.")
+        parser.add_argument("--split-processes", type=int, default=settings.SPLIT_PROCESSES,
+                            help="Worker processes loading and splitting resumes, 0 for one per CPU core.")
+        parser.add_argument("--embed-workers", type=int, default=2,
+                            help="Pages of chunks sent concurrently to be embedded (default: 2).")
+        parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                            help="Chunks per embedding request.")
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options["source"])
+        checkpoint = Checkpoint(options["checkpoint"] or f"{source.rstrip(os.sep)}.checkpoint.jsonl")
+
+        if checkpoint.header:
+            collection_name = checkpoint.header["collection_name"]
+            if options["collection"] and options["collection"] != collection_name:
+                raise CommandError(
+                    f"The checkpoint belongs to collection '{collection_name}', delete it to import elsewhere."
+                )
+            self.stdout.write(
+                f"Resuming import into '{collection_name}': {len(checkpoint.done)} files already imported."
+            )
+        else:
+            collection_name = options["collection"] or f"collection_{uuid.uuid4().hex}"
+            checkpoint.start({"source": source, "collection_name": collection_name})
+            self.stdout.write(f"Importing into '{collection_name}'.")
+
+        splitter = DocumentSplitter(
+            max_workers=options["name_workers"],
+            names_per_request=settings.NAMES_PER_REQUEST,
+            name_confidence_threshold=settings.NAME_CONFIDENCE_THRESHOLD,
+            chunk_strategy=settings.CHUNK_STRATEGY,
+            section_chunk_size=settings.SECTION_CHUNK_SIZE,
+            processes=options["split_processes"],
+            name_cache=PersistentLRUCache(
+                settings.NAME_CACHE_PATH, table="candidate_names", max_entries=settings.NAME_CACHE_MAX_ENTRIES
+            ),
+        )
+        pdf_cache = PersistentLRUCache(
+            settings.PDF_CACHE_PATH, table="parsed_pdfs", max_entries=settings.PDF_CACHE_MAX_ENTRIES
+        )
+
+        totals = Counter()
+        stage_seconds = Counter()
+        started = time.perf_counter()
+        files = iter_pdfs(source, skip=checkpoint.done)
+        collection_update = CollectionUpdate(collection_name, options["mode"])
+
+        try:
+            with ThreadPoolExecutor(max_workers=options["parse_workers"]) as parse_executor:
+                while True:
+                    batch = list(islice(files, options["batch_size"]))
+                    if not batch:
+                        break
+                    chunk_count = self.import_batch(
+                        batch, collection_update, splitter, pdf_cache, parse_executor, options, totals, stage_seconds
+                    )
+                    checkpoint.record([key for key, _ in batch], chunk_count)
+
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{totals['files']} files, {totals['chunks']} chunks imported "
+                        f"({totals['files'] / elapsed:.1f} files/s)"
+                    )
+            collection_update.commit()
+        except BaseException:
+            # Interrupted or failed, rerunning the command resumes the import
+            collection_update.fail()
+            raise
+        finally:
+            if splitter.file_pool:
+                splitter.file_pool.shutdown()
+
+        self.report(totals, stage_seconds, time.perf_counter() - started, splitter, checkpoint)
+
+    def import_batch(self, batch, collection_update, splitter, pdf_cache, parse_executor, options, totals,
+                     stage_seconds):
+        """
+        Parse, name and split one batch of PDFs, then embed the resumes the collection does not store yet.
+
+        Returns:
+        - int: The number of chunks stored.
+        """
+        # Flatten the paths into file names, which the parser needs to be unique within a request
+        files, names = [], set()
+        for index, (key, content) in enumerate(batch):
+            file_name = sanitize_file_name(os.path.splitext(key)[0])
+            if file_name.lower() in names:
+                file_name = f"{file_name}_{index}"
+            names.add(file_name.lower())
+            files.append((f"{file_name}.pdf", content))
+
+        # Parse: several parser requests in flight, results kept in input order
+        stage_started = time.perf_counter()
+        parse_batches = [
+            files[index:index + options["parse_batch"]] for index in range(0, len(files), options["parse_batch"])
+        ]
+        parsed = [
+            markdown
+            for markdowns in parse_executor.map(
+                lambda parse_batch: list(parse_pdfs(parse_batch, pdf_cache=pdf_cache)), parse_batches
+            )
+            for markdown in markdowns
+        ]
+        stage_seconds["parse"] += time.perf_counter() - stage_started
+
+        # Name extraction and splitting
+        stage_started = time.perf_counter()
+        chunks = [
+            chunk for chunk_batch in splitter.iter_chunks(parsed, batch_size=len(parsed) or 1) for chunk in chunk_batch
+        ]
+        stage_seconds["names_and_split"] += time.perf_counter() - stage_started
+
+        # Embedding, with an upload ID derived from the batch so a retried batch skips stored pages
+        stage_started = time.perf_counter()
+        unchanged = collection_update.unchanged
+        if chunks:
+            chunks = collection_update.prepare(chunks)
+        if chunks:
+            upload_id = hashlib.sha256(
+                "\n".join([collection_update.collection.name] + [key for key, _ in batch]).encode("utf-8")
+            ).hexdigest()[:32]
+            add_collection(
+                collection_update.collection.name,
+                chunks,
+                page_size=options["page_size"],
+                upload_id=upload_id,
+                max_workers=options["embed_workers"],
+                on_page=collection_update.record_stored,
+            )
+        stage_seconds["embed"] += time.perf_counter() - stage_started
+
+        totals["files"] += len(batch)
+        totals["resumes"] += len(parsed)
+        totals["unchanged"] += collection_update.unchanged - unchanged
+        totals["chunks"] += len(chunks)
+        return len(chunks)
+
+    def report(self, totals, stage_seconds, elapsed, splitter, checkpoint):
+        """
+        Print the throughput of the run and the time spent in each stage.
+        """
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['files']} files ({totals['resumes']} with content) "
+            f"into {totals['chunks']} chunks in {elapsed:.1f}s."
+        ))
+        if totals["unchanged"]:
+            self.stdout.write(f"{totals['unchanged']} resumes were already stored and not embedded again.")
+        if elapsed > 0:
+            self.stdout.write(
+                f"Throughput: {totals['files'] / elapsed:.2f} files/s, {totals['chunks'] / elapsed:.2f} chunks/s"
+            )
+        for stage, seconds in stage_seconds.items():
+            self.stdout.write(f"  {stage}: {seconds:.1f}s")
+        for stage, stats in splitter.name_extractor.stats().items():
+            self.stdout.write(
+                f"  names ({stage}): {stats['accepted']}/{stats['documents']} accepted, "
+                f"{stats['seconds_per_document']:.3f}s per resume"
+            )
+        self.stdout.write(
+            f"Collection total: {len(checkpoint.done)} files, {checkpoint.chunks} chunks (checkpoint: {checkpoint.path})"
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from document_retriever.jobs import fail_interrupted_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark the ingestion jobs a previous server left pending or running as failed. "
+        "Run it once before the server starts, not while workers are serving."
+    )
+
+    def handle(self, *args, **options):
+        count = fail_interrupted_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Marked {count} ingestion job(s) interrupted by a restart as failed."))
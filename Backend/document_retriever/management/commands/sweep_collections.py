@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from document_retriever.sweeper import DROP, RELEASE, sweep_collections
+
+
+class Command(BaseCommand):
+    help = (
+        "Release from Milvus memory, or drop, the unpinned collections nobody chatted with for longer "
+        "than the TTL. Run it from cron when the in-process sweeper is disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=settings.COLLECTION_TTL,
+                            help="Idle time in seconds after which a collection is reclaimed.")
+        parser.add_argument("--action", choices=[RELEASE, DROP], default=settings.COLLECTION_SWEEP_ACTION,
+                            help="'release' frees the collection's memory, 'drop' deletes it.")
+
+    def handle(self, *args, **options):
+        try:
+            summary = sweep_collections(ttl=options["ttl"], action=options["action"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for name in summary["released"]:
+            self.stdout.write(f"Released '{name}'.")
+        for name in summary["dropped"]:
+            self.stdout.write(f"Dropped '{name}'.")
+        for name in summary["failed"]:
+            self.stdout.write(self.style.WARNING(f"Failed to reclaim '{name}', it is kept for the next sweep."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reclaimed {summary['entities_reclaimed']} entities "
+            f"({summary['vector_bytes_reclaimed'] / 2**20:.1f} MiB of vectors) in {summary['duration_seconds']:.1f}s."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from document_retriever.catalog import sync_with_milvus
+
+
+class Command(BaseCommand):
+    help = "Reconcile the local collection catalog with the collections stored in Milvus."
+
+    def handle(self, *args, **options):
+        try:
+            summary = sync_with_milvus()
+        except Exception as e:
+            raise CommandError(f"Failed to list the Milvus collections: {e}")
+
+        for name in summary["added"]:
+            self.stdout.write(f"Registered '{name}', found in Milvus only.")
+        for name in summary["missing"]:
+            self.stdout.write(self.style.WARNING(f"'{name}' is no longer in Milvus, marked as missing."))
+        for name in summary["drifted"]:
+            self.stdout.write(self.style.WARNING(f"'{name}' has a different number of chunks in Milvus."))
+        self.stdout.write(self.style.SUCCESS("Catalog synchronized with Milvus."))
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_retriever', '0001_ingestion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('building', 'Building'), ('ready', 'Ready'), ('failed', 'Failed'), ('missing', 'Missing')], db_index=True, default='building', max_length=16)),
+                ('candidates_count', models.PositiveIntegerField(default=0)),
+                ('chunks_count', models.PositiveIntegerField(default=0)),
+                ('milvus_entities', models.PositiveIntegerField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Candidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate_id', models.CharField(db_index=True, max_length=64)),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('source', models.CharField(blank=True, max_length=512)),
+                ('chunks_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='document_retriever.collection')),
+            ],
+            options={
+                'ordering': ['collection', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Chunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('section', models.CharField(blank=True, max_length=255)),
+                ('length', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='document_retriever.candidate')),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='document_retriever.collection')),
+            ],
+            options={
+                'ordering': ['candidate', 'position'],
+                'indexes': [models.Index(fields=['collection', 'section'], name='document_re_collect_e4f312_idx'), models.Index(fields=['content_hash'], name='document_re_content_32a913_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='candidate',
+            constraint=models.UniqueConstraint(fields=('collection', 'candidate_id'), name='unique_candidate_per_collection'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_retriever', '0002_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='candidates_replaced',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='mode',
+            field=models.CharField(choices=[('create', 'Create'), ('append', 'Append'), ('upsert', 'Upsert')], default='create', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='resumes_unchanged',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_retriever', '0003_incremental_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='pinned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='collection',
+            name='status',
+            field=models.CharField(choices=[('building', 'Building'), ('ready', 'Ready'), ('failed', 'Failed'), ('missing', 'Missing'), ('released', 'Released'), ('expired', 'Expired')], db_index=True, default='building', max_length=16),
+        ),
+    ]
@@ -1,3 +1,125 @@
+import uuid
 from django.db import models
 
 
+class IngestionJob(models.Model):
+    """
+    A background run of the resume ingestion pipeline, with per-stage progress counters.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    class Mode(models.TextChoices):
+        CREATE = "create"  # Store every resume in a new collection
+        APPEND = "append"  # Add the resumes the collection does not store yet
+        UPSERT = "upsert"  # Append, and replace older versions of the same source files
+
+    class Stage(models.TextChoices):
+        QUEUED = "queued"
+        PARSING = "parsing"
+        EXTRACTING_NAMES = "extracting_names"
+        EMBEDDING = "embedding"
+        DONE = "done"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    stage = models.CharField(max_length=32, choices=Stage.choices, default=Stage.QUEUED)
+    files_total = models.PositiveIntegerField(default=0)
+    files_parsed = models.PositiveIntegerField(default=0)
+    names_extracted = models.PositiveIntegerField(default=0)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_embedded = models.PositiveIntegerField(default=0)
+    resumes_unchanged = models.PositiveIntegerField(default=0)  # Already stored, not embedded again
+    candidates_replaced = models.PositiveIntegerField(default=0)
+    mode = models.CharField(max_length=16, choices=Mode.choices, default=Mode.CREATE)
+    collection_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class Collection(models.Model):
+    """
+    A Milvus collection of resume chunks, mirrored locally so it can be listed without calling the Lightning server.
+    """
+
+    class Status(models.TextChoices):
+        BUILDING = "building"
+        READY = "ready"
+        FAILED = "failed"
+        MISSING = "missing"  # Known locally but no longer in Milvus
+        RELEASED = "released"  # Idle, released from Milvus memory until its next use
+        EXPIRED = "expired"  # Idle past its TTL, dropped from Milvus
+
+    name = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.BUILDING, db_index=True)
+    candidates_count = models.PositiveIntegerField(default=0)
+    chunks_count = models.PositiveIntegerField(default=0)
+    # Entity count reported by Milvus at the last sync, to detect drift
+    milvus_entities = models.PositiveIntegerField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    last_accessed_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Last chat message
+    pinned = models.BooleanField(default=False)  # Never released or dropped by the sweeper
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.name
+
+
+class Candidate(models.Model):
+    """
+    A resume stored in a collection, identified by the candidate ID carried in its chunks' metadata.
+    """
+
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name="candidates")
+    candidate_id = models.CharField(max_length=64, db_index=True)
+    name = models.CharField(max_length=255, db_index=True)
+    source = models.CharField(max_length=512, blank=True)
+    chunks_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["collection", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["collection", "candidate_id"], name="unique_candidate_per_collection"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.candidate_id})"
+
+
+class Chunk(models.Model):
+    """
+    Metadata of a chunk embedded in Milvus. The text itself only lives in Milvus.
+    """
+
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name="chunks")
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name="chunks")
+    position = models.PositiveIntegerField()  # Order of the chunk within the resume
+    section = models.CharField(max_length=255, blank=True)
+    length = models.PositiveIntegerField()  # In characters
+    content_hash = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ["candidate", "position"]
+        indexes = [
+            models.Index(fields=["collection", "section"]),
+            models.Index(fields=["content_hash"]),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate.candidate_id}#{self.position}"
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from .models import Candidate, Chunk, Collection, IngestionJob
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestionJob
+        fields = [
+            "id", "status", "stage", "files_total", "files_parsed", "names_extracted",
+            "chunks_total", "chunks_embedded", "resumes_unchanged", "candidates_replaced", "mode",
+            "collection_name", "error", "created_at", "updated_at",
+        ]
+
+
+class CollectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Collection
+        fields = [
+            "name", "status", "candidates_count", "chunks_count", "milvus_entities", "pinned",
+            "last_accessed_at", "synced_at", "created_at", "updated_at",
+        ]
+
+
+class CandidateSerializer(serializers.ModelSerializer):
+    collection = serializers.SlugRelatedField(slug_field="name", read_only=True)
+
+    class Meta:
+        model = Candidate
+        fields = ["candidate_id", "name", "collection", "source", "chunks_count", "created_at"]
+
+
+class ChunkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Chunk
+        fields = ["position", "section", "length", "content_hash"]
@@ -0,0 +1,166 @@
+import time
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from Backend.lightning_client import get_client
+from .models import Candidate, Collection
+
+
+RELEASE = "release"
+DROP = "drop"
+
+
+class SweepStats:
+    """
+    Thread-safe totals of the collections reclaimed by the sweeper since the server started.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {
+            "sweeps": 0,
+            "released": 0,
+            "dropped": 0,
+            "failed": 0,
+            "entities_reclaimed": 0,
+            "vector_bytes_reclaimed": 0,
+        }
+        self.last_sweep = None
+
+    def record(self, summary):
+        with self.lock:
+            self.totals["sweeps"] += 1
+            for key in ("released", "dropped", "failed"):
+                self.totals[key] += len(summary[key])
+            for key in ("entities_reclaimed", "vector_bytes_reclaimed"):
+                self.totals[key] += summary[key]
+            self.last_sweep = summary
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.totals, "last_sweep": self.last_sweep}
+
+
+sweep_stats = SweepStats()
+
+
+# Statuses a collection can be reclaimed from, and the status it is left in, per action
+SWEEP_STATUSES = {
+    RELEASE: ([Collection.Status.READY], Collection.Status.RELEASED),
+    DROP: ([Collection.Status.READY, Collection.Status.RELEASED, Collection.Status.FAILED], Collection.Status.EXPIRED),
+}
+ENDPOINTS = {RELEASE: "/collections/release", DROP: "/collections/drop"}
+
+
+def idle_collections(ttl, action):
+    """
+    Return the unpinned collections idle for longer than `ttl` seconds that `action` applies to.
+
+    Collections never chatted with are idle from their last update.
+    """
+    if ttl <= 0:
+        raise ValueError("The collection TTL is disabled.")
+    if action not in SWEEP_STATUSES:
+        raise ValueError(f"Unknown sweep action '{action}'.")
+
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    statuses, _ = SWEEP_STATUSES[action]
+    return Collection.objects.filter(
+        Q(last_accessed_at__lt=cutoff) | Q(last_accessed_at__isnull=True, updated_at__lt=cutoff),
+        status__in=statuses,
+        pinned=False,
+    )
+
+
+def sweep_collections(ttl=None, action=None):
+    """
+    Release or drop the unpinned collections idle for longer than the TTL.
+
+    Each collection is claimed by switching its status before calling the Lightning server, so
+    concurrent sweepers (one per server worker) never reclaim the same collection twice. A
+    failed call restores the previous status, and the collection is retried on the next sweep.
+
+    Args:
+    - ttl (int): Idle time in seconds after which a collection is reclaimed (default: settings.COLLECTION_TTL).
+    - action (str): "release" to free its memory, or "drop" to delete it (default: settings.COLLECTION_SWEEP_ACTION).
+
+    Returns:
+    - dict: Names of the "released", "dropped" and "failed" collections, with the entities and
+      vector bytes reclaimed and the duration of the sweep.
+    """
+    ttl = settings.COLLECTION_TTL if ttl is None else ttl
+    action = action or settings.COLLECTION_SWEEP_ACTION
+    idle = idle_collections(ttl, action)
+    _, target = SWEEP_STATUSES[action]
+    started = time.perf_counter()
+
+    summary = {"released": [], "dropped": [], "failed": [], "entities_reclaimed": 0, "vector_bytes_reclaimed": 0}
+    for pk, name, previous_status in idle.values_list("pk", "name", "status"):
+        # Claim the collection, unless it was used, pinned or claimed in the meantime. The
+        # timestamps are left untouched so they keep measuring idle time.
+        claimed = idle.filter(pk=pk, status=previous_status).update(status=target)
+        if not claimed:
+            continue
+
+        try:
+            response = get_client().post(ENDPOINTS[action], json={"collection_name": name}, idempotent=True)
+            response.raise_for_status()
+            usage = response.json()
+        except Exception as e:
+            print(f"Failed to {action} collection '{name}': {e}")
+            Collection.objects.filter(pk=pk, status=target).update(status=previous_status)
+            summary["failed"].append(name)
+            continue
+
+        if action == DROP:
+            Candidate.objects.filter(collection_id=pk).delete()
+            Collection.objects.filter(pk=pk).update(candidates_count=0, chunks_count=0, milvus_entities=0)
+        summary["released" if action == RELEASE else "dropped"].append(name)
+        summary["entities_reclaimed"] += usage.get("entities", 0)
+        summary["vector_bytes_reclaimed"] += usage.get("vector_bytes", 0)
+
+    summary["finished_at"] = timezone.now().isoformat()
+    summary["duration_seconds"] = time.perf_counter() - started
+    sweep_stats.record(summary)
+    return summary
+
+
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+
+
+def _run_sweeper(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            summary = sweep_collections()
+            if summary["released"] or summary["dropped"] or summary["failed"]:
+                print(
+                    f"Collection sweep: {len(summary['released'])} released, {len(summary['dropped'])} dropped, "
+                    f"{len(summary['failed'])} failed, {summary['vector_bytes_reclaimed'] / 2**20:.1f} MiB reclaimed"
+                )
+        except Exception as e:
+            print(f"Collection sweep failed: {e}")
+        finally:
+            # The sweeper thread is not managed by Django's request cycle
+            close_old_connections()
+
+
+def start_sweeper():
+    """
+    Start the background thread sweeping idle collections every COLLECTION_SWEEP_INTERVAL seconds,
+    unless the TTL or the interval is 0. Starting it again is a no-op.
+    """
+    global _sweeper_started
+    if settings.COLLECTION_TTL <= 0 or settings.COLLECTION_SWEEP_INTERVAL <= 0:
+        return
+    with _sweeper_lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+    threading.Thread(
+        target=_run_sweeper, args=(settings.COLLECTION_SWEEP_INTERVAL,), name="collection-sweeper", daemon=True
+    ).start()
@@ -0,0 +1,631 @@
+import io
+import os
+import re
+import json
+import importlib
+import time
+import zlib
+import struct
+import zipfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from document_retriever.catalog import CollectionUpdate
+from document_retriever.jobs import fail_interrupted_jobs
+from document_retriever.logic.cache import PersistentLRUCache, file_hash
+from document_retriever.logic.pipeline import parse_pdfs
+from document_retriever.logic.collection import add_collection
+from document_retriever.models import Candidate, Chunk, Collection, IngestionJob
+from document_retriever.logic.name_extractor import UNKNOWN_NAME, HeuristicNameExtractor, LLMNameExtractor
+from document_retriever.logic.markdown import normalize_markdown
+from document_retriever.utils import DATA_DESCRIPTOR, FLAG_DATA_DESCRIPTOR, LOCAL_FILE_HEADER, iter_zip_members
+from document_retriever.logic.section_splitter import SectionSplitter
+from document_retriever.management.commands.benchmark_name_extractor import evaluate, synthetic_resumes
+from document_retriever.logic.doc_splitter import DocumentSplitter
+from document_retriever.logic.parallel import FilePool, load_and_split
+from document_retriever.management.commands.benchmark_chunking import (
+    evaluate_splitter, synthetic_markdown_resumes, time_processes,
+)
+
+
+class HeuristicNameExtractorTests(SimpleTestCase):
+    def setUp(self):
+        self.extractor = HeuristicNameExtractor()
+        self.threshold = settings.NAME_CONFIDENCE_THRESHOLD
+
+    def test_title_headings_are_not_accepted_as_names(self):
+        for content in ["# Senior Engineer", "# Machine Learning", "# Work History", "# Data Scientist\njohn@x.com"]:
+            with self.subTest(content=content):
+                _, confidence = self.extractor.extract(content)
+                self.assertLess(confidence, self.threshold)
+
+    def test_heading_without_email_is_deferred(self):
+        name, confidence = self.extractor.extract("# John Doe\nBackend developer\n\n## Experience")
+        self.assertEqual(name, "john doe")
+        self.assertLess(confidence, self.threshold)
+
+    def test_heading_agreeing_with_email_is_accepted(self):
+        for email in ["john.doe@x.com", "jdoe@x.com", "doe.j@x.com"]:
+            with self.subTest(email=email):
+                name, confidence = self.extractor.extract(f"# John Doe\n{email}")
+                self.assertEqual(name, "john doe")
+                self.assertGreaterEqual(confidence, self.threshold)
+
+    def test_contradicting_email_lowers_confidence(self):
+        _, agreeing = self.extractor.extract("# Jane Roe\njane.roe@x.com")
+        _, missing = self.extractor.extract("# Jane Roe")
+        _, contradicting = self.extractor.extract("# Jane Roe\nmark.smith@x.com")
+        self.assertGreater(agreeing, missing)
+        self.assertGreater(missing, contradicting)
+
+    def test_accented_name_agrees_with_ascii_email(self):
+        name, confidence = self.extractor.extract("# Lena Müller\nlmuller@x.com")
+        self.assertEqual(name, "lena müller")
+        self.assertGreaterEqual(confidence, self.threshold)
+
+    def test_email_fallback(self):
+        self.assertEqual(self.extractor.extract("# Data Scientist\njohn.doe@x.com"), ("john doe", 0.4))
+        self.assertEqual(self.extractor.extract("no name here"), (UNKNOWN_NAME, 0.0))
+
+    def test_synthetic_corpus_precision(self):
+        report = evaluate(self.extractor, synthetic_resumes(), self.threshold)
+        # Accepted names skip the LLM, so they must be right
+        self.assertEqual(report["overall"]["precision"], 1.0)
+        self.assertGreaterEqual(report["overall"]["coverage"], 0.4)
+        for layout in ("title+email", "title+other-email"):
+            self.assertEqual(report[layout]["accepted"], 0)
+
+
+def zip_member(name, content, deflate=True, descriptor=False, zip64_extra=False, saturated=True,
+               zip64_descriptor=None, crc=None):
+    """
+    Build the local header, data and data descriptor of a ZIP member by hand, to cover the layouts
+    `zipfile` does not write (e.g. ZIP64 members whose header sizes are zero).
+    """
+    if deflate:
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = compressor.compress(content) + compressor.flush()
+    else:
+        data = content
+    crc = zlib.crc32(content) if crc is None else crc
+    header_crc, header_sizes = (0, (0, 0)) if descriptor else (crc, (len(data), len(content)))
+    extra = b""
+    if zip64_extra:
+        extra = struct.pack("<HHQQ", 1, 16, header_sizes[1], header_sizes[0])
+        if saturated:
+            header_sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+    encoded_name = name.encode()
+    member = LOCAL_FILE_HEADER + struct.pack(
+        "<HHHHHIIIHH", 45 if zip64_extra else 20, FLAG_DATA_DESCRIPTOR if descriptor else 0, 8 if deflate else 0,
+        0, 0, header_crc, *header_sizes, len(encoded_name), len(extra),
+    ) + encoded_name + extra + data
+    if descriptor:
+        wide = zip64_extra if zip64_descriptor is None else zip64_descriptor
+        member += DATA_DESCRIPTOR + struct.pack("<I", crc) + struct.pack("<QQ" if wide else "<II", len(data), len(content))
+    return member
+
+
+def central_directory():
+    return b"PK\x01\x02" + b"\x00" * 42
+
+
+class TrickleStream(io.BytesIO):
+    """Stream returning at most `size` bytes per read, like a slow socket."""
+
+    def __init__(self, data, size=1):
+        super().__init__(data)
+        self.size = size
+
+    def read(self, size=-1):
+        return super().read(self.size if size < 0 else min(size, self.size))
+
+
+class IterZipMembersTests(SimpleTestCase):
+    CONTENTS = {"a.pdf": b"%PDF-1.4 " + os.urandom(3000), "dir/b.pdf": b"resume " * 2000, "empty.pdf": b""}
+
+    def read_all(self, archive):
+        """Read an archive through normal streams and 1-byte reads, checking they give the same members."""
+        results = [
+            list(iter_zip_members(io.BytesIO(archive))),
+            list(iter_zip_members(io.BytesIO(archive), chunk_size=7)),
+            list(iter_zip_members(TrickleStream(archive), chunk_size=1)),
+            list(iter_zip_members(TrickleStream(archive, size=3))),
+        ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+        return dict(results[0])
+
+    def test_zipfile_archives(self):
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            with self.subTest(compression=compression):
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w", compression) as archive:
+                    archive.writestr("dir/", b"")
+                    for name, content in self.CONTENTS.items():
+                        archive.writestr(name, content)
+                self.assertEqual(self.read_all(buffer.getvalue()), self.CONTENTS)
+
+    def test_zipfile_archive_written_to_a_stream_uses_data_descriptors(self):
+        class Unseekable(io.RawIOBase):
+            def __init__(self):
+                self.data = bytearray()
+
+            def writable(self):
+                return True
+
+            def write(self, data):
+                self.data += data
+                return len(data)
+
+        stream = Unseekable()
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in self.CONTENTS.items():
+                with archive.open(name, "w", force_zip64=name == "a.pdf") as member:
+                    member.write(content)
+        self.assertEqual(self.read_all(bytes(stream.data)), self.CONTENTS)
+
+    def test_hand_built_layouts(self):
+        layouts = {
+            "stored": {"deflate": False},
+            "deflated": {},
+            "descriptor": {"descriptor": True},
+            "zip64 saturated": {"zip64_extra": True},
+            "zip64 descriptor, saturated header": {"descriptor": True, "zip64_extra": True},
+            "zip64 descriptor, zero header sizes": {"descriptor": True, "zip64_extra": True, "saturated": False},
+            "64-bit descriptor without zip64 extra": {"descriptor": True, "zip64_descriptor": True},
+        }
+        for layout, options in layouts.items():
+            with self.subTest(layout=layout):
+                archive = b"".join(
+                    zip_member(name, content, **options) for name, content in self.CONTENTS.items()
+                ) + central_directory()
+                self.assertEqual(self.read_all(archive), self.CONTENTS)
+
+    def test_corrupt_crc_is_rejected(self):
+        for options in ({}, {"deflate": False}, {"descriptor": True}):
+            with self.subTest(**options):
+                archive = zip_member("a.pdf", b"content", crc=12345, **options) + central_directory()
+                with self.assertRaisesRegex(ValueError, "CRC mismatch"):
+                    list(iter_zip_members(TrickleStream(archive), chunk_size=1))
+
+    def test_truncated_archive_is_rejected(self):
+        archive = zip_member("a.pdf", self.CONTENTS["dir/b.pdf"], descriptor=True)
+        for size in (10, 40, len(archive) - 30):
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    list(iter_zip_members(io.BytesIO(archive[:size])))
+
+
+class SectionChunkingTests(SimpleTestCase):
+    def test_sections_give_fewer_and_more_coherent_chunks_than_fixed_size_chunks(self):
+        texts = [normalize_markdown(resume) for resume in synthetic_markdown_resumes(count=60)]
+        sections = evaluate_splitter(SectionSplitter(chunk_size=1000, chunk_overlap=50), texts)
+        recursive = evaluate_splitter(RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50), texts)
+
+        self.assertLess(sections["chunks"], recursive["chunks"])
+        self.assertEqual(sections["mixed_share"], 0.0)
+        self.assertGreater(recursive["mixed_share"], 0.3)
+        self.assertLess(sections["cut_share"], recursive["cut_share"])
+
+    def test_section_chunks_are_labelled(self):
+        text = normalize_markdown(synthetic_markdown_resumes(count=1)[0])
+        labels = [document.metadata["section"] for document in SectionSplitter().split_documents(
+            [Document(page_content=text, metadata={})]
+        )]
+        self.assertIn("Experience", labels)
+        self.assertTrue(any("Education" in label for label in labels))
+
+
+class FixedNameExtractor:
+    def extract_many(self, contents, on_progress=None):
+        return [(f"candidate {content.split()[2]}", 1.0) for content in contents]
+
+
+class FilePoolTests(SimpleTestCase):
+    def setUp(self):
+        self.files = [(f"resume_{index}.md", content) for index, content in enumerate(synthetic_markdown_resumes(count=30))]
+        self.splitter = SectionSplitter()
+
+    def test_pool_matches_the_calling_thread_in_input_order(self):
+        files = self.files[:10] + [("missing.md", None)] + self.files[10:]
+        pool = FilePool(self.splitter, processes=2, window=3)
+        self.addCleanup(pool.shutdown)
+
+        in_thread = [load_and_split(source, content, splitter=self.splitter) for source, content in files]
+        self.assertEqual(list(pool.map(files)), in_thread)
+        # A file failing on a worker is reported without failing the others
+        self.assertIsNotNone(in_thread[10][3])
+        self.assertEqual(sum(result[3] is None for result in in_thread), len(self.files))
+        # The pool is reused across calls
+        executor = pool.executor
+        self.assertEqual(list(pool.map(files[:4], split=False)),
+                         [load_and_split(source, content, split=False) for source, content in files[:4]])
+        self.assertIs(pool.executor, executor)
+
+    def test_document_splitter_gives_the_same_chunks_with_processes(self):
+        chunks = {}
+        for processes in (1, 2):
+            splitter = DocumentSplitter(processes=processes, name_extractor=FixedNameExtractor())
+            if splitter.file_pool:
+                self.addCleanup(splitter.file_pool.shutdown)
+            chunks[processes] = [
+                (chunk.page_content, chunk.metadata) for batch in splitter.iter_chunks(iter(self.files), batch_size=8)
+                for chunk in batch
+            ]
+        self.assertIsNone(DocumentSplitter(processes=1, name_extractor=FixedNameExtractor()).file_pool)
+        self.assertEqual(chunks[2], chunks[1])
+        self.assertGreater(len(chunks[1]), len(self.files))
+
+    def test_zero_processes_start_one_per_core(self):
+        for processes in (0, None):
+            with mock.patch("multiprocessing.cpu_count", return_value=4):
+                splitter = DocumentSplitter(processes=processes, name_extractor=FixedNameExtractor())
+            self.assertEqual(splitter.file_pool.processes, 4)
+        # A single core is used from the calling thread
+        with mock.patch("multiprocessing.cpu_count", return_value=1):
+            self.assertIsNone(DocumentSplitter(processes=0, name_extractor=FixedNameExtractor()).file_pool)
+
+    def test_benchmark_reports_each_run(self):
+        timings = time_processes([content for _, content in self.files[:6]], self.splitter, processes=2)
+        self.assertEqual(set(timings), {"in_thread", "pool_cold", "pool_warm"})
+        self.assertTrue(all(seconds > 0 for seconds in timings.values()))
+
+
+class FakeOpenAIServer:
+    """
+    Local HTTP server answering OpenAI chat completion requests with `reply(body)`, which returns
+    the completion's content, or an (HTTP status, error message) tuple.
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.requests.append(body)
+                result = server.reply(body)
+                if isinstance(result, tuple):
+                    status, payload = result[0], {"error": {"message": result[1], "type": "requests"}}
+                else:
+                    status, payload = 200, {
+                        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": result}}],
+                    }
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def prompt_of(body):
+    return body["messages"][0]["content"]
+
+
+def resume(index):
+    return f"Resume of Person {index}\nExperience: ..."
+
+
+def name_in(prompt):
+    """Answer a single-resume prompt with the name of the person in it."""
+    return re.search(r"Person \d+", prompt).group(0)
+
+
+class LLMNameExtractorTests(SimpleTestCase):
+    def extractor(self, reply, **kwargs):
+        server = FakeOpenAIServer(reply)
+        self.addCleanup(server.close)
+        with mock.patch.dict(os.environ, {"OPENAI_BASE_URL": server.url, "OPENAI_API_KEY": "test"}):
+            return LLMNameExtractor(backoff_base=0.001, **kwargs), server
+
+    def test_extract_many_keeps_input_order_and_reports_progress(self):
+        def reply(body):
+            # Later resumes answer first
+            name = name_in(prompt_of(body))
+            time.sleep(0.05 - int(name.split()[1]) * 0.005)
+            return name
+
+        extractor, server = self.extractor(reply, max_workers=4)
+        progress = []
+        results = extractor.extract_many([resume(index) for index in range(8)], on_progress=progress.append)
+
+        self.assertEqual(results, [(f"person {index}", 1.0) for index in range(8)])
+        self.assertEqual(progress, [1] * 8)
+        self.assertEqual(len(server.requests), 8)
+
+    def test_rate_limited_requests_are_retried_once_per_backoff(self):
+        calls = []
+
+        def reply(body):
+            calls.append(body)
+            return (429, "Rate limit reached") if len(calls) <= 2 else name_in(prompt_of(body))
+
+        extractor, server = self.extractor(reply, max_retries=3)
+        self.assertEqual(extractor.client.max_retries, 0)
+        self.assertEqual(extractor.extract(resume(1)), ("person 1", 1.0))
+        # The OpenAI client does not retry on its own, so each backoff sends exactly one request
+        self.assertEqual(len(server.requests), 3)
+
+    def test_rate_limit_exhausting_retries_returns_unknown(self):
+        extractor, server = self.extractor(lambda body: (429, "Rate limit reached"), max_retries=2)
+        self.assertEqual(extractor.extract(resume(1)), (UNKNOWN_NAME, 0.0))
+        self.assertEqual(len(server.requests), 3)
+
+    def test_extract_group_batches_resumes_in_a_json_request(self):
+        def reply(body):
+            # A group of one resume is sent as a plain request
+            if "response_format" not in body:
+                return name_in(prompt_of(body))
+            return json.dumps({"names": re.findall(r"Person \d+", prompt_of(body))})
+
+        extractor, server = self.extractor(reply, names_per_request=3)
+        progress = []
+        results = extractor.extract_many([resume(index) for index in range(7)], on_progress=progress.append)
+
+        self.assertEqual(results, [(f"person {index}", 1.0) for index in range(7)])
+        self.assertEqual(sorted(progress), [1, 3, 3])
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(
+            [body.get("response_format") for body in server.requests].count({"type": "json_object"}), 2
+        )
+
+    def test_extract_group_falls_back_to_single_requests_on_a_wrong_name_count(self):
+        def reply(body):
+            if "response_format" in body:
+                return json.dumps({"names": ["Person 0"]})
+            return name_in(prompt_of(body))
+
+        extractor, server = self.extractor(reply, names_per_request=3)
+        results = extractor.extract_group([resume(index) for index in range(3)])
+
+        self.assertEqual(results, [(f"person {index}", 1.0) for index in range(3)])
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(sum("response_format" in body for body in server.requests), 1)
+
+
+class FailInterruptedJobsTests(TestCase):
+    def test_unfinished_jobs_and_their_collections_are_failed(self):
+        running = IngestionJob.objects.create(status=IngestionJob.Status.RUNNING, collection_name="a")
+        pending = IngestionJob.objects.create(status=IngestionJob.Status.PENDING, collection_name="b")
+        done = IngestionJob.objects.create(status=IngestionJob.Status.SUCCEEDED, collection_name="c")
+        Collection.objects.create(name="a", status=Collection.Status.BUILDING)
+        Collection.objects.create(name="b", status=Collection.Status.READY)
+
+        self.assertEqual(fail_interrupted_jobs(), 2)
+
+        for job in (running, pending):
+            job.refresh_from_db()
+            self.assertEqual(job.status, IngestionJob.Status.FAILED)
+            self.assertIn("restart", job.error)
+        done.refresh_from_db()
+        self.assertEqual(done.status, IngestionJob.Status.SUCCEEDED)
+        self.assertEqual(Collection.objects.get(name="a").status, Collection.Status.FAILED)
+        # An append to a ready collection leaves it ready
+        self.assertEqual(Collection.objects.get(name="b").status, Collection.Status.READY)
+        self.assertEqual(fail_interrupted_jobs(), 0)
+
+    def test_command_fails_interrupted_jobs_and_serving_does_not(self):
+        job = IngestionJob.objects.create(status=IngestionJob.Status.RUNNING, collection_name="a")
+        # A worker starting while another one runs the job leaves it running
+        with mock.patch("document_retriever.sweeper.start_sweeper"):
+            importlib.reload(importlib.import_module("Backend.asgi"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.Status.RUNNING)
+
+        out = io.StringIO()
+        call_command("fail_interrupted_jobs", stdout=out)
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.Status.FAILED)
+        self.assertIn("Marked 1 ingestion job(s)", out.getvalue())
+
+
+class FakeParserResponse:
+    def __init__(self, status_code=200, body=b"", headers=None, json_body=None):
+        self.status_code = status_code
+        self.raw = io.BytesIO(body)
+        self.headers = headers or {}
+        self.text = body.decode("latin-1")
+        self.json_body = json_body
+
+    def json(self):
+        return self.json_body
+
+    def close(self):
+        pass
+
+
+class FakeParserClient:
+    """
+    Lightning client stand-in parsing each uploaded PDF into "parsed <content> v<version>", laid
+    out like marker's output ZIP (`<stem>/<stem>.md` plus images).
+    """
+
+    def __init__(self, version="1"):
+        self.version = version
+        self.parsed = []
+
+    def get(self, endpoint, **kwargs):
+        if self.version is None:
+            return FakeParserResponse(status_code=404)
+        return FakeParserResponse(json_body={"version": self.version})
+
+    def post(self, endpoint, files, **kwargs):
+        body = io.BytesIO()
+        with zipfile.ZipFile(body, "w") as archive:
+            for _, (file_name, content, _) in files:
+                stem = os.path.splitext(file_name)[0]
+                self.parsed.append(file_name)
+                archive.writestr(f"{stem}/{stem}.md", f"parsed {content.decode()} v{self.version}")
+                archive.writestr(f"{stem}/_page_0_Picture_1.jpeg", b"\xff\xd8")
+        return FakeParserResponse(body=body.getvalue(), headers={"X-Parser-Version": self.version or ""})
+
+
+class ParsePdfsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = PersistentLRUCache(os.path.join(directory.name, "pdf.sqlite3"), table="parsed_pdfs")
+        self.client = FakeParserClient()
+        patcher = mock.patch("document_retriever.logic.pipeline.get_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, files):
+        return list(parse_pdfs(files, pdf_cache=self.cache))
+
+    def test_same_file_names_in_different_folders_stay_apart(self):
+        results = self.parse([("a/cv.pdf", b"alice"), ("b/cv.pdf", b"bob"), ("cv.pdf", b"carol")])
+
+        self.assertEqual(results, [("a_cv_cv.md", "parsed alice v1"), ("b_cv_cv.md", "parsed bob v1"),
+                                   ("cv_cv.md", "parsed carol v1")])
+        self.assertEqual(self.cache.get(file_hash(b"alice")), "parsed alice v1")
+        self.assertEqual(self.cache.get(file_hash(b"bob")), "parsed bob v1")
+        # Uploads are named by content hash, never by the client's path
+        self.assertTrue(all("/" not in name for name in self.client.parsed))
+
+    def test_cache_hits_are_served_without_parsing(self):
+        self.parse([("cv.pdf", b"alice")])
+        self.client.parsed.clear()
+        self.assertEqual(self.parse([("renamed.pdf", b"alice")]), [("renamed_renamed.md", "parsed alice v1")])
+        self.assertEqual(self.client.parsed, [])
+
+    def test_new_parser_version_invalidates_an_all_hit_batch(self):
+        self.parse([("a.pdf", b"alice"), ("b.pdf", b"bob")])
+        self.client.version = "2"
+        self.client.parsed.clear()
+
+        results = self.parse([("a.pdf", b"alice"), ("b.pdf", b"bob")])
+
+        self.assertEqual([markdown for _, markdown in results], ["parsed alice v2", "parsed bob v2"])
+        self.assertEqual(len(self.client.parsed), 2)
+
+    def test_unknown_parser_version_bypasses_cached_markdown(self):
+        self.parse([("a.pdf", b"alice")])
+        self.client.version = None
+        self.client.parsed.clear()
+        self.parse([("a.pdf", b"alice")])
+        self.assertEqual(len(self.client.parsed), 1)
+
+
+def chunks_of(candidate_id, source, count):
+    return [
+        Document(page_content=f"{candidate_id} chunk {index}",
+                 metadata={"candidate_id": candidate_id, "source": source, "name": candidate_id})
+        for index in range(count)
+    ]
+
+
+class CollectionUpdateTests(TestCase):
+    def setUp(self):
+        # Candidates the Lightning server stores: ID -> (source, number of chunks)
+        self.stored = {}
+        self.deleted = []
+
+        def find_candidates(collection_name, candidate_ids, sources=()):
+            return [
+                {"candidate_id": candidate_id, "source": source, "chunks": count}
+                for candidate_id, (source, count) in self.stored.items()
+                if candidate_id in candidate_ids or source in sources
+            ]
+
+        for name, fake in [("find_candidates", find_candidates),
+                           ("delete_candidates", lambda collection_name, ids: self.deleted.extend(ids))]:
+            patcher = mock.patch(f"document_retriever.catalog.{name}", side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_candidate_replaced_in_an_early_batch_is_kept_when_a_later_batch_contains_it(self):
+        self.stored = {"old": ("cv.md", 2)}
+        update = CollectionUpdate("resumes", IngestionJob.Mode.UPSERT)
+
+        # A new version of cv.md, then the old version again under another file name
+        update.record_stored(update.prepare(chunks_of("new", "cv.md", 2)))
+        self.assertEqual(update.replaced, {"old"})
+        self.assertEqual(update.prepare(chunks_of("old", "copy.md", 2)), [])
+        update.commit()
+
+        self.assertEqual(update.replaced, set())
+        self.assertNotIn("old", self.deleted)
+
+    def test_candidate_seen_first_is_never_replaced_by_a_later_batch(self):
+        self.stored = {"old": ("cv.md", 1)}
+        update = CollectionUpdate("resumes", IngestionJob.Mode.UPSERT)
+        update.prepare(chunks_of("old", "copy.md", 1))
+        update.prepare(chunks_of("new", "cv.md", 1))
+        self.assertEqual(update.replaced, set())
+
+    def test_older_version_is_deleted_at_commit(self):
+        self.stored = {"old": ("cv.md", 1)}
+        update = CollectionUpdate("resumes", IngestionJob.Mode.UPSERT)
+        update.record_stored(update.prepare(chunks_of("new", "cv.md", 1)))
+        update.commit()
+        self.assertEqual(self.deleted, ["old"])
+
+    def test_candidates_are_recorded_once_all_their_chunks_are_stored(self):
+        update = CollectionUpdate("resumes")
+        chunks = update.prepare(chunks_of("a", "a.md", 3) + chunks_of("b", "b.md", 1))
+        self.assertEqual(Candidate.objects.count(), 0)
+
+        # Pages are acknowledged out of order
+        update.record_stored(chunks[2:])
+        self.assertEqual(list(Candidate.objects.values_list("candidate_id", flat=True)), ["b"])
+        update.record_stored(chunks[:2])
+        self.assertEqual(Candidate.objects.get(candidate_id="a").chunks_count, 3)
+        self.assertEqual(Chunk.objects.count(), 4)
+        self.assertEqual(Collection.objects.get(name="resumes").chunks_count, 4)
+
+    def test_add_collection_reports_acknowledged_pages(self):
+        client = mock.Mock()
+        client.post.return_value.json.return_value = {"message": "ok"}
+        pages = []
+        with mock.patch("document_retriever.logic.collection.get_client", return_value=client):
+            add_collection("resumes", iter(chunks_of("a", "a.md", 5)), page_size=2, on_page=pages.append,
+                           max_workers=2)
+        self.assertEqual(sorted(len(page) for page in pages), [1, 2, 2])
+        self.assertTrue(all(isinstance(chunk, Document) for page in pages for chunk in page))
+
+
+class CollectionListPaginationTests(TestCase):
+    def setUp(self):
+        for name in ("a", "b", "c"):
+            Collection.objects.create(name=name, status=Collection.Status.READY)
+
+    def names(self, **params):
+        response = self.client.get(reverse("collections"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+        return [collection["name"] for collection in response.json()["collections"]]
+
+    def test_limit_and_offset_select_a_page(self):
+        self.assertEqual(len(self.names(limit=2)), 2)
+        self.assertEqual(len(self.names(limit=2, offset=2)), 1)
+        self.assertEqual(len(self.names(limit="many")), 3)
+
+    def test_negative_limit_returns_an_empty_page(self):
+        self.assertEqual(self.names(limit=-1), [])
+        self.assertEqual(self.names(limit=-5, offset=1), [])
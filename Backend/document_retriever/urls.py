@@ -1,6 +1,26 @@
 from django.urls import path
-from .views import ParseAndStoreCVsView
+from .views import (
+    ParseAndStoreCVsView, IngestionJobView, CollectionListView, CollectionDetailView,
+    CollectionCandidatesView, CandidateDetailView, CandidateSearchView, CollectionSyncView,
+    CollectionSweepView,
+)
 
 urlpatterns = [
     path('parse-store-cvs/', ParseAndStoreCVsView.as_view(), name='parse-store-cvs'),
+    path('jobs/<uuid:job_id>/', IngestionJobView.as_view(), name='ingestion-job'),
+    path('collections/', CollectionListView.as_view(), name='collections'),
+    path('collections/sync/', CollectionSyncView.as_view(), name='collections-sync'),
+    path('collections/sweeper/', CollectionSweepView.as_view(), name='collections-sweeper'),
+    path('collections/<str:collection_name>/', CollectionDetailView.as_view(), name='collection'),
+    path(
+        'collections/<str:collection_name>/candidates/',
+        CollectionCandidatesView.as_view(),
+        name='collection-candidates',
+    ),
+    path(
+        'collections/<str:collection_name>/candidates/<str:candidate_id>/',
+        CandidateDetailView.as_view(),
+        name='candidate',
+    ),
+    path('candidates/', CandidateSearchView.as_view(), name='candidates'),
 ]
@@ -1,15 +1,168 @@
-import os
-import shutil
-
-# Clear contents of a folder without removing the folder itself
-def clear_directory(dir):   
-    if os.path.exists(dir):
-        for filename in os.listdir(dir):
-            file_path = os.path.join(dir, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)  # Remove files or symbolic links
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)  # Remove directories
-            except Exception as e:
-                print(f"Failed to delete {file_path}. Reason: {e}")
+import struct
+import zlib
+
+LOCAL_FILE_HEADER = b"PK\x03\x04"
+DATA_DESCRIPTOR = b"PK\x07\x08"
+ZIP64_EXTRA_FIELD = 0x0001
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+STORED = 0
+DEFLATED = 8
+
+
+class _PushbackReader:
+    """
+    Wraps a binary stream so that bytes read past the end of a member can be pushed back.
+    """
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = b""
+
+    def read(self, size=-1):
+        """Read up to `size` bytes (one chunk if `size` is negative), returning b"" at the end of the stream."""
+        if self.buffer:
+            if size < 0 or size >= len(self.buffer):
+                data, self.buffer = self.buffer, b""
+            else:
+                data, self.buffer = self.buffer[:size], self.buffer[size:]
+            return data
+        return self.stream.read(self.chunk_size if size < 0 else size)
+
+    def read_exact(self, size):
+        """Read exactly `size` bytes or raise if the stream ends first."""
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                raise ValueError("Unexpected end of ZIP stream.")
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data):
+        self.buffer = data + self.buffer
+
+    def peek(self, size):
+        """Return the next `size` bytes (fewer at the end of the stream) without consuming them."""
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                break
+            parts.append(data)
+            size -= len(data)
+        data = b"".join(parts)
+        self.unread(data)
+        return data
+
+
+def _zip64_sizes(extra, compressed_size, size):
+    """
+    Read 64-bit sizes from the ZIP64 extra field when the header fields are saturated.
+
+    Returns:
+    - tuple[int, int, bool]: The compressed size, the size, and whether the member has a ZIP64
+      extra field, in which case its data descriptor (if any) holds 64-bit sizes.
+    """
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, field_length = struct.unpack("<HH", extra[offset:offset + 4])
+        field = extra[offset + 4:offset + 4 + field_length]
+        if field_id == ZIP64_EXTRA_FIELD:
+            values = list(struct.unpack(f"<{len(field) // 8}Q", field[:len(field) // 8 * 8]))
+            if size == 0xFFFFFFFF and values:
+                size = values.pop(0)
+            if compressed_size == 0xFFFFFFFF and values:
+                compressed_size = values.pop(0)
+            return compressed_size, size, True
+        offset += 4 + field_length
+    return compressed_size, size, False
+
+
+def _skip_descriptor_sizes(reader, zip64, compressed_size, size, name):
+    """
+    Read past the sizes of a data descriptor, checking them against the member's actual sizes.
+
+    ZIP64 members are announced by their extra field and have 64-bit sizes, but some writers
+    use 64-bit sizes without the extra field, so 32-bit sizes must also match and be followed
+    by the next signature to be taken as such.
+    """
+    sizes = reader.read_exact(8)
+    if not zip64 and struct.unpack("<II", sizes) == (compressed_size & 0xFFFFFFFF, size & 0xFFFFFFFF):
+        following = reader.peek(2)
+        if not following or following == b"PK":
+            return
+    sizes += reader.read_exact(8)
+    if struct.unpack("<QQ", sizes) != (compressed_size, size):
+        raise ValueError(f"Data descriptor sizes do not match ZIP member '{name}'.")
+
+
+def iter_zip_members(stream, chunk_size=64 * 1024):
+    """
+    Read a ZIP archive sequentially from a stream, yielding one member at a time.
+
+    Local file headers are parsed as they arrive, so the archive is never buffered
+    as a whole: peak memory is bounded by the largest single member. Reading stops
+    at the central directory.
+
+    Args:
+    - stream: A binary file-like object with a `read` method (e.g. `response.raw`).
+    - chunk_size (int): Number of bytes read from the stream at a time (default: 64 KiB).
+
+    Yields:
+    - tuple[str, bytes]: The member's name and its uncompressed content. Directories are skipped.
+    """
+    reader = _PushbackReader(stream, chunk_size)
+
+    while True:
+        signature = reader.read(4)
+        if signature and len(signature) < 4:
+            signature += reader.read_exact(4 - len(signature))
+        if signature != LOCAL_FILE_HEADER:
+            # Central directory (or end of stream): no more members
+            return
+
+        (_, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = struct.unpack("<HHHHHIIIHH", reader.read_exact(26))
+        name = reader.read_exact(name_length).decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        compressed_size, size, zip64 = _zip64_sizes(reader.read_exact(extra_length), compressed_size, size)
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+
+        if method == STORED:
+            if has_descriptor:
+                raise ValueError(f"Cannot stream stored member '{name}' without a known size.")
+            content = reader.read_exact(compressed_size)
+        elif method == DEFLATED:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            parts = []
+            remaining = None if has_descriptor else compressed_size
+            consumed = 0
+            while not decompressor.eof:
+                data = reader.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not data:
+                    raise ValueError(f"Unexpected end of ZIP stream in member '{name}'.")
+                if remaining is not None:
+                    remaining -= len(data)
+                consumed += len(data)
+                parts.append(decompressor.decompress(data))
+            parts.append(decompressor.flush())
+            reader.unread(decompressor.unused_data)
+            compressed_size = consumed - len(decompressor.unused_data)
+            content = b"".join(parts)
+        else:
+            raise ValueError(f"Unsupported compression method {method} for member '{name}'.")
+
+        if has_descriptor:
+            descriptor = reader.read_exact(4)
+            if descriptor == DATA_DESCRIPTOR:
+                descriptor = reader.read_exact(4)
+            crc = struct.unpack("<I", descriptor)[0]
+            _skip_descriptor_sizes(reader, zip64, compressed_size, len(content), name)
+
+        if zlib.crc32(content) != crc:
+            raise ValueError(f"CRC mismatch for ZIP member '{name}'.")
+
+        if not name.endswith("/"):
+            yield name, content
@@ -1,113 +1,78 @@
-import requests
-import zipfile
-import os
-import io
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .logic.doc_splitter import DocumentSplitter
-from .logic.collection import add_collection
-import re
+from django.conf import settings
+from django.db.models import Count
+from django.shortcuts import get_object_or_404
 import uuid
-from .utils import clear_directory
+from .catalog import remove_candidates, sync_with_milvus
+from .jobs import submit_ingestion_job
+from .logic.collection import delete_candidates
+from .models import Candidate, Collection, IngestionJob
+from .sweeper import idle_collections, sweep_collections, sweep_stats
+from .serializers import CandidateSerializer, ChunkSerializer, CollectionSerializer, IngestionJobSerializer
 
 
-class ParseAndStoreCVsView(APIView):
+def paginate(queryset, request, default_limit=100, max_limit=1000):
     """
-    API View to act as a bridge between the frontend and the cloud parser.
+    Slice a queryset with the `limit` and `offset` query parameters.
+
+    Returns:
+    - tuple[QuerySet, int]: The requested page and the total count.
     """
+    try:
+        limit = max(min(int(request.query_params.get("limit", default_limit)), max_limit), 0)
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+    except ValueError:
+        limit, offset = default_limit, 0
+    return queryset[offset:offset + limit], queryset.count()
 
-    OUTPUT_DIR = "output_docs"  # Directory to save extracted files
-    splitter = DocumentSplitter()
 
-    def sanitize_file_name(self, file_name):
-        """
-        Sanitize the file name to remove invalid characters for Windows file systems.
-        """
-        sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', file_name)
-        return sanitized_name
+class ParseAndStoreCVsView(APIView):
+    """
+    API View to act as a bridge between the frontend and the cloud parser.
+    """
 
     def post(self, request):
         """
-        Handle batch upload of PDFs, forward to the cloud parser, and save the results locally.
+        Handle batch upload of PDFs and queue a background job that parses them and stores
+        the resumes in a new collection, or adds them to an existing one.
+
+        An optional `collection_name` selects the collection to add to, and `mode` how:
+        "upsert" (default) also replaces older versions of the uploaded files, "append" only
+        adds. Resumes the collection already stores are not embedded again.
 
         Returns:
-        - JSON response with the parsing status and the collection name.
+        - JSON response with the job ID to poll and the collection name.
         """
         if 'files' not in request.FILES:
             return Response({"error": "No files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
         files = request.FILES.getlist('files')  # Get all uploaded files
-
-        try:
-            # Forward the files to the cloud parser
-            files_to_upload = [
-                ('files', (file.name, file.read(), 'application/pdf')) for file in files
-            ]
-            response = requests.post(
-                f"{os.getenv('LIGHTNING_SERVER_URL')}/parse-pdfs", files=files_to_upload, stream=True
-            )
-
-            # If cloud parser returns a ZIP file
-            if response.status_code == 200:
-                # Ensure output directory exists
-                os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-
-                # Extract the ZIP file content while preserving folder structure
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    for file_name in z.namelist():
-                        # Process only Markdown files
-                        if not file_name.endswith(".md"):
-                            continue
-
-                        # Sanitize file paths
-                        sanitized_file_name = self.sanitize_file_name(file_name)
-
-                        # Determine the full output path
-                        output_file_path = os.path.join(self.OUTPUT_DIR, sanitized_file_name)
-
-                        # Ensure subdirectories exist
-                        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-
-                        # Save non-empty files
-                        with z.open(file_name) as f:
-                            file_content = f.read()
-                            if not file_content.strip():
-                                continue
-
-                            # Write the file to the appropriate path
-                            with open(output_file_path, "wb") as output_file:
-                                output_file.write(file_content)
-
-                # Split documents and create a new collection
-                splitter = DocumentSplitter()
-                docs = splitter.load_documents(self.OUTPUT_DIR)
-                print("these are the docs: ", docs)
-                chunks = splitter.split_documents(docs)
-                collection_name = f"collection_{uuid.uuid4().hex}"
-                add_collection(collection_name=collection_name, documents=chunks)
-
-                # Return the collection name
+        collection_name = request.data.get('collection_name')
+        if collection_name:
+            mode = request.data.get('mode', IngestionJob.Mode.UPSERT)
+            if mode not in (IngestionJob.Mode.APPEND, IngestionJob.Mode.UPSERT):
                 return Response(
-                    {
-                        "results": "CVs parsed and stored successfully",
-                        "collection_name": collection_name
-                    },
-                    status=status.HTTP_200_OK
+                    {"error": "mode must be 'append' or 'upsert'."}, status=status.HTTP_400_BAD_REQUEST
                 )
+        else:
+            collection_name = f"collection_{uuid.uuid4().hex}"
+            mode = IngestionJob.Mode.CREATE
 
-            else:
-                return Response(
-                    {
-                        "error": f"Cloud parser returned an error. Status code: {response.status_code}",
-                        "details": response.text,
-                    },
-                    status=response.status_code,
-                )
+        try:
+            # Read the uploads now, they are closed once the response is returned
+            files_to_parse = [(file.name, file.read()) for file in files]
+            job = submit_ingestion_job(files_to_parse, collection_name, mode)
 
-        except requests.exceptions.RequestException as e:
             return Response(
-                {"error": f"Request to cloud parser failed: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {
+                    "job_id": str(job.id),
+                    "status": job.status,
+                    "mode": job.mode,
+                    "collection_name": collection_name
+                },
+                status=status.HTTP_202_ACCEPTED
             )
 
         except Exception as e:
@@ -115,5 +80,216 @@ class ParseAndStoreCVsView(APIView):
                 {"error": f"An unexpected error occurred: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        finally:
-            clear_directory(self.OUTPUT_DIR)
+
+class IngestionJobView(APIView):
+    """
+    API View to poll the status and per-stage progress of an ingestion job.
+    """
+
+    def get(self, request, job_id):
+        """
+        Return the job's status and progress counters.
+
+        Returns:
+        - JSON response with the serialized job.
+        """
+        job = get_object_or_404(IngestionJob, pk=job_id)
+        return Response(IngestionJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class CollectionListView(APIView):
+    """
+    API View listing the collections known to the local catalog.
+    """
+
+    def get(self, request):
+        """
+        Return the collections, newest first, optionally filtered by `status`.
+
+        Returns:
+        - JSON response with the total count and a page of collections.
+        """
+        collections = Collection.objects.all()
+        if request.query_params.get("status"):
+            collections = collections.filter(status=request.query_params["status"])
+        page, count = paginate(collections, request)
+        return Response(
+            {"count": count, "collections": CollectionSerializer(page, many=True).data}, status=status.HTTP_200_OK
+        )
+
+
+class CollectionDetailView(APIView):
+    """
+    API View returning a collection's statistics, or pinning it so the sweeper keeps it.
+    """
+
+    def get(self, request, collection_name):
+        """
+        Return the collection with its number of chunks per resume section.
+
+        Returns:
+        - JSON response with the serialized collection and a "sections" breakdown.
+        """
+        collection = get_object_or_404(Collection, name=collection_name)
+        sections = collection.chunks.values("section").annotate(chunks=Count("id")).order_by("-chunks")
+        return Response(
+            {
+                **CollectionSerializer(collection).data,
+                "sections": {row["section"] or "unknown": row["chunks"] for row in sections},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def patch(self, request, collection_name):
+        """
+        Update the `pinned` flag of a collection. Pinned collections are never released or dropped when idle.
+        """
+        collection = get_object_or_404(Collection, name=collection_name)
+        pinned = request.data.get("pinned")
+        if not isinstance(pinned, bool):
+            return Response({"error": "'pinned' must be true or false."}, status=status.HTTP_400_BAD_REQUEST)
+
+        Collection.objects.filter(pk=collection.pk).update(pinned=pinned)
+        collection.refresh_from_db()
+        return Response(CollectionSerializer(collection).data, status=status.HTTP_200_OK)
+
+
+class CollectionSweepView(APIView):
+    """
+    API View exposing the idle collection sweeper's settings and metrics, and running a sweep on demand.
+    """
+
+    def get(self, request):
+        """
+        Return the sweeper's settings, its totals since the server started, and the collections it would reclaim now.
+        """
+        idle = None
+        if settings.COLLECTION_TTL > 0:
+            idle = idle_collections(settings.COLLECTION_TTL, settings.COLLECTION_SWEEP_ACTION).count()
+        return Response(
+            {
+                "ttl_seconds": settings.COLLECTION_TTL,
+                "action": settings.COLLECTION_SWEEP_ACTION,
+                "interval_seconds": settings.COLLECTION_SWEEP_INTERVAL,
+                "idle": idle,
+                "pinned": Collection.objects.filter(pinned=True).count(),
+                "statuses": dict(Collection.objects.values_list("status").annotate(count=Count("id"))),
+                **sweep_stats.snapshot(),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def post(self, request):
+        """
+        Run a sweep now, with the configured action or the `action` given in the request.
+        """
+        try:
+            return Response(sweep_collections(action=request.data.get("action")), status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CollectionCandidatesView(APIView):
+    """
+    API View listing the candidates of a collection.
+    """
+
+    def get(self, request, collection_name):
+        """
+        Return the collection's candidates, optionally filtered by a `name` substring.
+
+        Returns:
+        - JSON response with the total count and a page of candidates.
+        """
+        collection = get_object_or_404(Collection, name=collection_name)
+        candidates = collection.candidates.select_related("collection")
+        if request.query_params.get("name"):
+            candidates = candidates.filter(name__icontains=request.query_params["name"])
+        page, count = paginate(candidates, request)
+        return Response(
+            {"count": count, "candidates": CandidateSerializer(page, many=True).data}, status=status.HTTP_200_OK
+        )
+
+
+class CandidateDetailView(APIView):
+    """
+    API View returning a candidate and the metadata of their chunks, or deleting the candidate.
+    """
+
+    def get(self, request, collection_name, candidate_id):
+        candidate = get_object_or_404(
+            Candidate.objects.select_related("collection"),
+            collection__name=collection_name,
+            candidate_id=candidate_id,
+        )
+        return Response(
+            {
+                **CandidateSerializer(candidate).data,
+                "chunks": ChunkSerializer(candidate.chunks.all(), many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def delete(self, request, collection_name, candidate_id):
+        """
+        Delete a candidate's chunks from Milvus and the candidate from the catalog.
+
+        Returns:
+        - JSON response with the number of chunks deleted from Milvus.
+        """
+        collection = get_object_or_404(Collection, name=collection_name)
+        try:
+            deleted_chunks = delete_candidates(collection_name, [candidate_id])
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        removed = remove_candidates(collection, [candidate_id])
+        if not removed and not deleted_chunks:
+            return Response({"error": "Candidate not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {"candidate_id": candidate_id, "deleted_chunks": deleted_chunks}, status=status.HTTP_200_OK
+        )
+
+
+class CandidateSearchView(APIView):
+    """
+    API View finding which collections a candidate is in.
+    """
+
+    def get(self, request):
+        """
+        Return the candidates matching a `name` substring or a `candidate_id`, across all collections.
+
+        Returns:
+        - JSON response with the total count and a page of candidates with their collection.
+        """
+        name = request.query_params.get("name")
+        candidate_id = request.query_params.get("candidate_id")
+        if not name and not candidate_id:
+            return Response(
+                {"error": "Either 'name' or 'candidate_id' is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        candidates = Candidate.objects.select_related("collection").order_by("name", "-created_at")
+        if candidate_id:
+            candidates = candidates.filter(candidate_id=candidate_id)
+        if name:
+            candidates = candidates.filter(name__icontains=name)
+        page, count = paginate(candidates, request)
+        return Response(
+            {"count": count, "candidates": CandidateSerializer(page, many=True).data}, status=status.HTTP_200_OK
+        )
+
+
+class CollectionSyncView(APIView):
+    """
+    API View reconciling the local catalog with the collections stored in Milvus.
+    """
+
+    def post(self, request):
+        try:
+            return Response(sync_with_milvus(), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {"error": f"Failed to list the Milvus collections: {e}"}, status=status.HTTP_502_BAD_GATEWAY
+            )
@@ -1,3 +1,4 @@
+import json
 import requests
 
 class ChatbotAPIClient:
@@ -14,13 +15,14 @@ class ChatbotAPIClient:
         self.api_base_url = api_base_url
         self.headers = headers or {}
 
-    def send_message(self, collection_name, message):
+    def send_message(self, collection_name, message, session_id=None):
         """
         Send a message to the chatbot and receive a response.
 
         Args:
         - collection_name (str): The collection name for the chatbot retriever.
         - message (str): The user's message.
+        - session_id (str): Optional ID of the chat session, keeping its conversation history apart.
 
         Returns:
         - dict: A dictionary with the API response or an error message.
@@ -30,6 +32,8 @@ class ChatbotAPIClient:
             "collection_name": collection_name,
             "message": message
         }
+        if session_id:
+            payload["session_id"] = session_id
         try:
             response = requests.post(endpoint, json=payload, headers=self.headers)
             if response.status_code == 200:
@@ -44,3 +48,50 @@ class ChatbotAPIClient:
             return {"success": False, "error": f"Request failed: {e}"}
         except Exception as e:
             return {"success": False, "error": f"An unexpected error occurred: {e}"}
+
+    def stream_message(self, collection_name, message, session_id=None):
+        """
+        Send a message to the chatbot and receive the response as it is generated.
+
+        Args:
+        - collection_name (str): The collection name for the chatbot retriever.
+        - message (str): The user's message.
+        - session_id (str): Optional ID of the chat session, keeping its conversation history apart.
+
+        Yields:
+        - dict: Events with an "event" key: "token" events carry a "token" piece of the response,
+          the stream ends with a "done" event carrying the full "response", or an "error" event.
+        """
+        endpoint = f"{self.api_base_url}/send-message/stream/"
+        payload = {
+            "collection_name": collection_name,
+            "message": message
+        }
+        if session_id:
+            payload["session_id"] = session_id
+        try:
+            with requests.post(endpoint, json=payload, headers=self.headers, stream=True) as response:
+                if response.status_code != 200:
+                    yield {
+                        "event": "error",
+                        "error": f"API returned an error. Status code: {response.status_code}",
+                        "details": response.text,
+                    }
+                    return
+
+                # Parse the server-sent events line by line
+                event = "token"
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield {"event": event, **json.loads(line[len("data:"):])}
+                        if event in ("done", "error"):
+                            return
+                        event = "token"
+
+            yield {"event": "error", "error": "The stream ended before the response was complete."}
+        except requests.exceptions.RequestException as e:
+            yield {"event": "error", "error": f"Request failed: {e}"}
+        except Exception as e:
+            yield {"event": "error", "error": f"An unexpected error occurred: {e}"}
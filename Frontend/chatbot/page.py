@@ -1,7 +1,38 @@
 import streamlit as st
 from chatbot.api import ChatbotAPIClient
+import time
+import uuid
 import os
 
+
+def render_message(role, message):
+    """
+    Render a chat message with the user or bot styling.
+
+    Args:
+    - role (str): "user" or "bot".
+    - message (str): The message text.
+
+    Returns:
+    - str: The message HTML.
+    """
+    icon = "🧑" if role == "user" else "🤖"
+    return f"""
+                    <div class="chat-message {role}">
+                        <div class="icon">{icon}</div>
+                        <div class="message">{message}</div>
+                    </div>
+                    """
+
+
+def render_timing(chat):
+    """
+    Show how long the assistant took to start and to finish answering.
+    """
+    if "ttft" in chat:
+        st.caption(f"First token after {chat['ttft']:.2f}s, complete after {chat['total']:.2f}s")
+
+
 def chatbot_page():
     st.header("💬 Chat with Your Assistant")
 
@@ -11,6 +42,10 @@ def chatbot_page():
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
 
+    # Identify this browser session, so the server keeps its conversation history apart from other users'
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
     # Custom CSS for styling messages
     st.markdown(
         """
@@ -59,47 +94,71 @@ def chatbot_page():
     chat_placeholder = st.container()
     with chat_placeholder:
         for chat in st.session_state.chat_history:
-            if chat["role"] == "user":
-                st.markdown(
-                    f"""
-                    <div class="chat-message user">
-                        <div class="icon">🧑</div>
-                        <div class="message">{chat['message']}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-            else:
-                st.markdown(
-                    f"""
-                    <div class="chat-message bot">
-                        <div class="icon">🤖</div>
-                        <div class="message">{chat['message']}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
+            st.markdown(render_message(chat["role"], chat["message"]), unsafe_allow_html=True)
+            render_timing(chat)
 
     # Input form for new messages
+    streaming = st.toggle(
+        "Stream responses",
+        value=os.getenv("CHAT_STREAMING", "true").lower() in ("1", "true", "yes"),
+    )
     user_input = st.text_input("Your message:")
     if st.button("Send"):
         if user_input.strip():
             # Add user's message to chat history
             st.session_state.chat_history.append({"role": "user", "message": user_input})
 
-            # Send message to the chatbot API
-            with st.spinner("Assistant is typing..."):
-                collection_name = st.session_state.collection_name
-                response = api_client.send_message(collection_name, user_input)
-                print(response)
+            collection_name = st.session_state.collection_name
+            started = time.perf_counter()
 
-                if response["success"]:
-                    bot_response = response["response"]["response"]
-                    st.session_state.chat_history.append({"role": "bot", "message": bot_response})
+            if streaming:
+                # Render the answer token by token as it is generated
+                st.markdown(render_message("user", user_input), unsafe_allow_html=True)
+                bot_placeholder = st.empty()
+                bot_placeholder.markdown(render_message("bot", "Assistant is typing..."), unsafe_allow_html=True)
+
+                bot_response = ""
+                ttft = None
+                for event in api_client.stream_message(collection_name, user_input, st.session_state.session_id):
+                    if event["event"] == "token":
+                        ttft = ttft if ttft is not None else time.perf_counter() - started
+                        bot_response += event["token"]
+                        bot_placeholder.markdown(render_message("bot", bot_response), unsafe_allow_html=True)
+                    elif event["event"] == "done":
+                        bot_response = event["response"]
+                    else:
+                        bot_response = None
+                        st.error("Error communicating with the chatbot.")
+                        st.text(event.get("details") or event.get("error"))
+
+                if bot_response is not None:
+                    total = time.perf_counter() - started
+                    st.session_state.chat_history.append({
+                        "role": "bot",
+                        "message": bot_response,
+                        "ttft": ttft if ttft is not None else total,
+                        "total": total,
+                    })
                 else:
-                    st.error("Error communicating with the chatbot.")
-                    if "details" in response:
-                        st.text(response["details"])
+                    # Keep the error visible instead of rerunning
+                    st.stop()
+            else:
+                # Send message to the chatbot API
+                with st.spinner("Assistant is typing..."):
+                    response = api_client.send_message(collection_name, user_input, st.session_state.session_id)
+                    print(response)
+
+                    if response["success"]:
+                        bot_response = response["response"]["response"]
+                        # Without streaming the first token arrives with the whole answer
+                        total = time.perf_counter() - started
+                        st.session_state.chat_history.append(
+                            {"role": "bot", "message": bot_response, "ttft": total, "total": total}
+                        )
+                    else:
+                        st.error("Error communicating with the chatbot.")
+                        if "details" in response:
+                            st.text(response["details"])
 
             # Clear the input box
             st.rerun()
@@ -107,4 +166,6 @@ def chatbot_page():
     # Clear chat history
     if st.button("Clear Chat"):
         st.session_state.chat_history = []
+        # Start a new conversation on the server too, the previous one expires
+        st.session_state.session_id = uuid.uuid4().hex
         st.rerun()
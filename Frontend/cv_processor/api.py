@@ -15,12 +15,14 @@ class APIClient:
         self.api_base_url = api_base_url
         self.headers = headers or {}
 
-    def upload_pdfs(self, files):
+    def upload_pdfs(self, files, collection_name=None):
         """
         Upload multiple PDF files to the local Django REST API.
 
         Args:
         - files: List of Streamlit UploadedFile objects.
+        - collection_name (str): Optional existing collection to add the resumes to, replacing
+          older versions of the same files (default: a new collection).
 
         Returns:
         - dict: A dictionary with the API response or an error message.
@@ -31,7 +33,35 @@ class APIClient:
             files_to_upload = [
                 ('files', (file.name, file, 'application/pdf')) for file in files
             ]
-            response = requests.post(endpoint, files=files_to_upload, headers=self.headers)
+            data = {"collection_name": collection_name, "mode": "upsert"} if collection_name else None
+            response = requests.post(endpoint, files=files_to_upload, data=data, headers=self.headers)
+
+            if response.status_code in (200, 202):
+                return {"success": True, "data": response.json()}
+            else:
+                return {
+                    "success": False,
+                    "error": f"API returned an error. Status code: {response.status_code}",
+                    "details": response.text,
+                }
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": f"Request failed: {e}"}
+        except Exception as e:
+            return {"success": False, "error": f"An unexpected error occurred: {e}"}
+
+    def get_job(self, job_id):
+        """
+        Fetch the status and progress of an ingestion job.
+
+        Args:
+        - job_id (str): The job ID returned by `upload_pdfs`.
+
+        Returns:
+        - dict: A dictionary with the API response or an error message.
+        """
+        endpoint = f"{self.api_base_url}/jobs/{job_id}/"
+        try:
+            response = requests.get(endpoint, headers=self.headers)
 
             if response.status_code == 200:
                 return {"success": True, "data": response.json()}
@@ -44,4 +74,4 @@ class APIClient:
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Request failed: {e}"}
         except Exception as e:
-            return {"success": False, "error": f"An unexpected error occurred: {e}"}
\ No newline at end of file
+            return {"success": False, "error": f"An unexpected error occurred: {e}"}
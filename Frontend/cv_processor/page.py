@@ -1,6 +1,30 @@
 import streamlit as st
 from cv_processor.api import APIClient
 import os
+import time
+
+POLL_INTERVAL = 1  # Seconds between job status requests
+
+STAGE_LABELS = {
+    "queued": "Waiting for a worker...",
+    "parsing": "Parsing resumes...",
+    "extracting_names": "Extracting candidate names...",
+    "embedding": "Embedding and storing chunks...",
+    "done": "Done.",
+}
+
+
+def job_progress(job):
+    """
+    Compute the overall progress of an ingestion job from its per-stage counters.
+
+    Parsing, name extraction and embedding each account for a third of the bar.
+    """
+    parsed = job["files_parsed"] / job["files_total"] if job["files_total"] else 0
+    named = job["names_extracted"] / job["files_parsed"] if job["files_parsed"] else 0
+    embedded = job["chunks_embedded"] / job["chunks_total"] if job["chunks_total"] else 0
+    return min((parsed + named + embedded) / 3, 1.0)
+
 
 def cv_processor_page():
     st.header("📂 Upload Resumes")
@@ -16,18 +40,54 @@ def cv_processor_page():
     if uploaded_files:
         st.info(f"{len(uploaded_files)} file(s) selected for upload.")
 
+        # Adding to the current collection only embeds the new or changed resumes
+        add_to_current = False
+        if st.session_state.get("collection_name"):
+            add_to_current = st.checkbox(
+                "Add to the current collection",
+                help="Resumes already in the collection are skipped, and new versions of the same files replace the old ones.",
+            )
+
         if st.button("Upload Resumes", use_container_width=True):
-            with st.spinner("Uploading and processing files..."):
-                API_BASE_URL = f"{os.getenv('BACKEND_URL')}/retriever"
-                api_client = APIClient(api_base_url=API_BASE_URL)
+            API_BASE_URL = f"{os.getenv('BACKEND_URL')}/retriever"
+            api_client = APIClient(api_base_url=API_BASE_URL)
 
-                response = api_client.upload_pdfs(uploaded_files)
+            with st.spinner("Uploading files..."):
+                response = api_client.upload_pdfs(
+                    uploaded_files, collection_name=st.session_state.collection_name if add_to_current else None
+                )
 
-            if response["success"]:
-                st.session_state.files_parsed = True
-                st.session_state.collection_name = response["data"]["collection_name"]  # Store collection name
-                st.success("Files processed successfully. You can now chat with the assistant.")
-            else:
+            if not response["success"]:
                 st.error(response["error"])
                 if "details" in response:
                     st.text(response["details"])
+                return
+
+            # Poll the ingestion job until it finishes
+            job_id = response["data"]["job_id"]
+            progress_bar = st.progress(0.0, text=STAGE_LABELS["queued"])
+            while True:
+                response = api_client.get_job(job_id)
+                if not response["success"]:
+                    st.error(response["error"])
+                    if "details" in response:
+                        st.text(response["details"])
+                    return
+
+                job = response["data"]
+                if job["status"] == "failed":
+                    progress_bar.empty()
+                    st.error(f"Processing failed: {job['error']}")
+                    return
+                if job["status"] == "succeeded":
+                    progress_bar.progress(1.0, text=STAGE_LABELS["done"])
+                    break
+
+                progress_bar.progress(job_progress(job), text=STAGE_LABELS.get(job["stage"], job["stage"]))
+                time.sleep(POLL_INTERVAL)
+
+            st.session_state.files_parsed = True
+            st.session_state.collection_name = job["collection_name"]  # Store collection name
+            st.success("Files processed successfully. You can now chat with the assistant.")
+            if job.get("resumes_unchanged"):
+                st.info(f"{job['resumes_unchanged']} resume(s) were already in the collection and were skipped.")
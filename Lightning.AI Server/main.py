@@ -1,14 +1,18 @@
 import os
+import json
+import time
 import shutil
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from langchain.schema import Document
 from offline_app.embedding import StellaEmbedding
-from offline_app.vectordb import RetrieverManager
-from offline_app.parser import parse_pdf
+from offline_app.parser import parse_pdf, get_parser_version
+from offline_app.transport import PageTracker, decode_page
 from online_app.model import ModelManager
-from online_app.chatbot import Chatbot
-from langchain.memory import ConversationBufferWindowMemory
+from online_app.chatbot import Chatbot, ERROR_RESPONSE
+from online_app.response_cache import ResponseCache
+from online_app.memory import SessionMemoryStore
+from online_app.scheduler import GenerationScheduler
 from langchain.retrievers.document_compressors.listwise_rerank import LLMListwiseRerank
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain_openai import ChatOpenAI
@@ -28,17 +32,55 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 stella_embedding_model = StellaEmbedding()
 
-retriever_manager = RetrieverManager(
-    uri=os.getenv("MILVUS-URI"), 
-    token=os.getenv("MILVUS-TOKEN"), 
-    embedding_model=stella_embedding_model
-)
-
-retriever_manager.get_all_retrievers()
+# "milvus" stores collections in a Milvus instance, "local" in memory-mapped files under LOCAL-VECTOR-STORE-PATH
+if os.getenv("VECTOR-STORE", "milvus") == "local":
+    from offline_app.local_vectordb import LocalRetrieverManager
+
+    retriever_manager = LocalRetrieverManager(
+        path=os.getenv("LOCAL-VECTOR-STORE-PATH", os.path.join(BASE_DIR, 'vector_store')),
+        embedding_model=stella_embedding_model,
+        max_collections=int(os.getenv("MILVUS-MAX-RETRIEVERS", 32)),
+        # Collections from this size on are searched through an IVF index instead of an exact scan
+        ivf_min_rows=int(os.getenv("LOCAL-VECTOR-STORE-IVF-MIN-ROWS", 20000)),
+        nprobe=int(os.getenv("LOCAL-VECTOR-STORE-NPROBE", 8)),
+    )
+else:
+    from offline_app.vectordb import RetrieverManager
+
+    retriever_manager = RetrieverManager(
+        uri=os.getenv("MILVUS-URI"), 
+        token=os.getenv("MILVUS-TOKEN"), 
+        embedding_model=stella_embedding_model,
+        # "partitioned" keeps every upload in one shared Milvus collection instead of one collection each
+        storage_mode=os.getenv("MILVUS-STORAGE-MODE", "collections"),
+        shared_collection=os.getenv("MILVUS-SHARED-COLLECTION", "resumes"),
+        # Collections with a live retriever, the least recently used ones are released from Milvus memory
+        max_retrievers=int(os.getenv("MILVUS-MAX-RETRIEVERS", 32)),
+    )
+
+# "hybrid" adds a BM25 index next to each collection and fuses its results with the dense search
+if os.getenv("RETRIEVAL-MODE", "hybrid") == "hybrid":
+    from offline_app.hybrid import HybridRetrieverManager
+
+    retriever_manager = HybridRetrieverManager(
+        retriever_manager,
+        path=os.getenv("LEXICAL-INDEX-PATH", os.path.join(BASE_DIR, 'lexical_index')),
+        top_k=int(os.getenv("HYBRID-TOP-K", 4)),
+        depth=int(os.getenv("HYBRID-DEPTH", 20)),
+        max_indexes=int(os.getenv("MILVUS-MAX-RETRIEVERS", 32)),
+    )
 
 model_manager = ModelManager(model_id="meta-llama/Llama-3.2-3B-Instruct")
 model_manager.load_model()
-pipeline = model_manager.get_pipeline(max_new_tokens=1024)
+
+# Generates the completions of concurrent requests together, in batches of up to
+# GENERATION-MAX-BATCH-SIZE prompts gathered for at most GENERATION-MAX-WAIT-MS
+scheduler = GenerationScheduler(
+    model_manager,
+    max_batch_size=int(os.getenv("GENERATION-MAX-BATCH-SIZE", 8)),
+    max_wait=float(os.getenv("GENERATION-MAX-WAIT-MS", 20)) / 1000,
+    max_new_tokens=1024,
+)
 
 prompt_template = [
 {"role": "system", "content": '''You are an intelligent talent acquisition assistant chatbot. 
@@ -55,13 +97,98 @@ Recruiter's Question:
 formatted_prompt_template = model_manager.get_prompt(prompt_template)
 print(formatted_prompt_template)
 
-memory = ConversationBufferWindowMemory(k=10)
+def count_tokens(text):
+    """
+    Count the tokens of a text with the model's tokenizer.
+    """
+    return len(model_manager.tokenizer.encode(text, add_special_tokens=False))
+
 
-chatbot = Chatbot(memory, formatted_prompt_template, pipeline)
+# Conversation histories per chat session and collection, trimmed to a token budget
+memory_store = SessionMemoryStore(
+    token_counter=count_tokens,
+    max_history_tokens=int(os.getenv("MEMORY-MAX-TOKENS", 1024)),
+    ttl=float(os.getenv("MEMORY-TTL", 86400)),
+    max_sessions=int(os.getenv("MEMORY-MAX-SESSIONS", 1000)),
+    # Optional SQLite database keeping the histories across restarts
+    sqlite_path=os.getenv("MEMORY-SQLITE-PATH"),
+)
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-_filter = LLMListwiseRerank.from_llm(llm, top_n=6)
 
+def build_chatbot(memory, retriever):
+    """
+    Create the chatbot of one request, so that concurrent requests never share a retriever or a memory.
+
+    Args:
+        memory: The memory of the request's conversation.
+        retriever: The retriever of the request's collection.
+
+    Returns:
+        Chatbot: A chatbot generating through the shared scheduler.
+    """
+    return Chatbot(
+        memory, formatted_prompt_template, scheduler, retriever=retriever, streamer=scheduler.stream,
+        # Retrieved chunks are merged per candidate and cut to this many prompt tokens
+        token_counter=count_tokens, max_context_tokens=int(os.getenv("CONTEXT-MAX-TOKENS", 2048)),
+    )
+
+
+# Responses to repeated questions, per collection (RESPONSE-CACHE-TTL=0 disables the cache). Similar
+# questions also hit if RESPONSE-CACHE-SIMILARITY is set (e.g. 0.95), at the cost of embedding each question.
+response_cache_ttl = float(os.getenv("RESPONSE-CACHE-TTL", 3600))
+response_cache_similarity = os.getenv("RESPONSE-CACHE-SIMILARITY")
+response_cache = ResponseCache(
+    ttl=response_cache_ttl,
+    max_entries=int(os.getenv("RESPONSE-CACHE-MAX-ENTRIES", 1024)),
+    embedding_model=stella_embedding_model if response_cache_similarity else None,
+    similarity_threshold=float(response_cache_similarity or 1),
+) if response_cache_ttl > 0 else None
+
+
+def invalidate_responses(collection_name):
+    """
+    Drop the cached responses of a collection whose documents changed.
+    """
+    if response_cache is not None:
+        response_cache.invalidate(collection_name)
+
+# "cross-encoder" reranks retrieved chunks locally, "llm" with gpt-4o-mini, "none" keeps the retriever's order
+RERANKER = os.getenv("RERANKER", "cross-encoder")
+if RERANKER == "cross-encoder":
+    from online_app.reranker import LocalReranker, load_cross_encoder
+
+    threshold = os.getenv("RERANKER-SCORE-THRESHOLD")
+    _filter = LocalReranker(
+        model=load_cross_encoder(os.getenv("RERANKER-MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")),
+        top_n=6,
+        # Drops chunks scoring below the threshold, even when fewer than top_n remain
+        score_threshold=float(threshold) if threshold else None,
+    )
+elif RERANKER == "llm":
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    _filter = LLMListwiseRerank.from_llm(llm, top_n=6)
+else:
+    _filter = None
+
+
+def rerank(retriever):
+    """
+    Wrap a retriever with the configured reranker, if any.
+    """
+    if _filter is None:
+        return retriever
+    return ContextualCompressionRetriever(base_compressor=_filter, base_retriever=retriever)
+
+page_tracker = PageTracker()
+
+
+
+@app.route('/parser-version', methods=['GET'])
+def parser_version():
+    """
+    Flask endpoint returning the parser version, so clients can invalidate cached parsing results before serving them.
+    """
+    return jsonify({"version": get_parser_version()})
 
 
 @app.route('/parse-pdfs', methods=['POST'])
@@ -96,8 +223,10 @@ def parse_pdfs():
         output_zip_path = os.path.join(MEDIA_ROOT, "output_docs.zip")
         shutil.make_archive(output_zip_path.replace(".zip", ""), 'zip', output_folder)
 
-        # Return the ZIP file as a response
-        return send_file(output_zip_path, as_attachment=True)
+        # Return the ZIP file as a response, tagged with the parser version
+        response = send_file(output_zip_path, as_attachment=True)
+        response.headers["X-Parser-Version"] = get_parser_version()
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -121,25 +250,200 @@ def add_collection():
 
         collection_name = data.get('collection_name')
         documents_data = data.get('documents', [])
+        # "create" a new collection, "append" to an existing one, or "upsert" candidates into it
+        mode = data.get('mode', 'create')
 
         if not collection_name or not documents_data:
             return jsonify({"error": "collection_name and documents are required"}), 400
+        if mode not in ('create', 'append', 'upsert'):
+            return jsonify({"error": "mode must be one of 'create', 'append' or 'upsert'"}), 400
 
         # Convert documents data to Document objects
         documents = [Document(**doc) for doc in documents_data]
 
-        retriever_manager.add_collection(collection_name, documents)
+        if mode == 'create':
+            retriever_manager.add_collection(collection_name, documents)
+        elif mode == 'append':
+            retriever_manager.add_documents(collection_name, documents)
+            retriever_manager.flush(collection_name)
+        else:
+            retriever_manager.upsert_documents(collection_name, documents)
+            retriever_manager.flush(collection_name)
+        invalidate_responses(collection_name)
+
+        return jsonify({"message": f"Collection '{collection_name}' added successfully"}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        retriever_manager.get_all_retrievers()
+@app.route('/add-collection/pages', methods=['POST'])
+def add_collection_page():
+    """
+    Flask endpoint to embed and insert one page of a paged collection upload.
 
-        # Clear LangChain memory after creating a new collection
-        memory.clear()
+    Query parameters identify the collection, the upload and the page index. The body is a
+    JSON or msgpack list of documents, optionally gzip or zstd compressed. A page that was
+    already stored is acknowledged without being inserted again, so pages can be retried.
+    """
+    try:
+        collection_name = request.args.get('collection_name')
+        upload_id = request.args.get('upload_id')
+        page = request.args.get('page', type=int)
+
+        if not collection_name or not upload_id or page is None:
+            return jsonify({"error": "collection_name, upload_id and page are required"}), 400
+
+        documents_data = decode_page(
+            request.get_data(), request.content_type, request.headers.get('Content-Encoding')
+        )
+
+        state = page_tracker.begin(upload_id, page)
+        if state == "stored":
+            return jsonify({"message": f"Page {page} already stored"}), 200
+        if state == "in_progress":
+            return jsonify({"error": f"Page {page} is being stored by another request"}), 409
+
+        stored = False
+        try:
+            documents = [Document(**doc) for doc in documents_data]
+            retriever_manager.add_documents(collection_name, documents)
+            stored = True
+            invalidate_responses(collection_name)
+        finally:
+            page_tracker.complete(upload_id, page, stored)
+
+        return jsonify({"message": f"Page {page} stored", "documents": len(documents)}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/add-collection/finalize', methods=['POST'])
+def finalize_collection():
+    """
+    Flask endpoint to commit a paged collection upload once all of its pages are stored.
+    """
+    try:
+        data = request.get_json()
+
+        collection_name = data.get('collection_name')
+        upload_id = data.get('upload_id')
+        pages = data.get('pages')
+
+        if not collection_name or not upload_id or pages is None:
+            return jsonify({"error": "collection_name, upload_id and pages are required"}), 400
+
+        missing = page_tracker.missing(upload_id, pages)
+        if missing:
+            return jsonify({"error": "Some pages have not been stored", "missing_pages": missing}), 409
+
+        retriever_manager.flush(collection_name)
+        page_tracker.finish(upload_id)
+        invalidate_responses(collection_name)
 
         return jsonify({"message": f"Collection '{collection_name}' added successfully"}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/add-collection/candidates', methods=['POST'])
+def find_candidates():
+    """
+    Flask endpoint looking up which candidates a collection already stores, by candidate ID or
+    source file, so that the backend only embeds new or changed resumes.
+    """
+    try:
+        data = request.get_json()
+
+        collection_name = data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "collection_name is required"}), 400
+
+        candidates = retriever_manager.find_candidates(
+            collection_name, data.get('candidate_ids', []), data.get('sources', [])
+        )
+        return jsonify({"candidates": candidates}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/add-collection/delete', methods=['POST'])
+def delete_candidates():
+    """
+    Flask endpoint deleting candidates, with all of their chunks, from a collection.
+    """
+    try:
+        data = request.get_json()
+
+        collection_name = data.get('collection_name')
+        candidate_ids = data.get('candidate_ids')
+
+        if not collection_name or not candidate_ids:
+            return jsonify({"error": "collection_name and candidate_ids are required"}), 400
+
+        deleted = retriever_manager.delete_candidates(collection_name, candidate_ids)
+        retriever_manager.flush(collection_name)
+        invalidate_responses(collection_name)
+
+        return jsonify({"message": f"Deleted {len(candidate_ids)} candidates", "chunks": deleted}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/collections', methods=['GET'])
+def list_collections():
+    """
+    Flask endpoint listing the Milvus collections and their entity counts, used by the
+    backend to keep its local catalog consistent with Milvus.
+    """
+    try:
+        return jsonify({"collections": retriever_manager.list_collections()}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/collections/release', methods=['POST'])
+def release_collection():
+    """
+    Flask endpoint releasing an idle collection from Milvus memory, keeping its data.
+    """
+    try:
+        data = request.get_json()
+
+        collection_name = data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "collection_name is required"}), 400
+
+        return jsonify(retriever_manager.release_collection(collection_name)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/collections/drop', methods=['POST'])
+def drop_collection():
+    """
+    Flask endpoint deleting an expired collection and all of its documents.
+    """
+    try:
+        data = request.get_json()
+
+        collection_name = data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "collection_name is required"}), 400
+
+        usage = retriever_manager.drop_collection(collection_name)
+        invalidate_responses(collection_name)
+        return jsonify(usage), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/send-message', methods=['POST'])
 def send_message():
     try:
@@ -155,17 +459,37 @@ def send_message():
         if not collection_name or not message:
             return jsonify({"error": "Both 'collection_name' and 'message' are required."}), 400
 
-        # Set up retriever for the chatbot
-        retriever = retriever_manager.get_retriever(collection_name)
-        compression_retriever = ContextualCompressionRetriever(base_compressor=_filter, base_retriever=retriever)
+        # The conversation's history, shared by the requests of the same session and collection
+        memory = memory_store.session(data.get('session_id'), collection_name)
 
-        chatbot.retriever = compression_retriever
+        # Answer repeated questions from the cache, keeping the conversation history consistent
+        cached, embedding = response_cache.lookup(collection_name, message) if response_cache else (None, None)
+        if cached is not None:
+            memory.save_context({"input": message}, {"output": cached})
+            return jsonify({"response": cached, "cached": True}), 200
+        version = response_cache.version(collection_name) if response_cache else None
+        started = time.perf_counter()
+
+        # Set up the request's chatbot
+        retriever = retriever_manager.get_retriever(collection_name)
+        chatbot = build_chatbot(memory, rerank(retriever))
 
         # Generate the chatbot's response
         response = chatbot.send_message(message)
+        if response_cache and response != ERROR_RESPONSE:
+            response_cache.put(collection_name, message, response, time.perf_counter() - started, version,
+                               embedding=embedding)
+
+        context_stats = chatbot.context_stats or {}
+        app.logger.info(f"Context tokens: {context_stats.get('tokens')}, saved: {context_stats.get('saved_tokens')}")
 
         # Return the response to the user
-        return jsonify({"response": response}), 200
+        return jsonify({
+            "response": response,
+            "cached": False,
+            "context_tokens": context_stats.get("tokens"),
+            "context_tokens_saved": context_stats.get("saved_tokens"),
+        }), 200
 
     except KeyError as e:
         # Handle missing keys in input
@@ -175,7 +499,118 @@ def send_message():
         # Handle other unexpected exceptions
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
-        response = chatbot.send_message(message)
+
+def sse_event(data, event=None):
+    """
+    Format a server-sent event with a JSON payload.
+
+    Args:
+        data (dict): The event payload.
+        event (str): Optional event name (default: an unnamed "message" event).
+
+    Returns:
+        str: The encoded event.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.route('/send-message/stream', methods=['POST'])
+def send_message_stream():
+    """
+    Flask endpoint streaming the chatbot's response as server-sent events.
+
+    Each generated piece of text is sent as a `{"token": ...}` event. The stream ends with a
+    "done" event carrying the full response and the time to first token, or an "error" event.
+    """
+    started = time.perf_counter()
+
+    # Parse input JSON
+    data = request.get_json()
+
+    # Retrieve the collection name and user message
+    collection_name = data.get('collection_name')
+    message = data.get('message')
+
+    # Validate input
+    if not collection_name or not message:
+        return jsonify({"error": "Both 'collection_name' and 'message' are required."}), 400
+
+    # The conversation's history, shared by the requests of the same session and collection
+    memory = memory_store.session(data.get('session_id'), collection_name)
+
+    # Answer repeated questions from the cache, as a single token
+    cached, embedding = response_cache.lookup(collection_name, message) if response_cache else (None, None)
+    if cached is not None:
+        memory.save_context({"input": message}, {"output": cached})
+        body = sse_event({"token": cached}) + sse_event({
+            "response": cached,
+            "ttft_seconds": time.perf_counter() - started,
+            "total_seconds": time.perf_counter() - started,
+            "cached": True,
+        }, event="done")
+        return Response(body, mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+    version = response_cache.version(collection_name) if response_cache else None
+
+    # Set up retriever for the chatbot, failing before the stream starts if the collection is unknown
+    try:
+        retriever = retriever_manager.get_retriever(collection_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    chatbot = build_chatbot(memory, rerank(retriever))
+
+    def generate():
+        pieces = []
+        ttft = None
+        try:
+            for piece in chatbot.stream_message(message):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    app.logger.info(f"Time to first token: {ttft:.3f}s")
+                pieces.append(piece)
+                yield sse_event({"token": piece})
+
+            response = "".join(pieces).strip()
+            if response_cache:
+                response_cache.put(collection_name, message, response, time.perf_counter() - started, version,
+                                   embedding=embedding)
+
+            context_stats = chatbot.context_stats or {}
+            yield sse_event({
+                "response": response,
+                "ttft_seconds": ttft,
+                "total_seconds": time.perf_counter() - started,
+                "cached": False,
+                "context_tokens": context_stats.get("tokens"),
+                "context_tokens_saved": context_stats.get("saved_tokens"),
+            }, event="done")
+
+        except Exception as e:
+            yield sse_event({"error": f"An unexpected error occurred: {str(e)}"}, event="error")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route('/generation/stats', methods=['GET'])
+def generation_stats():
+    """
+    Flask endpoint reporting the generation scheduler's batch sizes and aggregate throughput.
+    """
+    return jsonify(scheduler.stats()), 200
+
+
+@app.route('/cache/stats', methods=['GET'])
+def response_cache_stats():
+    """
+    Flask endpoint reporting the response cache's hit rates and the generation time it saved.
+    """
+    if response_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **response_cache.stats()}), 200
 
 
 def send_message_to_chatbot(collection_name, message):
@@ -194,9 +629,9 @@ def send_message_to_chatbot(collection_name, message):
         if not collection_name or not message:
             return {"error": "Both 'collection_name' and 'message' are required."}, 400
 
-        # Set up retriever for the chatbot
+        # Set up the chatbot
         retriever = retriever_manager.get_retriever(collection_name)
-        chatbot.retriever = retriever
+        chatbot = build_chatbot(memory_store.session(None, collection_name), retriever)
 
         # Generate the chatbot's response
         response = chatbot.send_message(message)
@@ -216,6 +651,7 @@ def send_message_to_chatbot(collection_name, message):
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Requests are served concurrently, their generation is batched by the scheduler
+    app.run(debug=True, threaded=True)
     #response = send_message_to_chatbot("collection_90a4fe791a87471da71e09daf767265e", "what are the names of the people in the resumes")
     #print(response)
@@ -0,0 +1,167 @@
+import os
+import re
+import json
+import math
+import heapq
+import threading
+from collections import Counter, defaultdict
+from langchain.schema import Document
+
+
+# Keeps skill tokens such as "c++", "c#", "node.js" or "scikit-learn" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were with who which what "
+    "all any can do does list show me their they".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase a text and split it into terms, leaving out stop words."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the chunks of one collection.
+
+    The index is kept in memory and persisted as an append-only log of JSON lines, one per
+    insert or delete, which is replayed when the index is loaded and compacted once it holds
+    more deleted than live chunks.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Load (or prepare) the index stored in a log file.
+
+        Args:
+            path (str): Path of the index's log file.
+            k1 (float): Term frequency saturation.
+            b (float): Document length normalization.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.RLock()
+
+        self.documents = []  # Chunks by position, None once deleted
+        self.lengths = []
+        self.postings = defaultdict(dict)  # Term -> {position: term frequency}
+        self.by_candidate = defaultdict(list)  # Candidate ID -> positions
+        self.total_length = 0
+        self.count = 0
+
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Partial last line of an interrupted write
+                if record["op"] == "add":
+                    self._add([Document(**document) for document in record["documents"]])
+                else:
+                    self._delete(record["candidate_ids"])
+
+    def _append(self, record: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _add(self, documents: list[Document]):
+        for document in documents:
+            position = len(self.documents)
+            terms = Counter(tokenize(document.page_content))
+            for term, frequency in terms.items():
+                self.postings[term][position] = frequency
+            self.documents.append(document)
+            self.lengths.append(sum(terms.values()))
+            self.by_candidate[document.metadata.get("candidate_id")].append(position)
+            self.total_length += self.lengths[-1]
+            self.count += 1
+
+    def _delete(self, candidate_ids: list[str]) -> int:
+        deleted = 0
+        for candidate_id in candidate_ids:
+            for position in self.by_candidate.pop(candidate_id, []):
+                for term in set(tokenize(self.documents[position].page_content)):
+                    postings = self.postings[term]
+                    postings.pop(position, None)
+                    if not postings:
+                        del self.postings[term]
+                self.documents[position] = None
+                self.total_length -= self.lengths[position]
+                self.count -= 1
+                deleted += 1
+        return deleted
+
+    def add(self, documents: list[Document]):
+        """Index chunks."""
+        if not documents:
+            return
+        with self.lock:
+            self._append({
+                "op": "add",
+                "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in documents],
+            })
+            self._add(documents)
+
+    def delete_candidates(self, candidate_ids: list[str]) -> int:
+        """Remove all the chunks of some candidates and return the number of removed chunks."""
+        with self.lock:
+            self._append({"op": "delete", "candidate_ids": list(candidate_ids)})
+            return self._delete(candidate_ids)
+
+    def flush(self):
+        """Write the index to disk, compacting the log if most of its chunks were deleted."""
+        with self.lock:
+            if len(self.documents) > 2 * self.count:
+                temporary_path = f"{self.path}.tmp"
+                live = [document for document in self.documents if document is not None]
+                with open(temporary_path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps({
+                        "op": "add",
+                        "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in live],
+                    }) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary_path, self.path)
+
+                self.documents, self.lengths = [], []
+                self.postings, self.by_candidate = defaultdict(dict), defaultdict(list)
+                self.total_length = self.count = 0
+                self._add(live)
+            elif os.path.exists(self.path):
+                with open(self.path, "rb+") as f:
+                    os.fsync(f.fileno())
+
+    def search(self, query: str, k: int = 4) -> list[tuple[Document, float]]:
+        """
+        Find the chunks with the highest BM25 score for a query.
+
+        Args:
+            query (str): The query.
+            k (int): Number of chunks to return.
+
+        Returns:
+            list[tuple[Document, float]]: The chunks and their score, best first. Chunks sharing
+                no term with the query are left out.
+        """
+        with self.lock:
+            if not self.count:
+                return []
+            average_length = self.total_length / self.count
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (self.count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for position, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / average_length)
+                    scores[position] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self.documents[position], score) for position, score in best]
@@ -0,0 +1,174 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import Runnable
+from .bm25 import BM25Index
+from .local_vectordb import VALID_COLLECTION_NAME
+from .vectordb_base import BaseRetrieverManager
+
+
+# Runs the dense searches while the calling thread scores BM25
+_dense_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dense-search")
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int, rrf_k: int = 60) -> list[Document]:
+    """
+    Merge rankings of documents with reciprocal rank fusion.
+
+    Each document scores the sum of 1 / (rrf_k + rank) over the rankings it appears in, so
+    documents found by several retrievers come first regardless of their raw scores' scale.
+
+    Args:
+        rankings (list[list[Document]]): Documents ordered best first, one list per retriever.
+        k (int): Number of documents to return.
+        rrf_k (int): Damping constant, larger values flatten the weight of the top ranks.
+
+    Returns:
+        list[Document]: The k best documents after fusion.
+    """
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = (document.metadata.get("candidate_id"), document.page_content)
+            scores[key] = scores.get(key, 0.0) + 1 / (rrf_k + rank)
+            documents.setdefault(key, document)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever running a dense vector search and a BM25 search concurrently, merged with
+    reciprocal rank fusion. BM25 catches the exact skill, certification, employer and
+    candidate names that embeddings tend to miss.
+    """
+
+    dense_retriever: BaseRetriever
+    lexical_index: Any
+    k: int = 4
+    depth: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        dense = _dense_executor.submit(
+            self.dense_retriever.invoke, query, {"callbacks": run_manager.get_child()}
+        )
+        lexical = [document for document, _ in self.lexical_index.search(query, k=self.depth)]
+        return reciprocal_rank_fusion([dense.result(), lexical], k=self.k, rrf_k=self.rrf_k)
+
+
+class HybridRetrieverManager(BaseRetrieverManager):
+    """
+    Vector store backend adding a BM25 index next to each collection of another backend, and
+    giving hybrid retrievers over both.
+    """
+
+    def __init__(self, dense_manager: BaseRetrieverManager, path: str, top_k: int = 4, depth: int = 20,
+                 max_indexes: int = 32):
+        """
+        Initialize the manager.
+
+        Args:
+            dense_manager (BaseRetrieverManager): The backend storing the embeddings.
+            path (str): Directory holding one BM25 index file per collection.
+            top_k (int): Number of chunks returned by the retrievers.
+            depth (int): Number of chunks taken from each search before fusion.
+            max_indexes (int): Maximum number of indexes kept in memory, least recently used first out.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.dense_manager = dense_manager
+        self.path = path
+        self.top_k = top_k
+        self.depth = depth
+        self.max_indexes = max_indexes
+        self.indexes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _index_path(self, collection_name: str) -> str:
+        if not VALID_COLLECTION_NAME.match(collection_name):
+            raise ValueError(f"Invalid collection name '{collection_name}'.")
+        return os.path.join(self.path, f"{collection_name}.jsonl")
+
+    def _index(self, collection_name: str) -> BM25Index:
+        """Return the BM25 index of a collection, loading it if needed."""
+        with self.lock:
+            index = self.indexes.get(collection_name)
+            if index is None:
+                index = self.indexes[collection_name] = BM25Index(self._index_path(collection_name))
+                while len(self.indexes) > self.max_indexes:
+                    self.indexes.popitem(last=False)
+            self.indexes.move_to_end(collection_name)
+            return index
+
+    def _remove_index(self, collection_name: str):
+        with self.lock:
+            self.indexes.pop(collection_name, None)
+        if os.path.exists(self._index_path(collection_name)):
+            os.remove(self._index_path(collection_name))
+
+    def add_collection(self, collection_name: str, documents: list[Document]):
+        self.dense_manager.add_collection(collection_name, documents)
+        self._remove_index(collection_name)
+        self._index(collection_name).add(documents)
+
+    def add_documents(self, collection_name: str, documents: list[Document]):
+        self.dense_manager.add_documents(collection_name, documents)
+        self._index(collection_name).add(documents)
+
+    def find_candidates(self, collection_name: str, candidate_ids: list[str], sources: list[str]) -> list[dict]:
+        return self.dense_manager.find_candidates(collection_name, candidate_ids, sources)
+
+    def delete_candidates(self, collection_name: str, candidate_ids: list[str]) -> int:
+        deleted = self.dense_manager.delete_candidates(collection_name, candidate_ids)
+        if os.path.exists(self._index_path(collection_name)):
+            self._index(collection_name).delete_candidates(candidate_ids)
+        return deleted
+
+    def flush(self, collection_name: str):
+        self.dense_manager.flush(collection_name)
+        if os.path.exists(self._index_path(collection_name)):
+            self._index(collection_name).flush()
+
+    def list_collections(self) -> list[dict]:
+        return self.dense_manager.list_collections()
+
+    def release_collection(self, collection_name: str) -> dict:
+        with self.lock:
+            self.indexes.pop(collection_name, None)
+        return self.dense_manager.release_collection(collection_name)
+
+    def drop_collection(self, collection_name: str) -> dict:
+        usage = self.dense_manager.drop_collection(collection_name)
+        self._remove_index(collection_name)
+        return usage
+
+    def get_retriever(self, collection_name: str) -> Runnable:
+        """
+        Retrieve the hybrid retriever for a specific collection.
+
+        Collections stored before BM25 indexing was enabled have no index and get the dense
+        retriever alone.
+
+        Args:
+            collection_name (str): Name of the collection.
+
+        Returns:
+            Runnable: The retriever for the specified collection.
+        """
+        retriever = self.dense_manager.get_retriever(collection_name)
+        if not os.path.exists(self._index_path(collection_name)):
+            return retriever
+
+        # A copy, as the dense backend may share its retriever between requests
+        dense_retriever = retriever.model_copy(
+            update={"search_kwargs": {**retriever.search_kwargs, "k": self.depth}}
+        )
+        return HybridRetriever(
+            dense_retriever=dense_retriever, lexical_index=self._index(collection_name), k=self.top_k, depth=self.depth
+        )
@@ -0,0 +1,509 @@
+import os
+import re
+import json
+import shutil
+import threading
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
+from langchain.schema import Document
+from langchain_core.runnables import Runnable
+from langchain_core.vectorstores import VectorStore
+from .vectordb_base import BaseRetrieverManager
+
+
+# Collection names become directory names
+VALID_COLLECTION_NAME = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length, so that the dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalCollection:
+    """
+    A collection of embedded documents stored in a directory:
+
+    - `info.json`: the embedding dimension.
+    - `vectors.f32`: the normalized embeddings, one float32 row per document, memory-mapped for search.
+    - `records.jsonl`: the text and metadata of each row.
+    - `deleted.u8`: one tombstone byte per row.
+    - `ivf.npy` and `lists.i32`: the IVF centroids and each row's list, once the collection is large enough.
+
+    Files are only appended to (tombstones are set in place), so an interrupted write leaves at
+    most a partial last row, which is dropped when the collection is opened again.
+    """
+
+    def __init__(self, path: str, ivf_min_rows: int = 20000, nprobe: int = 8):
+        """
+        Open (or prepare) the collection stored in a directory.
+
+        Args:
+            path (str): Directory of the collection.
+            ivf_min_rows (int): Number of rows from which searches go through an IVF index instead of
+                an exact scan. The index is rebuilt whenever the collection doubles in size.
+            nprobe (int): Number of IVF lists scanned per search.
+        """
+        self.path = path
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.lock = threading.RLock()
+
+        self.dim = None
+        self.records = []  # (text, metadata) per row
+        self.vectors = None  # Memory-mapped (rows, dim) array
+        self.deleted = np.zeros(0, dtype=np.uint8)
+        self.field_index = defaultdict(lambda: defaultdict(list))  # Metadata field -> value -> rows
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.ivf_rows = 0  # Number of rows when the IVF index was built
+        self._lists = None  # Rows grouped by IVF list, rebuilt lazily after inserts
+
+        if os.path.exists(self._file("info.json")):
+            self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def size(self) -> int:
+        """Number of rows, deleted ones included."""
+        return len(self.records)
+
+    @property
+    def entities(self) -> int:
+        """Number of documents that are not deleted."""
+        return int(self.size - self.deleted.sum())
+
+    def _load(self):
+        with open(self._file("info.json"), encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+
+        with open(self._file("records.jsonl"), encoding="utf-8") as f:
+            records = []
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Partial last line of an interrupted write
+                records.append((record["text"], record["metadata"]))
+        vector_rows = os.path.getsize(self._file("vectors.f32")) // (self.dim * 4)
+        deleted = np.fromfile(self._file("deleted.u8"), dtype=np.uint8)
+
+        # Keep the rows fully written to every file
+        rows = min(len(records), vector_rows, len(deleted))
+        if rows < len(records):
+            with open(self._file("records.jsonl"), "w", encoding="utf-8") as f:
+                f.writelines(json.dumps({"text": text, "metadata": metadata}) + "\n" for text, metadata in records[:rows])
+        os.truncate(self._file("vectors.f32"), rows * self.dim * 4)
+        os.truncate(self._file("deleted.u8"), rows)
+
+        self.records = records[:rows]
+        self.deleted = deleted[:rows].copy()
+        for row, (_, metadata) in enumerate(self.records):
+            self._index_metadata(row, metadata)
+        self._map_vectors()
+
+        if os.path.exists(self._file("ivf.npy")):
+            self.centroids = np.load(self._file("ivf.npy"))
+            assignments = np.fromfile(self._file("lists.i32"), dtype=np.int32)
+            if len(assignments) >= rows:
+                self.assignments = assignments[:rows].copy()
+                self.ivf_rows = rows
+            else:
+                # Rows inserted after the index were not all assigned, rebuild it
+                self.centroids = None
+                self._build_ivf()
+
+    def _map_vectors(self):
+        self.vectors = (
+            np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self.size, self.dim))
+            if self.size else None
+        )
+
+    def _index_metadata(self, row: int, metadata: dict):
+        for field, value in metadata.items():
+            if isinstance(value, (str, int, float, bool)):
+                self.field_index[field][value].append(row)
+
+    def add(self, vectors, texts: list[str], metadatas: list[dict]):
+        """
+        Append documents to the collection.
+
+        Args:
+            vectors: The documents' embeddings, one row per document.
+            texts (list[str]): The documents' texts.
+            metadatas (list[dict]): The documents' metadata.
+        """
+        vectors = _normalize(vectors)
+        if not len(texts):
+            return
+
+        with self.lock:
+            if self.dim is None:
+                os.makedirs(self.path, exist_ok=True)
+                self.dim = int(vectors.shape[1])
+                with open(self._file("info.json"), "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+                for name in ("vectors.f32", "deleted.u8", "records.jsonl"):
+                    open(self._file(name), "ab").close()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}.")
+
+            start = self.size
+            with open(self._file("vectors.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._file("deleted.u8"), "ab") as f:
+                f.write(bytes(len(texts)))
+            with open(self._file("records.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(
+                    json.dumps({"text": text, "metadata": metadata}) + "\n" for text, metadata in zip(texts, metadatas)
+                )
+
+            for offset, (text, metadata) in enumerate(zip(texts, metadatas)):
+                self.records.append((text, metadata))
+                self._index_metadata(start + offset, metadata)
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(texts), dtype=np.uint8)])
+            self._map_vectors()
+
+            if self.centroids is not None and self.size < 2 * self.ivf_rows:
+                assignments = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+                with open(self._file("lists.i32"), "ab") as f:
+                    f.write(assignments.tobytes())
+                self.assignments = np.concatenate([self.assignments, assignments])
+                self._lists = None
+            elif self.entities >= self.ivf_min_rows:
+                self._build_ivf()
+            elif self.centroids is not None:
+                # Mostly deleted since the index was built, back to exact search
+                self.centroids, self._lists = None, None
+                os.remove(self._file("ivf.npy"))
+
+    def _build_ivf(self, iterations: int = 10):
+        """Cluster the rows with spherical k-means and assign every row to its nearest centroid."""
+        alive = np.flatnonzero(self.deleted == 0)
+        nlist = max(1, int(np.sqrt(len(alive))))
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(alive, size=min(len(alive), nlist * 64), replace=False))
+        data = np.asarray(self.vectors[sample])
+
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, data)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]  # Keep the centroids of empty clusters
+            centroids = _normalize(sums)
+
+        assignments = np.concatenate([
+            np.argmax(np.asarray(self.vectors[start:start + 65536]) @ centroids.T, axis=1).astype(np.int32)
+            for start in range(0, self.size, 65536)
+        ])
+        np.save(self._file("ivf.npy"), centroids)
+        assignments.tofile(self._file("lists.i32"))
+        self.centroids, self.assignments, self.ivf_rows, self._lists = centroids, assignments, self.size, None
+
+    def _probe(self, query: np.ndarray) -> np.ndarray:
+        """Return the rows of the IVF lists nearest to the query."""
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        order, bounds = self._lists
+
+        nearest = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        return np.sort(np.concatenate([order[bounds[index]:bounds[index + 1]] for index in nearest]))
+
+    def match(self, filter: dict | None = None) -> np.ndarray:
+        """
+        Return the rows that are not deleted and match a metadata filter.
+
+        Args:
+            filter (dict): Maps metadata fields to a value or a list of accepted values (default: all rows).
+
+        Returns:
+            np.ndarray: The matching row indices, in increasing order.
+        """
+        with self.lock:
+            rows = None
+            for field, values in (filter or {}).items():
+                values = values if isinstance(values, (list, tuple, set)) else [values]
+                index = self.field_index.get(field, {})
+                field_rows = np.unique(np.fromiter(
+                    (row for value in values for row in index.get(value, ())), dtype=np.int64
+                ))
+                rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+            if rows is None:
+                rows = np.arange(self.size)
+            return rows[self.deleted[rows] == 0]
+
+    def search(self, query, k: int = 4, filter: dict | None = None) -> list[tuple[Document, float]]:
+        """
+        Find the documents most similar to a query embedding.
+
+        Args:
+            query: The query embedding.
+            k (int): Number of documents to return.
+            filter (dict): Optional metadata filter, see `match`.
+
+        Returns:
+            list[tuple[Document, float]]: The documents and their cosine similarity, most similar first.
+        """
+        query = _normalize(query)
+        with self.lock:
+            if not self.size:
+                return []
+            vectors, deleted, centroids = self.vectors, self.deleted, self.centroids
+            rows = self.match(filter) if filter else None
+
+            # Filters selecting few rows are scanned exactly, larger searches only scan the nearest IVF lists
+            if centroids is not None and (rows is None or len(rows) > self.ivf_min_rows):
+                probed = self._probe(query)
+                probed = probed[deleted[probed] == 0]
+                probed = probed if rows is None else np.intersect1d(probed, rows, assume_unique=True)
+                if len(probed) >= k:
+                    rows = probed
+            if rows is None:
+                rows = np.flatnonzero(deleted == 0)
+
+        if not len(rows):
+            return []
+        scores = np.asarray(vectors[rows]) @ query
+        top = np.argpartition(-scores, k - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(page_content=self.records[rows[index]][0], metadata=self.records[rows[index]][1]),
+             float(scores[index]))
+            for index in top
+        ]
+
+    def delete(self, filter: dict) -> int:
+        """
+        Delete the documents matching a metadata filter.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+        with self.lock:
+            rows = self.match(filter)
+            if not len(rows):
+                return 0
+            self.deleted[rows] = 1
+            with open(self._file("deleted.u8"), "r+b") as f:
+                for row in rows:
+                    f.seek(int(row))
+                    f.write(b"\x01")
+            return len(rows)
+
+    def flush(self):
+        """Write the collection's files to disk."""
+        with self.lock:
+            for name in ("vectors.f32", "deleted.u8", "records.jsonl", "lists.i32"):
+                if os.path.exists(self._file(name)):
+                    with open(self._file(name), "rb+") as f:
+                        os.fsync(f.fileno())
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain vector store over a collection of a `LocalRetrieverManager`.
+    """
+
+    def __init__(self, manager: "LocalRetrieverManager", collection_name: str):
+        self.manager = manager
+        self.collection_name = collection_name
+
+    @property
+    def embeddings(self):
+        return self.manager.embedding_model
+
+    def add_texts(self, texts, metadatas=None, **kwargs) -> list[str]:
+        texts = list(texts)
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in
+                     zip(texts, metadatas or [{} for _ in texts])]
+        self.manager.add_documents(self.collection_name, documents)
+        return []
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict | None = None, **kwargs):
+        vector = self.manager.embedding_model.embed_query(query)
+        return self.manager.collection(self.collection_name).search(vector, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict | None = None, **kwargs) -> list[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity mapped to [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, path: str | None = None,
+                   collection_name: str = "langchain", **kwargs) -> "LocalVectorStore":
+        """
+        Embed texts into a local collection, creating it if needed, and return a store over it.
+
+        Args:
+            texts (list[str]): The texts to store.
+            embedding: The embedding model to use for the texts and queries.
+            metadatas (list[dict]): Optional metadata of each text.
+            path (str): Directory holding the collections (required).
+            collection_name (str): Name of the collection (default: "langchain").
+            kwargs: Extra arguments forwarded to `LocalRetrieverManager`, e.g. `ivf_min_rows`.
+
+        Returns:
+            LocalVectorStore: The vector store over the collection.
+        """
+        if path is None:
+            raise ValueError("LocalVectorStore.from_texts requires the `path` of the collections directory.")
+        store = cls(LocalRetrieverManager(path, embedding, **kwargs), collection_name)
+        store.add_texts(texts, metadatas)
+        return store
+
+
+class LocalRetrieverManager(BaseRetrieverManager):
+    """
+    Vector store backend keeping each collection in a local directory of memory-mapped NumPy
+    arrays, for deployments and tests without a Milvus service.
+    """
+
+    def __init__(self, path: str, embedding_model, max_collections: int = 32, ivf_min_rows: int = 20000,
+                 nprobe: int = 8):
+        """
+        Initialize the manager.
+
+        Args:
+            path (str): Directory holding one subdirectory per collection.
+            embedding_model: The embedding model to use for document storage and queries.
+            max_collections (int): Maximum number of collections kept open in memory, least recently used first out.
+            ivf_min_rows (int): Number of rows from which a collection is searched through an IVF index.
+            nprobe (int): Number of IVF lists scanned per search.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.embedding_model = embedding_model
+        self.max_collections = max_collections
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.collections = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _collection_path(self, collection_name: str) -> str:
+        if not VALID_COLLECTION_NAME.match(collection_name):
+            raise ValueError(f"Invalid collection name '{collection_name}'.")
+        return os.path.join(self.path, collection_name)
+
+    def _exists(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self._collection_path(collection_name), "info.json"))
+
+    def collection(self, collection_name: str, create: bool = False) -> LocalCollection:
+        """
+        Return an open collection, opening it (or preparing a new one with `create`) if needed.
+
+        Raises:
+            ValueError: If the collection does not exist and `create` is False.
+        """
+        with self.lock:
+            collection = self.collections.get(collection_name)
+            if collection is not None:
+                self.collections.move_to_end(collection_name)
+                return collection
+            if not create and not self._exists(collection_name):
+                raise ValueError(f"Collection '{collection_name}' not found.")
+
+            collection = LocalCollection(
+                self._collection_path(collection_name), ivf_min_rows=self.ivf_min_rows, nprobe=self.nprobe
+            )
+            self.collections[collection_name] = collection
+            while len(self.collections) > self.max_collections:
+                self.collections.popitem(last=False)
+            return collection
+
+    def add_collection(self, collection_name: str, documents: list[Document]):
+        self.add_documents(collection_name, documents)
+
+    def add_documents(self, collection_name: str, documents: list[Document]):
+        """
+        Embed and insert documents into a collection, creating it if it does not exist.
+
+        Args:
+            collection_name (str): Name of the collection.
+            documents (list[Document]): Documents to insert.
+        """
+        if not documents:
+            return
+        texts = [document.page_content for document in documents]
+        vectors = self.embedding_model.embed_documents(texts)
+        self.collection(collection_name, create=True).add(
+            vectors, texts, [dict(document.metadata) for document in documents]
+        )
+
+    def find_candidates(self, collection_name: str, candidate_ids: list[str], sources: list[str]) -> list[dict]:
+        if not self._exists(collection_name):
+            return []
+        collection = self.collection(collection_name)
+        rows = np.union1d(
+            collection.match({"candidate_id": list(candidate_ids)}) if candidate_ids else [],
+            collection.match({"source": list(sources)}) if sources else [],
+        ).astype(np.int64)
+
+        chunks = Counter()
+        sources_by_candidate = {}
+        for row in rows:
+            metadata = collection.records[row][1]
+            chunks[metadata["candidate_id"]] += 1
+            sources_by_candidate[metadata["candidate_id"]] = metadata.get("source", "")
+        return [
+            {"candidate_id": candidate_id, "source": sources_by_candidate[candidate_id], "chunks": count}
+            for candidate_id, count in chunks.items()
+        ]
+
+    def delete_candidates(self, collection_name: str, candidate_ids: list[str]) -> int:
+        if not candidate_ids or not self._exists(collection_name):
+            return 0
+        return self.collection(collection_name).delete({"candidate_id": list(candidate_ids)})
+
+    def flush(self, collection_name: str):
+        if self._exists(collection_name):
+            self.collection(collection_name).flush()
+
+    def list_collections(self) -> list[dict]:
+        collections = []
+        for collection_name in sorted(os.listdir(self.path)):
+            if VALID_COLLECTION_NAME.match(collection_name) and self._exists(collection_name):
+                # Counted from the tombstones, without loading the collection
+                deleted = np.fromfile(os.path.join(self.path, collection_name, "deleted.u8"), dtype=np.uint8)
+                collections.append({"name": collection_name, "num_entities": int(len(deleted) - deleted.sum())})
+        return collections
+
+    def release_collection(self, collection_name: str) -> dict:
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+        if collection is None or collection.dim is None:
+            return {"entities": 0, "vector_bytes": 0}
+        return {"entities": collection.entities, "vector_bytes": collection.size * collection.dim * 4}
+
+    def drop_collection(self, collection_name: str) -> dict:
+        if not self._exists(collection_name):
+            return {"entities": 0, "vector_bytes": 0}
+        collection = self.collection(collection_name)
+        usage = {"entities": collection.entities, "vector_bytes": collection.size * collection.dim * 4}
+        with self.lock:
+            self.collections.pop(collection_name, None)
+        shutil.rmtree(self._collection_path(collection_name))
+        return usage
+
+    def get_retriever(self, collection_name: str) -> Runnable:
+        """
+        Retrieve the retriever for a specific collection.
+
+        Args:
+            collection_name (str): Name of the collection.
+
+        Returns:
+            Runnable: The retriever for the specified collection.
+        """
+        if not self._exists(collection_name):
+            raise ValueError(f"Collection '{collection_name}' not found.")
+        return LocalVectorStore(self, collection_name).as_retriever()
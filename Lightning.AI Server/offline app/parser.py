@@ -1,4 +1,16 @@
 import os
+from importlib.metadata import version, PackageNotFoundError
+
+
+def get_parser_version():
+    """
+    Return the installed marker version, used by clients to invalidate cached parsing results.
+    """
+    try:
+        return version("marker-pdf")
+    except PackageNotFoundError:
+        return "unknown"
+
 
 def parse_pdf(input_folder, output_folder, workers=4):
     """
@@ -0,0 +1,115 @@
+import gzip
+import json
+import time
+import threading
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def decode_page(body: bytes, content_type: str | None, content_encoding: str | None) -> list[dict]:
+    """
+    Decode a page of documents sent by the backend.
+
+    Args:
+        body (bytes): The raw request body.
+        content_type (str): "application/json" or "application/msgpack".
+        content_encoding (str): None, "gzip" or "zstd".
+
+    Returns:
+        list[dict]: The documents, each with "page_content" and "metadata" keys.
+    """
+    if content_encoding == "gzip":
+        body = gzip.decompress(body)
+    elif content_encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd-encoded pages require the 'zstandard' package.")
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    elif content_encoding:
+        raise ValueError(f"Unsupported content encoding '{content_encoding}'.")
+
+    if content_type and content_type.startswith("application/msgpack"):
+        if msgpack is None:
+            raise ValueError("msgpack-encoded pages require the 'msgpack' package.")
+        return msgpack.unpackb(body)
+    return json.loads(body)
+
+
+class PageTracker:
+    """
+    Tracks which pages of each paged upload have been stored, so that a retried page
+    is not inserted twice and a finalize call can check that no page is missing.
+    A finalized upload is kept as a tombstone until it expires, and every page of it counts
+    as stored, so a late retry of a page is not inserted again.
+    """
+
+    def __init__(self, expiry_seconds: int = 3600):
+        """
+        Initialize the tracker.
+
+        Args:
+            expiry_seconds (int): Uploads untouched for this long are forgotten (default: 3600).
+        """
+        self.expiry_seconds = expiry_seconds
+        self.uploads = {}
+        self.lock = threading.Lock()
+
+    def _upload(self, upload_id: str) -> dict:
+        """Return the state of an upload, dropping expired uploads. Caller holds the lock."""
+        now = time.time()
+        for expired in [key for key, upload in self.uploads.items() if now - upload["updated"] > self.expiry_seconds]:
+            del self.uploads[expired]
+        upload = self.uploads.setdefault(upload_id, {"stored": set(), "in_progress": set(), "updated": now})
+        upload["updated"] = now
+        return upload
+
+    def begin(self, upload_id: str, page: int) -> str:
+        """
+        Claim a page for insertion.
+
+        Returns:
+            str: "new" if the caller should store the page, "stored" if it already was,
+            or "in_progress" if another request is storing it right now.
+        """
+        with self.lock:
+            upload = self._upload(upload_id)
+            if upload.get("finalized") or page in upload["stored"]:
+                return "stored"
+            if page in upload["in_progress"]:
+                return "in_progress"
+            upload["in_progress"].add(page)
+            return "new"
+
+    def complete(self, upload_id: str, page: int, stored: bool):
+        """Release a claimed page, marking it stored if the insertion succeeded."""
+        with self.lock:
+            upload = self._upload(upload_id)
+            upload["in_progress"].discard(page)
+            if stored:
+                upload["stored"].add(page)
+
+    def missing(self, upload_id: str, pages: int) -> list[int]:
+        """Return the indices of the pages that have not been stored yet."""
+        with self.lock:
+            upload = self._upload(upload_id)
+            if upload.get("finalized"):
+                return []
+            return [page for page in range(pages) if page not in upload["stored"]]
+
+    def finish(self, upload_id: str):
+        """
+        Mark an upload as finalized. Until it expires, a retried finalize call succeeds and
+        retried pages are acknowledged as stored.
+        """
+        with self.lock:
+            upload = self._upload(upload_id)
+            upload["finalized"] = True
+            # The tombstone answers for every page, the page indices are no longer needed
+            upload["stored"].clear()
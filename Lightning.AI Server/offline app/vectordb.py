@@ -1,24 +1,180 @@
+import json
+import threading
+from collections import Counter, OrderedDict
 from langchain_community.vectorstores import Milvus
 from langchain.schema import Document
 from langchain_core.runnables import Runnable
-from pymilvus import connections, utility
+from pymilvus import Collection, DataType, connections, utility
+from .vectordb_base import BaseRetrieverManager
 
 
-class RetrieverManager:
-    def __init__(self, uri: str | None, token: str | None, embedding_model):
+# Storage modes: one Milvus collection per uploaded batch, or every batch in one shared collection
+COLLECTIONS_MODE = "collections"
+PARTITIONED_MODE = "partitioned"
+
+# Scalar field holding the batch (logical collection) name in the shared collection, used as partition key
+BATCH_FIELD = "batch"
+
+# Fixed metadata schema of the shared collection, every inserted document must have the same fields
+SHARED_METADATA_FIELDS = (BATCH_FIELD, "source", "name", "candidate_id", "section")
+
+
+class RetrieverManager(BaseRetrieverManager):
+    """
+    Vector store backend storing collections in a Milvus instance.
+    """
+
+    def __init__(self, uri: str | None, token: str | None, embedding_model, storage_mode: str = COLLECTIONS_MODE,
+                 shared_collection: str = "resumes", max_retrievers: int = 32):
         """
         Initialize the MilvusManager with connection details and embedding model.
 
+        In "partitioned" mode, every batch of documents (a logical collection) is stored in one
+        shared Milvus collection, tagged with a partition key field holding the batch name, and
+        retrieval is filtered to the batch. Collections created in "collections" mode stay readable.
+
+        Retrievers are created on first use of a collection and kept in a bounded LRU registry.
+        Collections evicted from it are released from Milvus memory until they are used again.
+
         Args:
             uri (str): The URI of the Milvus instance.
             token (str): The token of the Milvus instance.
             embedding_model: The embedding model to use for document storage and queries.
+            storage_mode (str): "collections" (one Milvus collection per batch) or "partitioned".
+            shared_collection (str): Name of the Milvus collection shared by all batches in "partitioned" mode.
+            max_retrievers (int): Maximum number of collections with a live retriever.
         """
+        if storage_mode not in (COLLECTIONS_MODE, PARTITIONED_MODE):
+            raise ValueError(f"Unknown storage mode '{storage_mode}'.")
+
         self.uri = uri
         self.token = token
         self.embedding_model = embedding_model
-        self.retrievers = {}
+        self.storage_mode = storage_mode
+        self.shared_collection = shared_collection
+        self.max_retrievers = max_retrievers
+        # Live retrievers, least recently used first
+        self.retrievers = OrderedDict()
+        self.lock = threading.Lock()
+        # Whether collections exist as their own Milvus collection, looked up once per name
+        self.standalone_collections = {}
+
+    @property
+    def partitioned(self) -> bool:
+        return self.storage_mode == PARTITIONED_MODE
+
+    @property
+    def connection_args(self) -> dict:
+        return {"uri": self.uri, "token": self.token}
+
+    def _connect(self):
+        """Open the shared connection, which the vector stores reuse since they target the same address."""
+        if not connections.has_connection("default"):
+            connections.connect(alias="default", uri=self.uri, token=self.token)
 
+    def _is_standalone(self, collection_name: str) -> bool:
+        """Whether a collection is stored in its own Milvus collection."""
+        if collection_name in self.standalone_collections:
+            return self.standalone_collections[collection_name]
+        self._connect()
+        exists = utility.has_collection(collection_name)
+        # Missing collections are only remembered when new ones go to the shared collection
+        if exists or self.partitioned:
+            self.standalone_collections[collection_name] = exists
+        return exists
+
+    def _is_shared(self, collection_name: str) -> bool:
+        """Whether a collection's documents are stored in the shared collection."""
+        return self.partitioned and not self._is_standalone(collection_name)
+
+    def _vector_store(self, collection_name: str) -> Milvus:
+        """Create the vector store holding a collection's documents."""
+        self._connect()
+        if self._is_shared(collection_name):
+            return Milvus(
+                self.embedding_model,
+                collection_name=self.shared_collection,
+                connection_args=self.connection_args,
+                auto_id=True,
+                partition_key_field=BATCH_FIELD,
+            )
+
+        # Collections created by `add_collection` have string primary keys generated on insert
+        auto_id = True
+        if utility.has_collection(collection_name):
+            auto_id = Collection(collection_name).schema.auto_id
+        return Milvus(
+            self.embedding_model,
+            collection_name=collection_name,
+            connection_args=self.connection_args,
+            auto_id=auto_id,
+        )
+
+    def _physical_collection(self, collection_name: str) -> str:
+        """Return the name of the Milvus collection storing a collection's documents."""
+        return self.shared_collection if self._is_shared(collection_name) else collection_name
+
+    def _filter(self, collection_name: str, expr: str | None = None) -> str | None:
+        """Restrict a filtering expression to a collection's documents in the shared collection."""
+        if not self._is_shared(collection_name):
+            return expr
+        batch_filter = f"{BATCH_FIELD} == {json.dumps(collection_name)}"
+        return f"{batch_filter} and ({expr})" if expr else batch_filter
+
+    def _tag(self, collection_name: str, documents: list[Document]) -> list[Document]:
+        """Conform documents to the shared collection's schema, tagged with their batch name."""
+        if not self._is_shared(collection_name):
+            return documents
+        return [
+            Document(
+                page_content=document.page_content,
+                metadata={
+                    **{field: str(document.metadata.get(field, "")) for field in SHARED_METADATA_FIELDS},
+                    BATCH_FIELD: collection_name,
+                },
+            )
+            for document in documents
+        ]
+
+    def _retriever(self, collection_name: str) -> Runnable:
+        """
+        Return a collection's retriever from the registry, creating it on first use and
+        releasing the least recently used collections beyond `max_retrievers`.
+        """
+        with self.lock:
+            retriever = self.retrievers.get(collection_name)
+            if retriever is not None:
+                self.retrievers.move_to_end(collection_name)
+                return retriever
+
+        # Created outside the lock, loading a collection can take a while
+        store = self._vector_store(collection_name)
+        if self._is_shared(collection_name):
+            # Searches are filtered on the partition key, so Milvus only scans the batch's partition
+            retriever = store.as_retriever(search_kwargs={"expr": self._filter(collection_name)})
+        else:
+            retriever = store.as_retriever()
+
+        with self.lock:
+            retriever = self.retrievers.setdefault(collection_name, retriever)
+            self.retrievers.move_to_end(collection_name)
+            evicted = []
+            while len(self.retrievers) > self.max_retrievers:
+                evicted.append(self.retrievers.popitem(last=False))
+
+        for evicted_name, evicted_retriever in evicted:
+            self._release(evicted_name, evicted_retriever)
+        return retriever
+
+    def _release(self, collection_name: str, retriever):
+        """Release an evicted collection from Milvus memory. The shared collection stays loaded."""
+        collection = retriever.vectorstore.col
+        if collection is None or self._is_shared(collection_name):
+            return
+        try:
+            collection.release()
+        except Exception as e:
+            print(f"Failed to release collection '{collection_name}': {e}")
 
     def add_collection(self, collection_name: str, documents: list[Document]):
         """
@@ -28,45 +184,209 @@ class RetrieverManager:
             collection_name (str): Name of the Milvus collection.
             documents (list[Document], optional): List of documents to initialize the collection. Defaults to None.
         """
+        if self._is_shared(collection_name):
+            self.add_documents(collection_name, documents)
+            return
+
+        self._connect()
         Milvus.from_documents(
             documents,
             self.embedding_model,
             collection_name=collection_name,
-            connection_args={"uri": self.uri, "token": self.token},
+            connection_args=self.connection_args,
+        )
+        self.standalone_collections[collection_name] = True
+
+    def add_documents(self, collection_name: str, documents: list[Document]):
+        """
+        Embed and insert documents into a Milvus collection, creating it if it does not exist.
+
+        Args:
+            collection_name (str): Name of the Milvus collection.
+            documents (list[Document]): Documents to insert.
+        """
+        self._retriever(collection_name).vectorstore.add_documents(self._tag(collection_name, documents))
+        if not self._is_shared(collection_name):
+            self.standalone_collections[collection_name] = True
+
+    def find_candidates(self, collection_name: str, candidate_ids: list[str], sources: list[str]) -> list[dict]:
+        """
+        Look up stored candidates by ID or by source file, without embedding anything.
+
+        Args:
+            collection_name (str): Name of the Milvus collection.
+            candidate_ids (list[str]): Candidate IDs to look up.
+            sources (list[str]): Source file names to look up.
+
+        Returns:
+            list[dict]: One {"candidate_id", "source", "chunks"} dictionary per stored candidate
+                matching either an ID or a source. Empty if the collection does not exist.
+        """
+        self._connect()
+        if not utility.has_collection(self._physical_collection(collection_name)):
+            return []
+
+        filters = []
+        if candidate_ids:
+            filters.append(f"candidate_id in {json.dumps(list(candidate_ids))}")
+        if sources:
+            filters.append(f"source in {json.dumps(list(sources))}")
+        if not filters:
+            return []
+
+        collection = Collection(self._physical_collection(collection_name))
+        collection.load()
+        rows = collection.query(
+            expr=self._filter(collection_name, " or ".join(filters)),
+            output_fields=["candidate_id", "source"],
+            limit=16384,
         )
+        chunks = Counter(row["candidate_id"] for row in rows)
+        sources_by_candidate = {row["candidate_id"]: row["source"] for row in rows}
+        return [
+            {"candidate_id": candidate_id, "source": sources_by_candidate[candidate_id], "chunks": count}
+            for candidate_id, count in chunks.items()
+        ]
 
-    def get_all_retrievers(self):
+    def delete_candidates(self, collection_name: str, candidate_ids: list[str]) -> int:
         """
-        Retrieve all retrievers for previously stored collections in the database.
+        Delete all the chunks of some candidates from a Milvus collection.
+
+        Args:
+            collection_name (str): Name of the Milvus collection.
+            candidate_ids (list[str]): IDs of the candidates to delete.
 
         Returns:
-            dict: A dictionary of collection names and their corresponding retrievers.
+            int: The number of deleted chunks.
+        """
+        self._connect()
+        if not candidate_ids or not utility.has_collection(self._physical_collection(collection_name)):
+            return 0
+        result = Collection(self._physical_collection(collection_name)).delete(
+            expr=self._filter(collection_name, f"candidate_id in {json.dumps(list(candidate_ids))}")
+        )
+        return result.delete_count
+
+    def flush(self, collection_name: str):
+        """
+        Flush a Milvus collection so that all inserted documents are persisted and searchable.
+
+        Args:
+            collection_name (str): Name of the Milvus collection.
         """
+        self._connect()
+        Collection(self._physical_collection(collection_name)).flush()
+
+    def _batch_sizes(self) -> Counter:
+        """Count the documents of each batch stored in the shared collection."""
+        if not utility.has_collection(self.shared_collection):
+            return Counter()
+
+        collection = Collection(self.shared_collection)
+        collection.load()
+        sizes = Counter()
+        iterator = collection.query_iterator(batch_size=1000, expr=f'{BATCH_FIELD} != ""', output_fields=[BATCH_FIELD])
         try:
-            # Establish connection to Milvus using pymilvus.connections
-            connections.connect(
-                alias="default",
-                uri=self.uri,
-                token=self.token
+            while rows := iterator.next():
+                sizes.update(row[BATCH_FIELD] for row in rows)
+        finally:
+            iterator.close()
+        return sizes
+
+    def list_collections(self) -> list[dict]:
+        """
+        List the Milvus collections with their number of stored entities.
+
+        In "partitioned" mode, the batches of the shared collection are listed as collections.
+
+        Returns:
+            list[dict]: One {"name", "num_entities"} dictionary per collection.
+        """
+        self._connect()
+        collections = [
+            {"name": collection_name, "num_entities": Collection(collection_name).num_entities}
+            for collection_name in utility.list_collections()
+            if collection_name != self.shared_collection
+        ]
+        if self.partitioned:
+            collections.extend(
+                {"name": batch, "num_entities": count} for batch, count in sorted(self._batch_sizes().items())
             )
+        return collections
+
+    def _evict(self, collection_name: str):
+        """Remove a collection's retriever from the registry, so that its next use reloads it."""
+        with self.lock:
+            self.retrievers.pop(collection_name, None)
 
-            # Use pymilvus utility to list all collections
-            collection_names = utility.list_collections()
+    def _usage(self, collection_name: str) -> tuple[int, int]:
+        """Return the number of entities of a collection and the size of their vectors in bytes."""
+        collection = Collection(self._physical_collection(collection_name))
+        if self._is_shared(collection_name):
+            collection.load()
+            rows = collection.query(expr=self._filter(collection_name), output_fields=["count(*)"])
+            entities = rows[0]["count(*)"] if rows else 0
+        else:
+            entities = collection.num_entities
+        dim = next(
+            (field.params["dim"] for field in collection.schema.fields if field.dtype == DataType.FLOAT_VECTOR), 0
+        )
+        return entities, entities * dim * 4
 
-            # Initialize retrievers for all collections
-            for collection_name in collection_names:
-                if collection_name not in self.retrievers:  # Avoid reinitializing existing retrievers
-                    retriever = Milvus(
-                        self.embedding_model,
-                        collection_name=collection_name,
-                        connection_args={"uri": self.uri, "token": self.token},
-                    ).as_retriever()
-                    self.retrievers[collection_name] = retriever
+    def release_collection(self, collection_name: str) -> dict:
+        """
+        Release an idle collection from Milvus memory. Its data is kept and loaded again on next use.
 
-            return self.retrievers
-        except Exception as e:
-            raise RuntimeError(f"Failed to retrieve collections or initialize retrievers: {e}")
+        Batches of the shared collection only lose their retriever, as the shared collection stays loaded.
+
+        Args:
+            collection_name (str): Name of the collection.
+
+        Returns:
+            dict: The collection's "entities" and the "vector_bytes" freed from memory.
+        """
+        self._connect()
+        self._evict(collection_name)
+        if not utility.has_collection(self._physical_collection(collection_name)):
+            return {"entities": 0, "vector_bytes": 0}
 
+        entities, vector_bytes = self._usage(collection_name)
+        if self._is_shared(collection_name):
+            return {"entities": entities, "vector_bytes": 0}
+        Collection(collection_name).release()
+        return {"entities": entities, "vector_bytes": vector_bytes}
+
+    def drop_collection(self, collection_name: str) -> dict:
+        """
+        Delete a collection and all of its documents.
+
+        Args:
+            collection_name (str): Name of the collection.
+
+        Returns:
+            dict: The number of "entities" deleted and the "vector_bytes" they took.
+        """
+        self._connect()
+        self._evict(collection_name)
+        if not utility.has_collection(self._physical_collection(collection_name)):
+            return {"entities": 0, "vector_bytes": 0}
+
+        entities, vector_bytes = self._usage(collection_name)
+        if self._is_shared(collection_name):
+            Collection(self.shared_collection).delete(expr=self._filter(collection_name))
+        else:
+            utility.drop_collection(collection_name)
+            self.standalone_collections.pop(collection_name, None)
+        return {"entities": entities, "vector_bytes": vector_bytes}
+
+    def _has_batch(self, collection_name: str) -> bool:
+        """Check whether the shared collection stores documents of a batch."""
+        self._connect()
+        if not utility.has_collection(self.shared_collection):
+            return False
+        collection = Collection(self.shared_collection)
+        collection.load()
+        return bool(collection.query(expr=self._filter(collection_name), output_fields=[BATCH_FIELD], limit=1))
 
     def get_retriever(self, collection_name: str) -> Runnable:
         """
@@ -78,7 +398,10 @@ class RetrieverManager:
         Returns:
             Runnable: The retriever for the specified collection.
         """
-        if collection_name not in self.retrievers:
-            raise ValueError(f"Collection '{collection_name}' not found.")
-        return self.retrievers[collection_name]
-
+        with self.lock:
+            known = collection_name in self.retrievers
+        if not known:
+            exists = self._has_batch(collection_name) if self._is_shared(collection_name) else self._is_standalone(collection_name)
+            if not exists:
+                raise ValueError(f"Collection '{collection_name}' not found.")
+        return self._retriever(collection_name)
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from langchain.schema import Document
+from langchain_core.runnables import Runnable
+
+
+class BaseRetrieverManager(ABC):
+    """
+    Interface of the vector store backends: stores collections of embedded resume chunks
+    and gives a retriever per collection.
+    """
+
+    @abstractmethod
+    def add_collection(self, collection_name: str, documents: list[Document]):
+        """Create a collection from documents."""
+
+    @abstractmethod
+    def add_documents(self, collection_name: str, documents: list[Document]):
+        """Embed and insert documents into a collection, creating it if it does not exist."""
+
+    def upsert_documents(self, collection_name: str, documents: list[Document]):
+        """
+        Replace the stored chunks of the documents' candidates with the given documents.
+
+        Args:
+            collection_name (str): Name of the collection.
+            documents (list[Document]): Documents to insert, carrying "candidate_id" metadata.
+                All of a candidate's chunks are expected in the same call.
+        """
+        candidate_ids = list(dict.fromkeys(document.metadata["candidate_id"] for document in documents))
+        self.delete_candidates(collection_name, candidate_ids)
+        self.add_documents(collection_name, documents)
+
+    @abstractmethod
+    def find_candidates(self, collection_name: str, candidate_ids: list[str], sources: list[str]) -> list[dict]:
+        """Return one {"candidate_id", "source", "chunks"} dictionary per stored candidate matching an ID or source."""
+
+    @abstractmethod
+    def delete_candidates(self, collection_name: str, candidate_ids: list[str]) -> int:
+        """Delete all the chunks of some candidates and return the number of deleted chunks."""
+
+    @abstractmethod
+    def flush(self, collection_name: str):
+        """Persist the documents inserted into a collection and make them searchable."""
+
+    @abstractmethod
+    def list_collections(self) -> list[dict]:
+        """Return one {"name", "num_entities"} dictionary per collection."""
+
+    @abstractmethod
+    def release_collection(self, collection_name: str) -> dict:
+        """Free an idle collection's memory, keeping its data. Returns its "entities" and the "vector_bytes" freed."""
+
+    @abstractmethod
+    def drop_collection(self, collection_name: str) -> dict:
+        """Delete a collection. Returns the number of "entities" deleted and the "vector_bytes" they took."""
+
+    @abstractmethod
+    def get_retriever(self, collection_name: str) -> Runnable:
+        """Return the retriever of a collection, raising ValueError if it does not exist."""
@@ -1,8 +1,11 @@
 from .model import ModelManager
 from langchain_core.runnables import RunnablePassthrough
-from .utils import format_docs
+from .utils import assemble_context
 
 
+# Returned by `send_message` when generation fails
+ERROR_RESPONSE = "An error occurred while processing your request."
+
 class Chatbot:
     """
     A chatbot class designed for talent acquisition and recruitment use cases.
@@ -13,9 +16,12 @@ class Chatbot:
         prompt_template: A string template for formatting prompts dynamically.
         pipeline: A pipeline object responsible for generating responses.
         retriever: (Optional) A retriever object for fetching relevant documents.
+        streamer: (Optional) A callable turning a formatted prompt into an iterator of text pieces.
+        context_stats: Token statistics of the context assembled for the last message.
     """
     
-    def __init__(self, memory, prompt_template, pipeline, retriever=None):
+    def __init__(self, memory, prompt_template, pipeline, retriever=None, streamer=None, token_counter=None,
+                 max_context_tokens=None):
         """
         Initializes the Chatbot class with memory, a prompt template, a pipeline, and an optional retriever.
 
@@ -24,11 +30,45 @@ class Chatbot:
             prompt_template: A template string for dynamically formatting prompts.
             pipeline: The pipeline object that generates responses from the formatted prompt.
             retriever: (Optional) An object to retrieve relevant documents for context.
+            streamer: (Optional) A callable turning a formatted prompt into an iterator of
+                generated text pieces, e.g. `GenerationScheduler.stream`. Required by `stream_message`.
+            token_counter: (Optional) A callable counting the tokens of a text, used to budget the context.
+            max_context_tokens: (Optional) Maximum number of tokens of retrieved context in the prompt.
         """
         self.memory = memory
         self.prompt_template = prompt_template
         self.pipeline = pipeline
         self.retriever = retriever
+        self.streamer = streamer
+        self.token_counter = token_counter
+        self.max_context_tokens = max_context_tokens
+        self.context_stats = None
+
+    def _format_prompt(self, message):
+        """
+        Loads memory, retrieves context and formats the prompt for a user query.
+
+        Args:
+            message (str): The user's query.
+
+        Returns:
+            str: The formatted prompt.
+        """
+        # Load memory and retrieve context
+        memory_data = self.memory.load_memory_variables({})
+        context_data = self.retriever.invoke(message) if self.retriever else []
+
+        # Format the retrieved context into a readable string, within the token budget
+        formatted_context, self.context_stats = assemble_context(
+            context_data, self.token_counter, self.max_context_tokens
+        )
+
+        # Dynamically format the prompt
+        return self.prompt_template.format(
+            history=memory_data,
+            context=formatted_context,
+            question=message
+        )
 
     def send_message(self, message):
         """
@@ -41,19 +81,7 @@ class Chatbot:
             str: The generated response, extracted to include only content after <|start_header_id|>assistant<|end_header_id|>.
         """
         try:
-            # Load memory and retrieve context
-            memory_data = self.memory.load_memory_variables({})
-            context_data = self.retriever.invoke(message) if self.retriever else []
-
-            # Format the retrieved context into a readable string
-            formatted_context = format_docs(context_data)
-
-            # Dynamically format the prompt
-            formatted_prompt = self.prompt_template.format(
-                history=memory_data,
-                context=formatted_context,
-                question=message
-            )
+            formatted_prompt = self._format_prompt(message)
 
             # Generate the response
             full_response = self.pipeline.invoke(formatted_prompt)
@@ -67,4 +95,34 @@ class Chatbot:
             return extracted_response
         except Exception as e:
             print(f"Error in send_message: {e}")
-            return "An error occurred while processing your request."
+            return ERROR_RESPONSE
+
+    def stream_message(self, message):
+        """
+        Processes a user query like `send_message`, yielding the response as it is generated.
+
+        The interaction is saved in memory once the whole response has been generated.
+
+        Args:
+            message (str): The user's query.
+
+        Yields:
+            str: Pieces of the generated response.
+        """
+        if self.streamer is None:
+            raise ValueError("A streamer is required to stream responses.")
+
+        formatted_prompt = self._format_prompt(message)
+
+        pieces = []
+        for piece in self.streamer(formatted_prompt):
+            # Leading whitespace after the assistant header is dropped, as in `send_message`
+            if not pieces:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            pieces.append(piece)
+            yield piece
+
+        # Save the interaction in memory
+        self.memory.save_context({"input": message}, {"output": "".join(pieces).strip()})
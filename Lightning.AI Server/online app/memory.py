@@ -0,0 +1,177 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_SESSION = "default"
+
+
+class SessionMemoryStore:
+    """
+    Conversation histories kept per chat session and collection.
+
+    Histories live in a bounded in-memory LRU, and their turns expire a TTL after they were
+    made, in memory as in SQLite. With a SQLite path, turns are also persisted, so histories
+    survive eviction from memory and server restarts. Only the most recent turns fitting a token
+    budget are kept, so the history's share of the prompt stays predictable.
+    """
+
+    def __init__(self, token_counter, max_history_tokens=1024, ttl=86400, max_sessions=1000, sqlite_path=None):
+        """
+        Initialize the store.
+
+        Args:
+            token_counter: Callable returning the number of tokens of a text, e.g. with the model's tokenizer.
+            max_history_tokens (int): Maximum number of tokens of history given to the prompt.
+            ttl (float): Seconds after which a turn expires.
+            max_sessions (int): Maximum number of histories kept in memory, least recently used first out.
+            sqlite_path (str): Optional SQLite database persisting the histories.
+        """
+        self.token_counter = token_counter
+        self.max_history_tokens = max_history_tokens
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # (session ID, collection name) -> {"turns": [(input, output, tokens, created_at)], "updated_at"}
+        self.histories = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.db = None
+        self.last_purge = 0.0
+        if sqlite_path:
+            self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS session_turns ("
+                "session_id TEXT, collection_name TEXT, input TEXT, output TEXT, tokens INTEGER, created_at REAL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS session_turns_key ON session_turns (session_id, collection_name, created_at)"
+            )
+            self.db.commit()
+
+    def session(self, session_id, collection_name):
+        """
+        Return the memory of a session's conversation about a collection.
+
+        Args:
+            session_id (str): The chat session ID (default: a session shared by clients sending none).
+            collection_name (str): The collection the conversation is about.
+
+        Returns:
+            SessionMemory: A memory object usable by `Chatbot`.
+        """
+        return SessionMemory(self, session_id or DEFAULT_SESSION, collection_name or "")
+
+    def _expire(self, now):
+        # Every use moves a history to the end and sets its `updated_at`, so the LRU order is the
+        # order of last use, and histories unused for longer than the TTL are at the front
+        while self.histories:
+            key, history = next(iter(self.histories.items()))
+            if now - history["updated_at"] <= self.ttl:
+                break
+            del self.histories[key]
+
+    def _history(self, key, now):
+        history = self.histories.get(key)
+        if history is None:
+            history = {"turns": self._load(key, now), "updated_at": now}
+            self.histories[key] = history
+            while len(self.histories) > self.max_sessions:
+                self.histories.popitem(last=False)
+        else:
+            # Like `_load`, leave out the turns older than the TTL
+            history["turns"] = [turn for turn in history["turns"] if now - turn[3] <= self.ttl]
+        history["updated_at"] = now
+        self.histories.move_to_end(key)
+        return history
+
+    def _load(self, key, now):
+        if self.db is None:
+            return []
+        rows = self.db.execute(
+            "SELECT input, output, tokens, created_at FROM session_turns "
+            "WHERE session_id = ? AND collection_name = ? AND created_at > ? ORDER BY created_at",
+            (*key, now - self.ttl),
+        ).fetchall()
+        return self._trim([tuple(row) for row in rows])
+
+    def _trim(self, turns):
+        """Keep the most recent turns fitting the token budget."""
+        total = 0
+        for index in range(len(turns) - 1, -1, -1):
+            total += turns[index][2]
+            if total > self.max_history_tokens:
+                return turns[index + 1:]
+        return turns
+
+    def load(self, session_id, collection_name):
+        """
+        Return a conversation's history, formatted like LangChain's buffer memories.
+
+        Returns:
+            str: The "Human: ..." and "AI: ..." lines of the most recent turns within the token budget.
+        """
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            turns = list(self._history((session_id, collection_name), now)["turns"])
+        return "\n".join(f"Human: {question}\nAI: {answer}" for question, answer, _, _ in turns)
+
+    def save(self, session_id, collection_name, question, answer):
+        """
+        Add a turn to a conversation.
+
+        Args:
+            session_id (str): The chat session ID.
+            collection_name (str): The collection the conversation is about.
+            question (str): The user's message.
+            answer (str): The chatbot's response.
+        """
+        tokens = self.token_counter(f"Human: {question}\nAI: {answer}")
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            history = self._history((session_id, collection_name), now)
+            history["turns"] = self._trim(history["turns"] + [(question, answer, tokens, now)])
+
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT INTO session_turns VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, collection_name, question, answer, tokens, now),
+                )
+                # Turns older than the TTL are never loaded again
+                if now - self.last_purge > 60:
+                    self.db.execute("DELETE FROM session_turns WHERE created_at < ?", (now - self.ttl,))
+                    self.last_purge = now
+                self.db.commit()
+
+    def clear(self, session_id, collection_name):
+        """Forget a conversation."""
+        with self.lock:
+            self.histories.pop((session_id, collection_name), None)
+            if self.db is not None:
+                self.db.execute(
+                    "DELETE FROM session_turns WHERE session_id = ? AND collection_name = ?",
+                    (session_id, collection_name),
+                )
+                self.db.commit()
+
+
+class SessionMemory:
+    """
+    One conversation of a `SessionMemoryStore`, exposing the LangChain memory methods `Chatbot` uses.
+    """
+
+    def __init__(self, store, session_id, collection_name):
+        self.store = store
+        self.session_id = session_id
+        self.collection_name = collection_name
+
+    def load_memory_variables(self, inputs):
+        return {"history": self.store.load(self.session_id, self.collection_name)}
+
+    def save_context(self, inputs, outputs):
+        self.store.save(self.session_id, self.collection_name, inputs["input"], outputs["output"])
+
+    def clear(self):
+        self.store.clear(self.session_id, self.collection_name)
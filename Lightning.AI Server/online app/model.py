@@ -25,6 +25,10 @@ class ModelManager:
         Load the tokenizer and model for the specified model ID.
         """
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        # Batched prompts are padded on the left, so that generation continues right after each prompt
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = "left"
         self.model = AutoModelForCausalLM.from_pretrained(
             self.model_id, 
             torch_dtype=self.torch_dtype, 
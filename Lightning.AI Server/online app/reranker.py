@@ -0,0 +1,69 @@
+from typing import Any, Optional, Sequence
+import torch
+from langchain.schema import Document
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor
+from sentence_transformers import CrossEncoder
+
+
+def load_cross_encoder(model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", device=None, max_length=512):
+    """
+    Load a cross-encoder scoring (query, chunk) pairs.
+
+    Args:
+        model_name (str): Hugging Face model ID of the cross-encoder.
+        device (str): Device to run the model on (default: "cuda" if available, else "cpu").
+        max_length (int): Maximum number of tokens per pair, longer pairs are truncated.
+
+    Returns:
+        CrossEncoder: The loaded model.
+    """
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    return CrossEncoder(model_name, device=device, max_length=max_length)
+
+
+class LocalReranker(BaseDocumentCompressor):
+    """
+    Document compressor reranking retrieved chunks with a local cross-encoder, in place of an
+    LLM round-trip per message.
+
+    Chunks are scored in batches and the best `top_n` are kept. With a `score_threshold`, chunks
+    scoring below it are dropped as well, so weakly related chunks never reach the prompt.
+    """
+
+    model: Any
+    top_n: int = 6
+    score_threshold: Optional[float] = None
+    batch_size: int = 32
+
+    def compress_documents(
+        self, documents: Sequence[Document], query: str, callbacks: Optional[Callbacks] = None
+    ) -> Sequence[Document]:
+        """
+        Rerank chunks by their relevance to a query.
+
+        Args:
+            documents (Sequence[Document]): The retrieved chunks.
+            query (str): The query.
+            callbacks: Unused, required by the compressor interface.
+
+        Returns:
+            Sequence[Document]: The kept chunks, most relevant first, with their "relevance_score" in the metadata.
+        """
+        if not documents:
+            return []
+
+        scores = self.model.predict(
+            [(query, document.page_content) for document in documents],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        )
+        ranked = sorted(zip(documents, scores), key=lambda pair: pair[1], reverse=True)
+        if self.score_threshold is not None:
+            ranked = [(document, score) for document, score in ranked if score >= self.score_threshold]
+
+        return [
+            Document(page_content=document.page_content, metadata={**document.metadata, "relevance_score": float(score)})
+            for document, score in ranked[:self.top_n]
+        ]
@@ -0,0 +1,210 @@
+import re
+import time
+import threading
+from collections import OrderedDict, defaultdict
+import numpy as np
+
+
+# Words that refer back to earlier turns, making the answer depend on the conversation history
+# (erring on the side of skipping the cache)
+FOLLOW_UP_WORDS = frozenset(
+    "he him his she her hers they them their theirs those these above previous previously mentioned earlier "
+    "same former latter else".split()
+)
+FOLLOW_UP_OPENINGS = ("and ", "but ", "what about", "how about", "why", "then ")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase a question and strip its punctuation and extra whitespace."""
+    return " ".join(re.sub(r"[^\w\s+#.]|(?<!\w)\.|\.(?!\w)", " ", question.lower()).split())
+
+
+def is_follow_up(question: str) -> bool:
+    """Tell whether a question likely refers to earlier turns of the conversation."""
+    normalized = normalize_question(question)
+    return normalized.startswith(FOLLOW_UP_OPENINGS) or any(
+        word in FOLLOW_UP_WORDS for word in normalized.split()
+    )
+
+
+class ResponseCache:
+    """
+    Cache of chatbot responses, scoped per collection.
+
+    A question is looked up by its normalized text first, then, with an embedding model, by the
+    cosine similarity of its embedding to the cached questions of the same collection. Entries
+    expire after a TTL, the least recently used ones are evicted beyond `max_entries`, and all the
+    entries of a collection are invalidated when its documents change. Follow-up questions are
+    neither looked up nor cached, since their answer depends on the conversation history.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1024, embedding_model=None, similarity_threshold=0.95):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds after which an entry expires.
+            max_entries (int): Maximum number of cached responses.
+            embedding_model: Optional model with an `embed_query` method, enabling the similarity tier.
+            similarity_threshold (float): Minimum cosine similarity for a similar question to hit.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self.entries = OrderedDict()  # (collection name, normalized question) -> entry
+        self.keys_by_collection = defaultdict(set)
+        self.versions = defaultdict(int)  # Incremented when a collection is invalidated
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+
+    def _embed(self, question: str):
+        embedding = np.asarray(self.embedding_model.embed_query(question), dtype=np.float32)
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        keys = self.keys_by_collection.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_collection[key[0]]
+
+    def _live(self, key, now):
+        entry = self.entries.get(key)
+        if entry is not None and now - entry["created_at"] > self.ttl:
+            self._remove(key)
+            self.counters["expired"] += 1
+            return None
+        return entry
+
+    def get(self, collection_name: str, question: str):
+        """
+        Look up the cached response to a question.
+
+        Args:
+            collection_name (str): The collection the question is asked about.
+            question (str): The user's question.
+
+        Returns:
+            str: The cached response, or None on a miss or for a follow-up question.
+        """
+        return self.lookup(collection_name, question)[0]
+
+    def lookup(self, collection_name: str, question: str):
+        """
+        Look up the cached response to a question, also returning the question's embedding if
+        the lookup computed it, so that caching the response on a miss does not embed it again.
+
+        Args:
+            collection_name (str): The collection the question is asked about.
+            question (str): The user's question.
+
+        Returns:
+            tuple: The cached response, or None on a miss or for a follow-up question, and the
+                question's embedding, or None if it was not needed.
+        """
+        if is_follow_up(question):
+            with self.lock:
+                self.counters["skipped"] += 1
+            return None, None
+
+        key = (collection_name, normalize_question(question))
+        now = time.time()
+        with self.lock:
+            self.counters["lookups"] += 1
+            entry = self._live(key, now)
+            if entry is not None:
+                return self._hit(key, entry, "exact_hits"), None
+            candidates = [
+                candidate for candidate in self.keys_by_collection.get(collection_name, ())
+                if self.entries[candidate]["embedding"] is not None
+            ]
+
+        embedding = None
+        if self.embedding_model is not None and candidates:
+            embedding = self._embed(question)
+            with self.lock:
+                candidates = [candidate for candidate in candidates if self._live(candidate, now) is not None]
+                if candidates:
+                    similarities = np.stack([self.entries[candidate]["embedding"] for candidate in candidates]) @ embedding
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        return self._hit(candidates[best], self.entries[candidates[best]], "semantic_hits"), embedding
+
+        with self.lock:
+            self.counters["misses"] += 1
+        return None, embedding
+
+    def _hit(self, key, entry, counter):
+        self.entries.move_to_end(key)
+        self.counters[counter] += 1
+        self.counters["seconds_saved"] += entry["seconds"]
+        return entry["response"]
+
+    def version(self, collection_name: str) -> int:
+        """Return the collection's version, to pass to `put` for a response generated from now on."""
+        with self.lock:
+            return self.versions[collection_name]
+
+    def put(self, collection_name: str, question: str, response: str, seconds: float, version: int = None,
+            embedding=None):
+        """
+        Cache the response to a question, unless it is a follow-up.
+
+        Args:
+            collection_name (str): The collection the question was asked about.
+            question (str): The user's question.
+            response (str): The generated response.
+            seconds (float): Time taken to retrieve and generate the response, saved by each hit.
+            version (int): The collection's version when generation started. The response is not
+                cached if the collection was invalidated since.
+            embedding: The question's embedding returned by `lookup`, computed here if None.
+        """
+        if is_follow_up(question):
+            return
+        if embedding is None and self.embedding_model is not None:
+            embedding = self._embed(question)
+
+        key = (collection_name, normalize_question(question))
+        with self.lock:
+            if version is not None and version != self.versions[collection_name]:
+                return
+            self._remove(key)
+            self.entries[key] = {"response": response, "embedding": embedding, "seconds": seconds,
+                                 "created_at": time.time()}
+            self.keys_by_collection[collection_name].add(key)
+            self.counters["stores"] += 1
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.counters["evictions"] += 1
+
+    def invalidate(self, collection_name: str):
+        """Remove the cached responses of a collection whose documents changed."""
+        with self.lock:
+            for key in list(self.keys_by_collection.get(collection_name, ())):
+                self._remove(key)
+            self.versions[collection_name] += 1
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        """
+        Return the cache's counters since the server started.
+
+        Returns:
+            dict: Lookups, exact and semantic hits, misses, skipped follow-ups, stores, evictions,
+                expirations and invalidations, with the hit rate, the generation time saved and the
+                current number of entries.
+        """
+        with self.lock:
+            stats = {
+                key: int(self.counters[key]) for key in (
+                    "lookups", "exact_hits", "semantic_hits", "misses", "skipped", "stores", "evictions",
+                    "expired", "invalidations",
+                )
+            }
+            hits = stats["exact_hits"] + stats["semantic_hits"]
+            stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+            stats["seconds_saved"] = self.counters["seconds_saved"]
+            stats["entries"] = len(self.entries)
+            return stats
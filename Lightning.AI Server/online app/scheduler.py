@@ -0,0 +1,250 @@
+import time
+import queue
+import threading
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+from transformers.generation.streamers import BaseStreamer
+
+
+# Marks the end of a request's generated text
+_END = object()
+
+
+class GenerationRequest:
+    """
+    A prompt waiting for, or going through, generation, with the queue its text is streamed to.
+    """
+
+    def __init__(self, prompt, max_new_tokens):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.pieces = queue.Queue()
+        self.cancelled = False
+
+
+class BatchStreamer(BaseStreamer):
+    """
+    Streamer decoding the tokens generated for a batch incrementally, and routing the text of
+    each row to its request. A row ends at an end-of-sequence token or at its request's own
+    `max_new_tokens`, even if the rest of the batch keeps generating.
+    """
+
+    def __init__(self, tokenizer, requests, eos_token_ids):
+        self.tokenizer = tokenizer
+        self.requests = requests
+        self.eos_token_ids = eos_token_ids
+        self.tokens = [[] for _ in requests]
+        self.emitted = [0] * len(requests)  # Characters already sent, per row
+        self.done = [False] * len(requests)
+        self.prompt_skipped = False
+
+    def _emit(self, row, final=False):
+        text = self.tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+        # An incomplete multi-byte character decodes to a replacement character until its last token
+        if not final and text.endswith("\ufffd"):
+            return
+        if len(text) > self.emitted[row] and not self.requests[row].cancelled:
+            self.requests[row].pieces.put(text[self.emitted[row]:])
+        self.emitted[row] = len(text)
+
+    def _finish(self, row):
+        self._emit(row, final=True)
+        self.done[row] = True
+        self.requests[row].pieces.put(_END)
+
+    def put(self, value):
+        # `generate` first passes the prompt's token IDs
+        if not self.prompt_skipped:
+            self.prompt_skipped = True
+            return
+
+        tokens = value.reshape(len(self.requests), -1).tolist()
+        for row, request in enumerate(self.requests):
+            if self.done[row]:
+                continue
+            for token in tokens[row]:
+                if token in self.eos_token_ids:
+                    self._finish(row)
+                    break
+                self.tokens[row].append(token)
+            else:
+                if len(self.tokens[row]) >= request.max_new_tokens or request.cancelled:
+                    self._finish(row)
+                else:
+                    self._emit(row)
+
+    def end(self):
+        for row in range(len(self.requests)):
+            if not self.done[row]:
+                self._finish(row)
+
+    def fail(self, error):
+        """Send an error to the requests still generating."""
+        for row, request in enumerate(self.requests):
+            if not self.done[row]:
+                self.done[row] = True
+                request.pieces.put(error)
+
+
+class BatchDone(StoppingCriteria):
+    """
+    Stops generating the rows a `BatchStreamer` has finished, and the whole batch once they all are.
+
+    Stopping criteria returning one flag per row need transformers 4.39 or later (4.47.1 is pinned).
+    """
+
+    def __init__(self, streamer):
+        self.streamer = streamer
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.tensor(self.streamer.done, dtype=torch.bool, device=input_ids.device)
+
+
+class GenerationScheduler:
+    """
+    Single worker generating completions for concurrent requests in dynamic batches.
+
+    Prompts submitted while the model is busy queue up. The worker takes the next prompt, waits up
+    to `max_wait` seconds for more to arrive, and generates up to `max_batch_size` of them in one
+    `generate` call, so the GPU serves several conversations for little more than the cost of one.
+
+    The scheduler can replace a LangChain pipeline for `Chatbot`: `invoke` returns a completion and
+    `stream` yields it as it is generated.
+    """
+
+    def __init__(self, model_manager, max_batch_size=8, max_wait=0.02, max_new_tokens=1024):
+        """
+        Start the scheduler's worker thread.
+
+        Args:
+            model_manager (ModelManager): Manager of the loaded model and tokenizer.
+            max_batch_size (int): Maximum number of prompts generated together.
+            max_wait (float): Seconds the worker waits for more prompts before starting a batch.
+            max_new_tokens (int): Default maximum number of tokens generated per prompt.
+        """
+        if model_manager.model is None or model_manager.tokenizer is None:
+            raise ValueError("Model and tokenizer must be loaded before scheduling generation.")
+
+        self.model = model_manager.model
+        self.tokenizer = model_manager.tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_new_tokens = max_new_tokens
+
+        eos_token_id = self.model.generation_config.eos_token_id
+        self.eos_token_ids = set(eos_token_id if isinstance(eos_token_id, list) else [eos_token_id])
+        self.eos_token_ids.add(self.tokenizer.eos_token_id)
+
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.counters = {"batches": 0, "requests": 0, "generated_tokens": 0, "generation_seconds": 0.0}
+        threading.Thread(target=self._run, name="generation-scheduler", daemon=True).start()
+
+    def submit(self, prompt, max_new_tokens=None):
+        """
+        Queue a prompt for generation.
+
+        Returns:
+            GenerationRequest: The request, whose `pieces` queue receives the generated text.
+        """
+        request = GenerationRequest(prompt, max_new_tokens or self.max_new_tokens)
+        self.requests.put(request)
+        return request
+
+    def stream(self, prompt, max_new_tokens=None):
+        """
+        Generate a completion for a formatted prompt, yielding text as tokens are decoded.
+
+        Args:
+            prompt (str): The fully formatted prompt, including the chat template.
+            max_new_tokens (int): Maximum number of tokens to generate (default: the scheduler's setting).
+
+        Yields:
+            str: Pieces of the generated text, without the prompt.
+        """
+        request = self.submit(prompt, max_new_tokens)
+        try:
+            while True:
+                piece = request.pieces.get()
+                if piece is _END:
+                    return
+                if isinstance(piece, BaseException):
+                    raise piece
+                yield piece
+        finally:
+            # Stop generating for a client that went away
+            request.cancelled = True
+
+    def invoke(self, prompt, max_new_tokens=None):
+        """
+        Generate a completion for a formatted prompt.
+
+        Returns:
+            str: The generated text, without the prompt.
+        """
+        return "".join(self.stream(prompt, max_new_tokens))
+
+    def _next_batch(self):
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [request for request in batch if not request.cancelled]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._generate(batch)
+
+    def _generate(self, batch):
+        started = time.perf_counter()
+        streamer = BatchStreamer(self.tokenizer, batch, self.eos_token_ids)
+        try:
+            # The chat template already contains the special tokens. Token type IDs are left out, as
+            # `generate` rejects them for models that do not use them
+            inputs = self.tokenizer(
+                [request.prompt for request in batch], return_tensors="pt", padding=True, add_special_tokens=False,
+                return_token_type_ids=False,
+            ).to(self.model.device)
+            with torch.inference_mode():
+                self.model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([BatchDone(streamer)]),
+                    max_new_tokens=max(request.max_new_tokens for request in batch),
+                    pad_token_id=self.tokenizer.pad_token_id,
+                )
+            streamer.end()
+        except Exception as e:
+            print(f"Error in batch generation: {e}")
+            streamer.fail(e)
+
+        with self.lock:
+            self.counters["batches"] += 1
+            self.counters["requests"] += len(batch)
+            self.counters["generated_tokens"] += sum(len(tokens) for tokens in streamer.tokens)
+            self.counters["generation_seconds"] += time.perf_counter() - started
+
+    def stats(self):
+        """
+        Return the scheduler's counters since the server started.
+
+        Returns:
+            dict: Batches and requests generated, the average batch size, the generated tokens,
+                the time spent generating and the resulting aggregate tokens per second.
+        """
+        with self.lock:
+            stats = dict(self.counters)
+        stats["average_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["tokens_per_second"] = (
+            stats["generated_tokens"] / stats["generation_seconds"] if stats["generation_seconds"] else 0.0
+        )
+        stats["queued"] = self.requests.qsize()
+        return stats
@@ -1,9 +1,107 @@
+def _count_words(text):
+    return len(text.split())
+
+
+def _merge_overlapping(first, second, min_overlap=20, max_overlap=200):
+    """
+    Merge two chunks of the same resume if one contains the other, or if the end of one is
+    repeated at the start of the other (the splitter's chunk overlap).
+
+    Returns:
+        str: The merged text, or None if the chunks do not overlap.
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for size in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+        if second.endswith(first[:size]):
+            return second + first[size:]
+    return None
+
+
+def _add_passage(passages, text, rank):
+    """Add a chunk to a candidate's passages, merging it with every passage it overlaps."""
+    index = 0
+    while index < len(passages):
+        passage, passage_rank = passages[index]
+        merged = _merge_overlapping(passage, text)
+        if merged is None:
+            index += 1
+            continue
+        # The merged passage may now overlap passages already checked
+        del passages[index]
+        text, rank = merged, min(rank, passage_rank)
+        index = 0
+    passages.append((text, rank))
+
+
+def assemble_context(docs, token_counter=None, max_tokens=None):
+    """
+    Assemble retrieved chunks into the prompt's context, within a token budget.
+
+    Chunks are grouped by candidate under a single "Candidate Name:" header. Duplicated chunks
+    are dropped, and overlapping chunks of the same candidate are merged into one passage. The
+    passages are then added in relevance order (the order of `docs`) while they fit the budget.
+
+    Args:
+        docs (list[Document]): Retrieved chunks, most relevant first.
+        token_counter: Callable returning the number of tokens of a text (default: a word count).
+        max_tokens (int): Maximum number of context tokens (default: no limit).
+
+    Returns:
+        tuple[str, dict]: The context, and its "tokens", the "naive_tokens" of the chunks
+            formatted one by one, the "saved_tokens" and the number of "chunks" and "passages".
+    """
+    token_counter = token_counter or _count_words
+
+    # Passages per candidate, each with the rank of its most relevant chunk
+    candidates = {}
+    for rank, doc in enumerate(docs):
+        candidate_id = doc.metadata.get('candidate_id') or doc.metadata.get('name') or f"chunk-{rank}"
+        candidate = candidates.setdefault(
+            candidate_id, {"name": doc.metadata.get('name', 'Unknown Candidate'), "passages": []}
+        )
+        _add_passage(candidate["passages"], doc.page_content.strip(), rank)
+
+    # Fill the budget with the most relevant passages, counting each candidate's header once
+    selected = {}
+    used = 0
+    ordered = sorted(
+        ((passage_rank, candidate_id, passage) for candidate_id, candidate in candidates.items()
+         for passage, passage_rank in candidate["passages"]),
+        key=lambda item: item[0],
+    )
+    for _, candidate_id, passage in ordered:
+        cost = token_counter(passage)
+        if candidate_id not in selected:
+            cost += token_counter(f"Candidate Name: {candidates[candidate_id]['name']}\n")
+        if max_tokens is not None and used + cost > max_tokens:
+            continue
+        selected.setdefault(candidate_id, []).append(passage)
+        used += cost
+
+    context = "\n\n".join(
+        f"Candidate Name: {candidates[candidate_id]['name']}\n" + "\n".join(passages)
+        for candidate_id, passages in selected.items()
+    )
+
+    naive_tokens = token_counter("\n\n".join(
+        f"Candidate Name: {doc.metadata.get('name', 'Unknown Candidate')}\n{doc.page_content}" for doc in docs
+    ))
+    tokens = token_counter(context)
+    return context, {
+        "tokens": tokens,
+        "naive_tokens": naive_tokens,
+        "saved_tokens": max(naive_tokens - tokens, 0),
+        "chunks": len(docs),
+        "passages": sum(len(passages) for passages in selected.values()),
+    }
+
+
 # function for retrieved documents post processing
-def format_docs(docs):
-    formatted_docs = []
-    for doc in docs:
-        candidate_name = doc.metadata.get('name', 'Unknown Candidate')
-        # Include candidate's name and ID in the content
-        formatted_doc = f"Candidate Name: {candidate_name}\n{doc.page_content}"
-        formatted_docs.append(formatted_doc)
-    return "\n\n".join(formatted_docs)
+def format_docs(docs, token_counter=None, max_tokens=None):
+    """Assemble retrieved chunks into the prompt's context, see `assemble_context`."""
+    return assemble_context(docs, token_counter, max_tokens)[0]
@@ -0,0 +1,35 @@
+"""
+Tests of the Lightning.AI server modules. Run them from the server folder with:
+
+    python -m unittest discover -s tests -t .
+
+The repository keeps the packages in the "offline app" and "online app" folders, deployed as
+`offline_app` and `online_app`, so they are registered under the deployed names when the
+folders are not renamed. Tests needing a GPU stack (torch, transformers...) skip without it.
+"""
+import os
+import sys
+import types
+import importlib.util
+
+
+SERVER_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _register(package, folder):
+    if importlib.util.find_spec(package) is not None:
+        return
+    module = types.ModuleType(package)
+    module.__path__ = [os.path.join(SERVER_ROOT, folder)]
+    sys.modules[package] = module
+
+
+if SERVER_ROOT not in sys.path:
+    sys.path.insert(0, SERVER_ROOT)
+_register("offline_app", "offline app")
+_register("online_app", "online app")
+
+
+def has_modules(*names):
+    """Tell whether all the named modules can be imported, to skip tests needing missing dependencies."""
+    return all(importlib.util.find_spec(name) is not None for name in names)
@@ -0,0 +1,146 @@
+import hashlib
+import tempfile
+import unittest
+import numpy as np
+from langchain.schema import Document
+from offline_app.hybrid import HybridRetrieverManager, reciprocal_rank_fusion
+from offline_app.local_vectordb import LocalRetrieverManager
+from tests.test_local_vectordb import median_seconds
+
+
+# Words an embedding model knows to be related, by concept
+CONCEPTS = {
+    "deep learning": ["pytorch", "tensorflow", "keras", "jax"],
+    "databases": ["postgresql", "mysql", "mongodb", "cassandra"],
+    "cloud": ["aws", "gcp", "azure", "kubernetes"],
+    "frontend": ["react", "vue", "angular", "svelte"],
+}
+SYLLABLES = ["zen", "tri", "quor", "vo", "lex", "ba", "mir", "ond", "kal", "eth", "rus", "pin"]
+
+
+def word_vector(word, dim):
+    seed = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(dim)
+
+
+class ConceptEmbedding:
+    """
+    Toy embedding model behaving like a sentence embedding on resumes: words of the same concept
+    (PyTorch, Keras...) map close together and dominate the vector, while any other word, such as
+    an employer's or a certification's name, only adds a faint word-specific component.
+    """
+
+    def __init__(self, dim=32, word_weight=0.15):
+        self.dim = dim
+        self.word_weight = word_weight
+        self.concepts = {}
+        for concept, words in CONCEPTS.items():
+            center = word_vector(concept, dim)
+            for word in words + concept.split():
+                self.concepts[word] = center + 0.3 * word_vector(word, dim)
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim)
+        for word in text.lower().split():
+            vector += self.concepts.get(word, self.word_weight * word_vector(word, self.dim))
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def resume_chunks(rng, count, employers):
+    """Chunks naming two skills of one concept and an employer, with the concept and employer of each."""
+    concepts = list(CONCEPTS)
+    chunks = []
+    for index in range(count):
+        concept = concepts[rng.integers(len(concepts))]
+        skills = rng.choice(CONCEPTS[concept], 2, replace=False)
+        employer = employers[rng.integers(len(employers))]
+        chunks.append(Document(
+            page_content=f"experienced with {skills[0]} and {skills[1]} while employed by {employer}",
+            metadata={"candidate_id": f"c{index}", "concept": concept, "employer": employer},
+        ))
+    return chunks
+
+
+class ReciprocalRankFusionTests(unittest.TestCase):
+    def test_documents_found_by_both_rankings_come_first(self):
+        a, b, c = (Document(page_content=text, metadata={"candidate_id": text}) for text in "abc")
+        fused = reciprocal_rank_fusion([[a, b], [c, b]], k=3)
+        self.assertEqual(fused[0].page_content, "b")
+        self.assertEqual(len(fused), 3)
+
+
+class HybridRecallTests(unittest.TestCase):
+    """Recall and latency of hybrid (dense + BM25 with RRF) retrieval against dense retrieval alone, on the local backend."""
+
+    CHUNKS = 5000
+    K = 10
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        # A few chunks per employer, as an employer's name rarely appears in more than a few resumes
+        employers = sorted({"".join(rng.choice(SYLLABLES, 4)) for _ in range(3000)})[:2000]
+        cls.chunks = resume_chunks(rng, cls.CHUNKS, employers)
+
+        dense_manager = LocalRetrieverManager(f"{cls.directory.name}/dense", ConceptEmbedding())
+        cls.manager = HybridRetrieverManager(dense_manager, f"{cls.directory.name}/bm25", top_k=cls.K, depth=20)
+        cls.manager.add_collection("resumes", cls.chunks)
+        cls.hybrid = cls.manager.get_retriever("resumes")
+        retriever = dense_manager.get_retriever("resumes")
+        cls.dense = retriever.model_copy(update={"search_kwargs": {**retriever.search_kwargs, "k": cls.K}})
+
+        # Exact-name queries, whose answers only the employer's name tells apart
+        used = sorted({chunk.metadata["employer"] for chunk in cls.chunks})
+        cls.employer_queries = [f"employed by {employer}" for employer in used[:100]]
+        # Paraphrased queries, sharing no word with the chunks they are about
+        cls.concept_queries = [f"{concept} engineers" for concept in CONCEPTS]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def employer_recall(self, retriever):
+        """Share of the chunks naming the queried employer found in the top K, capped at K per query."""
+        recalls = []
+        for query in self.employer_queries:
+            employer = query.split()[-1]
+            relevant = sum(chunk.metadata["employer"] == employer for chunk in self.chunks)
+            found = sum(document.metadata["employer"] == employer for document in retriever.invoke(query))
+            recalls.append(found / min(relevant, self.K))
+        return float(np.mean(recalls))
+
+    def concept_precision(self, retriever):
+        """Share of the top K about the queried concept."""
+        return float(np.mean([
+            np.mean([document.metadata["concept"] == query.rsplit(" ", 1)[0] for document in retriever.invoke(query)])
+            for query in self.concept_queries
+        ]))
+
+    def test_hybrid_finds_exact_names_that_dense_search_misses(self):
+        dense_recall, hybrid_recall = self.employer_recall(self.dense), self.employer_recall(self.hybrid)
+        dense_precision, hybrid_precision = self.concept_precision(self.dense), self.concept_precision(self.hybrid)
+        queries = self.employer_queries + self.concept_queries
+        dense_seconds = median_seconds(self.dense.invoke, queries)
+        hybrid_seconds = median_seconds(self.hybrid.invoke, queries)
+
+        print(
+            f"\nOver {self.CHUNKS} chunks: employer recall@{self.K} {dense_recall:.3f} dense vs {hybrid_recall:.3f} hybrid, "
+            f"concept precision@{self.K} {dense_precision:.3f} dense vs {hybrid_precision:.3f} hybrid, "
+            f"{dense_seconds * 1000:.2f} ms vs {hybrid_seconds * 1000:.2f} ms per query"
+        )
+        self.assertGreaterEqual(hybrid_recall, 0.95)
+        self.assertGreater(hybrid_recall, dense_recall + 0.2)
+        # Fusion must not lose what the embeddings alone get right
+        self.assertGreaterEqual(hybrid_precision, dense_precision - 0.05)
+        self.assertLess(hybrid_seconds, dense_seconds + 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import time
+import hashlib
+import tempfile
+import unittest
+import numpy as np
+from langchain.schema import Document
+from offline_app.local_vectordb import LocalCollection, LocalRetrieverManager, LocalVectorStore, _normalize
+
+
+class HashEmbedding:
+    """Deterministic embedding model: each text gets a random vector seeded by its hash."""
+
+    def _embed(self, text):
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(32).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def clustered_vectors(rng, count, centers, noise=0.6):
+    return centers[rng.integers(0, len(centers), count)] + noise * rng.standard_normal((count, centers.shape[1]))
+
+
+def median_seconds(function, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        function(query)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+class LocalVectorStoreTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def test_from_texts_creates_a_searchable_collection(self):
+        texts = [f"resume {index}" for index in range(20)]
+        store = LocalVectorStore.from_texts(
+            texts, HashEmbedding(), metadatas=[{"candidate_id": f"c{index}"} for index in range(20)],
+            path=self.path, collection_name="resumes",
+        )
+
+        self.assertIsInstance(store.embeddings, HashEmbedding)
+        results = store.similarity_search("resume 7", k=3)
+        self.assertEqual(results[0].page_content, "resume 7")
+        self.assertEqual(results[0].metadata, {"candidate_id": "c7"})
+        # The collection is a regular collection of the manager
+        manager = LocalRetrieverManager(self.path, HashEmbedding())
+        self.assertEqual(manager.list_collections(), [{"name": "resumes", "num_entities": 20}])
+        self.assertEqual(manager.get_retriever("resumes").invoke("resume 3")[0].page_content, "resume 3")
+
+    def test_from_texts_requires_a_path(self):
+        with self.assertRaises(ValueError):
+            LocalVectorStore.from_texts(["text"], HashEmbedding())
+
+    def test_filtered_search_and_delete(self):
+        manager = LocalRetrieverManager(self.path, HashEmbedding())
+        manager.add_collection("resumes", [
+            Document(page_content=f"chunk {index}", metadata={"candidate_id": f"c{index % 4}", "source": "a.md"})
+            for index in range(12)
+        ])
+        results = manager.collection("resumes").search(HashEmbedding().embed_query("chunk 1"), k=10,
+                                                       filter={"candidate_id": ["c1", "c2"]})
+        self.assertEqual({document.metadata["candidate_id"] for document, _ in results}, {"c1", "c2"})
+        self.assertEqual(manager.delete_candidates("resumes", ["c1"]), 3)
+        self.assertEqual(manager.find_candidates("resumes", ["c1", "c2"], []),
+                         [{"candidate_id": "c2", "source": "a.md", "chunks": 3}])
+
+
+class IVFRecallTests(unittest.TestCase):
+    """Recall and latency of the IVF search against a brute-force scan of the same collection."""
+
+    ROWS = 40000
+    DIM = 64
+    K = 10
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((100, cls.DIM))
+        cls.vectors = _normalize(clustered_vectors(rng, cls.ROWS, centers))
+        cls.queries = clustered_vectors(rng, 100, centers)
+
+        cls.collection = LocalCollection(cls.directory.name, ivf_min_rows=10000, nprobe=8)
+        for start in range(0, cls.ROWS, 10000):
+            rows = range(start, start + 10000)
+            cls.collection.add(cls.vectors[start:start + 10000], [str(row) for row in rows], [{"row": row} for row in rows])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def brute_force(self, query):
+        scores = self.vectors @ _normalize(query)
+        top = np.argpartition(-scores, self.K - 1)[:self.K]
+        return set(top[np.argsort(-scores[top])].tolist())
+
+    def test_recall_and_latency_against_brute_force(self):
+        self.assertIsNotNone(self.collection.centroids)
+
+        recall = np.mean([
+            len(self.brute_force(query) & {document.metadata["row"] for document, _ in self.collection.search(query, self.K)})
+            / self.K
+            for query in self.queries
+        ])
+        ivf_seconds = median_seconds(lambda query: self.collection.search(query, self.K), self.queries)
+        centroids, self.collection.centroids = self.collection.centroids, None
+        try:
+            exact_seconds = median_seconds(lambda query: self.collection.search(query, self.K), self.queries)
+        finally:
+            self.collection.centroids = centroids
+
+        print(
+            f"\nIVF over {self.ROWS} rows: recall@{self.K} {recall:.3f}, "
+            f"{ivf_seconds * 1000:.2f} ms per search vs {exact_seconds * 1000:.2f} ms brute force"
+        )
+        self.assertGreaterEqual(recall, 0.9)
+        self.assertLess(ivf_seconds, exact_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+from online_app.memory import SessionMemoryStore
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class SessionMemoryStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("online_app.memory.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store(self, **kwargs):
+        return SessionMemoryStore(count_words, **{"ttl": 100, **kwargs})
+
+    def test_turns_older_than_the_ttl_are_forgotten(self):
+        store = self.store()
+        store.save("s", "c", "first question", "first answer")
+        self.now += 60
+        store.save("s", "c", "second question", "second answer")
+        self.now += 60
+
+        history = store.load("s", "c")
+        self.assertNotIn("first", history)
+        self.assertIn("second", history)
+
+    def test_reloaded_history_does_not_serve_expired_turns(self):
+        store = self.store()
+        store.save("a", "c", "question a", "answer a")
+        self.now += 10
+        store.save("b", "c", "question b", "answer b")
+        self.now += 80
+        # Loading moves "a" behind "b" in the LRU order
+        self.assertIn("question a", store.load("a", "c"))
+        self.now += 15
+
+        # "a"'s turn is now older than the TTL, although "b" in front of it has not expired
+        self.assertEqual(store.load("a", "c"), "")
+        self.assertIn("question b", store.load("b", "c"))
+
+    def test_lru_order_follows_the_last_use(self):
+        store = self.store()
+        store.save("a", "c", "question a", "answer a")
+        self.now += 10
+        store.save("b", "c", "question b", "answer b")
+        self.now += 10
+        store.load("a", "c")
+        self.assertEqual(list(store.histories), [("b", "c"), ("a", "c")])
+        self.now += 95
+        # "b" was last used 105 seconds ago, "a" 95 seconds ago
+        store.load("c", "c")
+        self.assertEqual(list(store.histories), [("a", "c"), ("c", "c")])
+
+    def test_unused_histories_are_evicted_from_memory(self):
+        store = self.store()
+        store.save("a", "c", "question a", "answer a")
+        self.now += 150
+        store.load("b", "c")
+        self.assertEqual(list(store.histories), [("b", "c")])
+
+    def test_persisted_turns_survive_a_restart_within_the_ttl(self):
+        store = self.store(sqlite_path=":memory:")
+        store.save("s", "c", "old question", "old answer")
+        self.now += 60
+        store.save("s", "c", "new question", "new answer")
+        store.histories.clear()
+        self.now += 60
+
+        history = store.load("s", "c")
+        self.assertEqual(history, "Human: new question\nAI: new answer")
+
+    def test_history_is_trimmed_to_the_token_budget(self):
+        store = self.store(max_history_tokens=10)
+        for index in range(3):
+            store.save("s", "c", f"question {index}", f"answer {index}")
+        self.assertEqual(store.load("s", "c"), "Human: question 2\nAI: answer 2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import time
+import unittest
+from unittest import mock
+from langchain.schema import Document
+from tests import has_modules
+
+if has_modules("torch", "sentence_transformers"):
+    import torch
+    from online_app.reranker import LocalReranker, load_cross_encoder
+
+
+# Queries with the one chunk answering them, among chunks a dense search would also return
+RELEVANCE_SET = [
+    ("Who has led a team of engineers?",
+     "Team Lead at Globex, managed six backend engineers and ran their hiring."),
+    ("Which candidates know Kubernetes?",
+     "Deployed the platform's services on Kubernetes clusters with Helm charts."),
+    ("Who studied at a university abroad?",
+     "MSc in Computer Science, Technical University of Munich, Germany."),
+    ("Who has worked on fraud detection?",
+     "Built the real-time fraud detection models scoring card payments at Acme Bank."),
+    ("Which candidates speak French?",
+     "Languages: English (fluent), French (native), Arabic (B2)."),
+    ("Who has an AWS certification?",
+     "Certifications: AWS Certified Solutions Architect - Associate, 2022."),
+    ("Who has experience with React?",
+     "Wrote the customer dashboard's frontend in React and TypeScript."),
+    ("Which candidates worked at a startup?",
+     "Second engineer at a seed-stage startup, shipped its first product to 10k users."),
+]
+
+
+def candidate_chunks(answer):
+    """The chunk answering a query, after the answers of the other queries as distractors."""
+    distractors = [chunk for _, chunk in RELEVANCE_SET if chunk != answer]
+    return [Document(page_content=chunk, metadata={"relevant": chunk == answer}) for chunk in distractors + [answer]]
+
+
+class KeywordModel:
+    """Cross-encoder stand-in scoring a pair by the words the query and chunk share."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append((len(pairs), batch_size))
+        return [len(set(query.lower().split()) & set(chunk.lower().split())) for query, chunk in pairs]
+
+
+@unittest.skipUnless(has_modules("torch", "sentence_transformers"), "requires torch and sentence-transformers")
+class LocalRerankerTests(unittest.TestCase):
+    def test_keeps_the_best_chunks_with_their_score(self):
+        documents = [Document(page_content=text, metadata={"id": index})
+                     for index, text in enumerate(["python django", "java spring", "python flask and django"])]
+        model = KeywordModel()
+        kept = LocalReranker(model=model, top_n=2, batch_size=8).compress_documents(documents, "python django")
+
+        self.assertEqual([document.metadata["id"] for document in kept], [0, 2])
+        self.assertEqual(kept[0].metadata["relevance_score"], 2.0)
+        self.assertEqual(model.batches, [(3, 8)])
+
+    def test_score_threshold_drops_weak_chunks(self):
+        documents = [Document(page_content=text) for text in ["python django", "java spring"]]
+        kept = LocalReranker(model=KeywordModel(), score_threshold=1).compress_documents(documents, "python")
+        self.assertEqual([document.page_content for document in kept], ["python django"])
+
+    def test_cross_encoder_falls_back_to_cpu_without_cuda(self):
+        with mock.patch("online_app.reranker.torch.cuda.is_available", return_value=False), \
+                mock.patch("online_app.reranker.CrossEncoder") as cross_encoder:
+            load_cross_encoder("model")
+        self.assertEqual(cross_encoder.call_args.kwargs["device"], "cpu")
+
+        with mock.patch("online_app.reranker.torch.cuda.is_available", return_value=True), \
+                mock.patch("online_app.reranker.CrossEncoder") as cross_encoder:
+            load_cross_encoder("model")
+        self.assertEqual(cross_encoder.call_args.kwargs["device"], "cuda")
+
+
+@unittest.skipUnless(has_modules("torch", "sentence_transformers") and os.getenv("RERANKER-BENCHMARK"),
+                     "set RERANKER-BENCHMARK=1 to download the cross-encoder and benchmark it")
+class CrossEncoderBenchmarkTests(unittest.TestCase):
+    """Ranking quality and latency of the default cross-encoder, on whichever device is available."""
+
+    def test_precision_and_latency(self):
+        reranker = LocalReranker(model=load_cross_encoder(), top_n=len(RELEVANCE_SET))
+        reranker.compress_documents(candidate_chunks(RELEVANCE_SET[0][1]), RELEVANCE_SET[0][0])  # Warm up
+
+        hits, reciprocal_ranks, timings = 0, [], []
+        for query, answer in RELEVANCE_SET:
+            started = time.perf_counter()
+            ranked = reranker.compress_documents(candidate_chunks(answer), query)
+            timings.append(time.perf_counter() - started)
+            rank = next(index for index, document in enumerate(ranked, start=1) if document.metadata["relevant"])
+            hits += rank == 1
+            reciprocal_ranks.append(1 / rank)
+
+        precision = hits / len(RELEVANCE_SET)
+        mrr = sum(reciprocal_ranks) / len(reciprocal_ranks)
+        timings.sort()
+        print(
+            f"\nCross-encoder on {'cuda' if torch.cuda.is_available() else 'cpu'}: precision@1 {precision:.3f}, MRR {mrr:.3f}, "
+            f"{timings[len(timings) // 2] * 1000:.1f} ms median to rerank {len(RELEVANCE_SET)} chunks"
+        )
+        self.assertGreaterEqual(precision, 0.75)
+        self.assertLess(timings[len(timings) // 2], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
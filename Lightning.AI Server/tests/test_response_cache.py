@@ -0,0 +1,59 @@
+import unittest
+from online_app.response_cache import ResponseCache
+
+
+class CountingEmbedding:
+    """Embedding model counting its calls: questions sharing their first word point the same way."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        first = text.lower().split()[0]
+        return [1.0, 0.0] if first == "who" else [0.0, 1.0]
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_exact_hit_without_embedding_model(self):
+        cache = ResponseCache()
+        self.assertIsNone(cache.get("resumes", "Who knows Django?"))
+        cache.put("resumes", "Who knows Django?", "Ada", seconds=2.0)
+
+        self.assertEqual(cache.get("resumes", "who knows   django"), "Ada")
+        self.assertIsNone(cache.get("other", "Who knows Django?"))
+        self.assertEqual(cache.stats()["exact_hits"], 1)
+
+    def test_a_miss_embeds_the_question_once(self):
+        model = CountingEmbedding()
+        cache = ResponseCache(embedding_model=model, similarity_threshold=0.9)
+        cache.put("resumes", "Who knows Django?", "Ada", seconds=2.0)
+        model.calls = 0
+
+        response, embedding = cache.lookup("resumes", "Which candidates know Flask?")
+        self.assertIsNone(response)
+        cache.put("resumes", "Which candidates know Flask?", "Grace", seconds=2.0, embedding=embedding)
+        self.assertEqual(model.calls, 1)
+
+    def test_similar_question_hits(self):
+        cache = ResponseCache(embedding_model=CountingEmbedding(), similarity_threshold=0.9)
+        cache.put("resumes", "Who knows Django?", "Ada", seconds=2.0)
+
+        self.assertEqual(cache.get("resumes", "Who has used Django?"), "Ada")
+        self.assertIsNone(cache.get("resumes", "Which candidates know Django?"))
+        self.assertEqual(cache.stats()["semantic_hits"], 1)
+
+    def test_follow_ups_and_invalidated_versions_are_not_cached(self):
+        cache = ResponseCache()
+        cache.put("resumes", "What about their education?", "...", seconds=1.0)
+        self.assertEqual(cache.lookup("resumes", "What about their education?"), (None, None))
+
+        version = cache.version("resumes")
+        cache.invalidate("resumes")
+        cache.put("resumes", "Who knows Django?", "Ada", seconds=1.0, version=version)
+        self.assertIsNone(cache.get("resumes", "Who knows Django?"))
+        self.assertEqual(cache.stats()["stores"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
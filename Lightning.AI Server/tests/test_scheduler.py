@@ -0,0 +1,127 @@
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+from tests import has_modules
+
+if has_modules("torch", "transformers"):
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+    from online_app.scheduler import GenerationScheduler
+
+
+PAD_ID, EOS_ID, LAST_ID, VOCAB_SIZE = 0, 1, 30, 40
+
+
+def counting_tokenizer():
+    """Word-level tokenizer over "<pad>", "<eos>" and the words "w2" to "w39"."""
+    vocab = {"<pad>": PAD_ID, "<eos>": EOS_ID, **{f"w{index}": index for index in range(2, VOCAB_SIZE)}}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<pad>"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", eos_token="<eos>", padding_side="left"
+    )
+
+
+if has_modules("torch", "transformers"):
+    class CountingLM(GPT2LMHeadModel):
+        """
+        Tiny GPT-2 that counts: after the word "wN" it generates "wN+1", and an end-of-sequence
+        token after "w30", so each prompt ends after a known number of tokens.
+        """
+
+        def __init__(self, config, step_seconds=0.01):
+            super().__init__(config)
+            self.step_seconds = step_seconds
+            self.steps = 0
+
+        def forward(self, input_ids=None, **kwargs):
+            self.steps += 1
+            # Slow enough that the rows' ends are told apart by the streams
+            time.sleep(self.step_seconds)
+            output = super().forward(input_ids=input_ids, **kwargs)
+            last = input_ids[:, -1]
+            following = torch.where(last >= LAST_ID, torch.full_like(last, EOS_ID), last + 1)
+            logits = torch.full_like(output.logits[:, -1:, :], float("-inf"))
+            logits[torch.arange(len(last)), 0, following] = 0.0
+            output.logits = logits
+            return output
+
+
+def counted(start, count):
+    return " ".join(f"w{index}" for index in range(start + 1, start + 1 + count))
+
+
+@unittest.skipUnless(has_modules("torch", "transformers"), "requires torch and transformers")
+class GenerationSchedulerLoadTests(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        config = GPT2Config(
+            vocab_size=VOCAB_SIZE, n_positions=64, n_embd=16, n_layer=1, n_head=2,
+            bos_token_id=EOS_ID, eos_token_id=EOS_ID, pad_token_id=PAD_ID,
+        )
+        self.model = CountingLM(config).eval()
+        self.manager = SimpleNamespace(model=self.model, tokenizer=counting_tokenizer())
+
+    def settled_stats(self, scheduler, batches):
+        """The scheduler's stats once it counted `batches` batches, which it does after their streams end."""
+        deadline = time.perf_counter() + 10
+        while scheduler.stats()["batches"] < batches and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        return scheduler.stats()
+
+    def run_concurrently(self, scheduler, prompts):
+        """Stream the prompts from one thread each, all at once, and time the end of each stream."""
+        results, ended = {}, {}
+        barrier = threading.Barrier(len(prompts))
+
+        def client(prompt, max_new_tokens):
+            barrier.wait()
+            results[prompt] = "".join(scheduler.stream(prompt, max_new_tokens))
+            ended[prompt] = time.perf_counter()
+
+        threads = [threading.Thread(target=client, args=item) for item in prompts.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+        return results, ended
+
+    def test_concurrent_requests_are_batched_and_end_on_their_own_eos(self):
+        scheduler = GenerationScheduler(self.manager, max_batch_size=4, max_wait=0.5, max_new_tokens=50)
+        # Prompt to its request's max_new_tokens: "w20" counts 10 words to "w30", then end-of-sequence
+        prompts = {"w20": None, "w26": None, "w29": None, "w10": 3}
+
+        results, ended = self.run_concurrently(scheduler, prompts)
+
+        self.assertEqual(results, {
+            "w20": counted(20, 10),
+            "w26": counted(26, 4),
+            "w29": counted(29, 1),
+            "w10": counted(10, 3),
+        })
+        stats = self.settled_stats(scheduler, 1)
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["average_batch_size"], 4)
+        self.assertEqual(stats["generated_tokens"], 10 + 4 + 1 + 3)
+        # Each stream ends with its own row, not with the batch
+        self.assertLess(ended["w29"], ended["w10"])
+        self.assertLess(ended["w10"], ended["w26"])
+        self.assertLess(ended["w26"], ended["w20"])
+        # The batch stops once its longest row ends, far before the 50 tokens allowed
+        self.assertLessEqual(self.model.steps, 12)
+
+    def test_sequential_requests_are_generated_alone(self):
+        scheduler = GenerationScheduler(self.manager, max_batch_size=4, max_wait=0.01, max_new_tokens=50)
+
+        self.assertEqual(scheduler.invoke("w27"), counted(27, 3))
+        self.settled_stats(scheduler, 1)
+        self.assertEqual(scheduler.invoke("w25", max_new_tokens=2), counted(25, 2))
+        stats = self.settled_stats(scheduler, 2)
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["average_batch_size"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
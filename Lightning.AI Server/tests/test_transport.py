@@ -0,0 +1,65 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+from offline_app.transport import PageTracker, decode_page
+
+
+class PageTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("offline_app.transport.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tracker = PageTracker(expiry_seconds=60)
+
+    def store(self, upload_id, page):
+        state = self.tracker.begin(upload_id, page)
+        if state == "new":
+            self.tracker.complete(upload_id, page, stored=True)
+        return state
+
+    def test_retried_page_is_not_stored_twice(self):
+        self.assertEqual(self.store("u", 0), "new")
+        self.assertEqual(self.store("u", 0), "stored")
+
+    def test_page_being_stored_is_in_progress(self):
+        self.assertEqual(self.tracker.begin("u", 0), "new")
+        self.assertEqual(self.tracker.begin("u", 0), "in_progress")
+        self.tracker.complete("u", 0, stored=False)
+        self.assertEqual(self.tracker.begin("u", 0), "new")
+
+    def test_missing_pages(self):
+        self.store("u", 0)
+        self.store("u", 2)
+        self.assertEqual(self.tracker.missing("u", 3), [1])
+
+    def test_late_retry_after_finalize_is_acknowledged_as_stored(self):
+        self.store("u", 0)
+        self.store("u", 1)
+        self.tracker.finish("u")
+
+        self.assertEqual(self.tracker.begin("u", 1), "stored")
+        self.assertEqual(self.tracker.missing("u", 2), [])
+
+    def test_tombstone_expires(self):
+        self.store("u", 0)
+        self.tracker.finish("u")
+        self.now += 61
+        # The upload is forgotten, its ID starts a new upload
+        self.assertEqual(self.tracker.begin("u", 0), "new")
+
+
+class DecodePageTests(unittest.TestCase):
+    def test_gzip_json_page(self):
+        documents = [{"page_content": "text", "metadata": {"candidate_id": "c1"}}]
+        body = gzip.compress(json.dumps(documents).encode())
+        self.assertEqual(decode_page(body, "application/json", "gzip"), documents)
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(ValueError):
+            decode_page(b"[]", "application/json", "br")
+
+
+if __name__ == "__main__":
+    unittest.main()
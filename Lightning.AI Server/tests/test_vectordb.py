@@ -0,0 +1,142 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from langchain.schema import Document
+from tests import has_modules
+
+if has_modules("pymilvus"):
+    from offline_app.vectordb import BATCH_FIELD, PARTITIONED_MODE, RetrieverManager
+
+
+class FakeMilvus:
+    """
+    In-memory stand-in for a Milvus server: its collections, and the langchain `Milvus` stores,
+    `Collection` handles and `utility` functions the manager reaches it through.
+    """
+
+    def __init__(self, collections=(), batches=()):
+        self.collections = set(collections)
+        self.batches = set(batches)  # Batches stored in the shared collection
+        self.loaded = set(self.collections)
+        self.released = []
+        self.stores = []
+        self.utility = SimpleNamespace(has_collection=lambda name: name in self.collections)
+        self.connections = SimpleNamespace(has_connection=lambda alias: True, connect=lambda **kwargs: None)
+
+    def collection(self, name):
+        fake = self
+
+        class FakeCollection:
+            schema = SimpleNamespace(auto_id=True)
+
+            def load(self):
+                fake.loaded.add(name)
+
+            def release(self):
+                fake.loaded.discard(name)
+                fake.released.append(name)
+
+            def query(self, expr, output_fields, limit=None):
+                return [{BATCH_FIELD: batch} for batch in fake.batches if f'"{batch}"' in expr][:limit]
+
+        return FakeCollection()
+
+    def store(self, embedding_model, collection_name, connection_args, **kwargs):
+        fake = self
+
+        class FakeStore:
+            def __init__(self):
+                self.collection_name = collection_name
+                self.col = fake.collection(collection_name) if collection_name in fake.collections else None
+                self.added = []
+
+            def as_retriever(self, search_kwargs=None):
+                return SimpleNamespace(vectorstore=self, search_kwargs=search_kwargs or {})
+
+            def add_documents(self, documents):
+                self.added.extend(documents)
+
+        store = FakeStore()
+        self.stores.append(store)
+        return store
+
+    def patch(self, test):
+        for name, value in {"Milvus": self.store, "Collection": self.collection, "utility": self.utility,
+                            "connections": self.connections}.items():
+            patcher = mock.patch(f"offline_app.vectordb.{name}", value)
+            patcher.start()
+            test.addCleanup(patcher.stop)
+
+
+@unittest.skipUnless(has_modules("pymilvus"), "requires pymilvus")
+class RetrieverRegistryTests(unittest.TestCase):
+    def manager(self, fake, **kwargs):
+        fake.patch(self)
+        return RetrieverManager("http://milvus", None, embedding_model=None, max_retrievers=2, **kwargs)
+
+    def test_least_recently_used_collection_is_released(self):
+        fake = FakeMilvus(collections=["a", "b", "c"])
+        manager = self.manager(fake)
+
+        first_a = manager.get_retriever("a")
+        manager.get_retriever("b")
+        self.assertIs(manager.get_retriever("a"), first_a)
+        manager.get_retriever("c")
+
+        # "b" was used least recently
+        self.assertEqual(fake.released, ["b"])
+        self.assertEqual(list(manager.retrievers), ["a", "c"])
+        self.assertEqual(fake.loaded, {"a", "c"})
+
+        # Using an evicted collection creates a new retriever, evicting the next one
+        manager.get_retriever("b")
+        self.assertEqual(fake.released, ["b", "a"])
+        self.assertIsNot(manager.get_retriever("a"), first_a)
+
+    def test_released_collection_drops_its_retriever(self):
+        fake = FakeMilvus(collections=["a"])
+        manager = self.manager(fake)
+        manager.get_retriever("a")
+        with mock.patch.object(RetrieverManager, "_usage", return_value=(10, 10 * 4 * 8)):
+            self.assertEqual(manager.release_collection("a"), {"entities": 10, "vector_bytes": 320})
+        self.assertEqual(list(manager.retrievers), [])
+        self.assertEqual(fake.released, ["a"])
+
+    def test_evicted_batch_keeps_the_shared_collection_loaded(self):
+        fake = FakeMilvus(collections=["resumes", "legacy"], batches=["x", "y", "z"])
+        manager = self.manager(fake, storage_mode=PARTITIONED_MODE, shared_collection="resumes")
+
+        retriever = manager.get_retriever("x")
+        self.assertEqual(retriever.vectorstore.collection_name, "resumes")
+        self.assertEqual(retriever.search_kwargs, {"expr": f'{BATCH_FIELD} == "x"'})
+        manager.get_retriever("y")
+        manager.get_retriever("z")
+
+        self.assertEqual(list(manager.retrievers), ["y", "z"])
+        self.assertEqual(fake.released, [])
+        self.assertIn("resumes", fake.loaded)
+
+        # A collection created before the partitioned mode is still its own, released on eviction
+        self.assertEqual(manager.get_retriever("legacy").vectorstore.collection_name, "legacy")
+        manager.get_retriever("x")
+        manager.get_retriever("y")
+        self.assertEqual(fake.released, ["legacy"])
+
+    def test_unknown_batch_is_not_found(self):
+        manager = self.manager(FakeMilvus(collections=["resumes"], batches=["x"]), storage_mode=PARTITIONED_MODE)
+        with self.assertRaises(ValueError):
+            manager.get_retriever("missing")
+        self.assertEqual(list(manager.retrievers), [])
+
+    def test_documents_are_tagged_with_their_batch(self):
+        fake = FakeMilvus(collections=["resumes"])
+        manager = self.manager(fake, storage_mode=PARTITIONED_MODE)
+        manager.add_documents("x", [Document(page_content="chunk", metadata={"name": "ada", "candidate_id": 7})])
+
+        stored = fake.stores[0].added
+        self.assertEqual(stored[0].metadata, {BATCH_FIELD: "x", "source": "", "name": "ada", "candidate_id": "7",
+                                              "section": ""})
+
+
+if __name__ == "__main__":
+    unittest.main()